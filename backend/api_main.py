@@ -5,33 +5,68 @@ Entrypoint for Bouken API.
 """
 
 import os
+import random
 import sys
+import uuid
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional
 
 from util.biome_calculator import BiomeCalculator
-from util.hex_utils import HexUtils
 
 # This line is required for absolute imports to work throughout the project
 sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header
 from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.responses import JSONResponse
-from starlette.status import HTTP_200_OK, HTTP_500_INTERNAL_SERVER_ERROR
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.status import HTTP_200_OK, HTTP_202_ACCEPTED, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND, \
+    HTTP_500_INTERNAL_SERVER_ERROR
 
-from model.requests import CreateExteriorRequest, CreateInteriorRequest
-from model.responses import StatusResponse
+from model.requests import CreateExteriorRequest, CreateExteriorVariantsRequest, CreateInteriorRequest, GenerationMessage, \
+    ReclimateExteriorRequest
+from model.responses import NotReadyResponse, ReclimateResponse, StatusResponse, VariantsResponse
+from state.execution_backend import ExecutionBackend
+from state.map_format import MapFormat
+from util import binary_map_format
+from util.constants import local_cache_max_bytes, local_datastore_path, map_days_ttl, generation_backend, number_of_generation_workers
 from util.i_logger import ILogger
 from util.logger import Logger
 
-from service.generator.exterior_map_generator import ExteriorMapGenerator
-from service.generator.interior_map_generator import InteriorMapGenerator
+from service.datastore.sqlite_datastore import SqliteDatastore
+from service.generator.generation_context import GenerationContext, reclimate_exterior, set_shared_services
+from service.job_runner.i_job_runner import IJobRunner
+from service.job_runner.executor_job_runner import ExecutorJobRunner
+from service.job_runner.queue_job_runner import QueueJobRunner
+from service.queue.queue_factory import create_queue
+from service.read_thru_cache.i_read_thru_cache import IReadThruCache
+from service.read_thru_cache.gcp_read_thru_cache import GCPReadThruCache
+from service.read_thru_cache.lru_read_thru_cache import LruReadThruCache
 
 _logger: ILogger = Logger()
 _biome_calculator = BiomeCalculator()
-_hex_utils = HexUtils()
-_exterior_map_generator: ExteriorMapGenerator = ExteriorMapGenerator(_logger, _biome_calculator, _hex_utils)
-_interior_map_generator: InteriorMapGenerator = InteriorMapGenerator(_logger)
+set_shared_services(_logger, _biome_calculator)
+# Lookups block on Redis and the datastore, so handlers run anything using the cache in the threadpool
+_cache: IReadThruCache = LruReadThruCache(
+    _logger, GCPReadThruCache(_logger, SqliteDatastore(_logger, local_datastore_path)), local_cache_max_bytes)
+
+
+def _create_job_runner() -> IJobRunner:
+    """
+    Create the job runner using the configured generation backend.
+    Every job generates in its own context, so local jobs run in parallel up to the configured number of workers.
+    """
+    if generation_backend == ExecutionBackend.Queue:
+        return QueueJobRunner(_logger, create_queue(_logger), _cache)
+
+    executor: Executor = ProcessPoolExecutor(max_workers=number_of_generation_workers) \
+        if generation_backend == ExecutionBackend.Process else ThreadPoolExecutor(max_workers=number_of_generation_workers)
+    return ExecutorJobRunner(_logger, executor, number_of_generation_workers)
+
+
+_job_runner: IJobRunner = _create_job_runner()
 
 app = FastAPI(
     title='Bouken API',
@@ -69,23 +104,104 @@ async def status() -> JSONResponse:
         return _generate_response(HTTP_500_INTERNAL_SERVER_ERROR, msg)
 
 
+def _not_ready_response(job_id: str) -> JSONResponse:
+    return _generate_response(HTTP_202_ACCEPTED, {
+        'jobId': job_id,
+        'message': 'Map is being generated',
+        'retryTimeMilliseconds': _job_runner.estimate_milliseconds(job_id)
+    })
+
+
+def _persist(results: Dict[str, bytes]) -> None:
+    # In order, so a job's own result, persisted last, is only found once everything else it generated is
+    for cache_key, content in results.items():
+        _cache.set(cache_key, content, map_days_ttl)
+
+
+def _map_response(content: object) -> Response:
+    # Maps are stored already encoded, so are sent as is rather than re-encoded
+    if isinstance(content, bytes) and binary_map_format.is_binary_map(content):
+        return Response(status_code=HTTP_200_OK, content=content, media_type=binary_map_format.media_type)
+    return Response(status_code=HTTP_200_OK, content=content, media_type='application/json')
+
+
+def _submit_job(message: GenerationMessage) -> Response:
+    """
+    Submit a map for generation, or return it straight away if it was already generated.
+    """
+    content: Optional[object] = _cache.get(message.cache_key(), map_days_ttl)
+    if content is not None:
+        return _map_response(content)
+
+    _job_runner.submit(message, _persist)
+    return _not_ready_response(message.map_guid)
+
+
+def _reclimate(map_guid: str, req: ReclimateExteriorRequest) -> Response:
+    """
+    Re-climate an already generated exterior map, storing the result under its own id.
+    """
+    if _job_runner.is_running(map_guid):
+        return _not_ready_response(map_guid)
+
+    content: Optional[object] = _cache.get(f'exterior:{map_guid}', map_days_ttl)
+    if content is None:
+        return _generate_response(HTTP_404_NOT_FOUND, {'message': f'No map found, id: {map_guid}'})
+
+    try:
+        reclimated, changes = reclimate_exterior(content, req.temperature)
+    except ValueError as ex:
+        return _generate_response(HTTP_400_BAD_REQUEST, {'message': str(ex)})
+
+    reclimated_guid: str = req.map_guid(map_guid)
+    _cache.set(f'exterior:{reclimated_guid}', reclimated, map_days_ttl)
+    return _generate_response(HTTP_200_OK, ReclimateResponse(
+        mapId=reclimated_guid, temperature=req.temperature.name, changedRegions=changes).model_dump())
+
+
+def _requested_format(requested: MapFormat, accept: Optional[str]) -> MapFormat:
+    """
+    Use the binary map format if asked for either by request field or Accept header.
+    """
+    if accept and binary_map_format.media_type in accept:
+        return MapFormat.Binary
+    return requested
+
+
+def _poll_job(cache_key: str, job_id: str) -> Response:
+    if _job_runner.is_running(job_id):
+        return _not_ready_response(job_id)
+
+    error: Optional[str] = _job_runner.get_error(job_id)
+    if error:
+        return _generate_response(HTTP_500_INTERNAL_SERVER_ERROR, {'message': 'Error generating map', 'exception': error})
+
+    content: Optional[object] = _cache.get(cache_key, map_days_ttl)
+    if content is None:
+        return _generate_response(HTTP_404_NOT_FOUND, {'message': f'No map found, id: {job_id}'})
+
+    return _map_response(content)
+
+
 @app.post(
     path='/generate/exterior',
-    response_model=StatusResponse,
-    status_code=HTTP_200_OK,
+    response_model=NotReadyResponse,
+    status_code=HTTP_202_ACCEPTED,
     summary='Generate an exterior map',
-    description='Generate an exterior map'
+    description='Submit an exterior map for generation, returning the job id to poll for it, or the map itself if already generated'
 )
-async def create_exterior(req: CreateExteriorRequest) -> JSONResponse:
+async def create_exterior(req: CreateExteriorRequest, accept: Optional[str] = Header(None)) -> Response:
     try:
-        _exterior_map_generator.instantiate(req)
-        exterior_map_guid: str = ''
+        req.format = _requested_format(req.format, accept)
         if req.debug:
-            _exterior_map_generator.debug_render()
-            _exterior_map_generator.debug_save()
-        else:
-            exterior_map_guid = _exterior_map_generator.generate()
-        return _generate_response(200, {'map_guid': exterior_map_guid})
+            context: GenerationContext = GenerationContext(_logger, _biome_calculator)
+            context.exterior_generator.instantiate(req)
+            context.exterior_generator.debug_render()
+            context.exterior_generator.debug_save()
+            return _generate_response(HTTP_200_OK, {'map_guid': ''})
+
+        map_guid: str = req.map_guid() or uuid.uuid4().hex
+        return await run_in_threadpool(_submit_job, GenerationMessage(map_guid=map_guid, exterior=req))
     except Exception as ex:
         msg = {'message': 'Error generating exterior map'}
         _logger.error(msg, ex)
@@ -95,32 +211,100 @@ async def create_exterior(req: CreateExteriorRequest) -> JSONResponse:
 
 @app.get(
     path='/exterior/{user_guid}/{map_guid}',
-    response_model=StatusResponse,
+    response_model=NotReadyResponse,
     status_code=HTTP_200_OK,
     summary='Get an exterior map',
-    description='Get an exterior map'
+    description='Get an exterior map, or how long to wait for it if still generating'
 )
-async def get_exterior(user_guid: str, map_guid: str,) -> JSONResponse:
-    pass
+async def get_exterior(user_guid: str, map_guid: str,) -> Response:
+    try:
+        return await run_in_threadpool(_poll_job, f'exterior:{map_guid}', map_guid)
+    except Exception as ex:
+        msg = {'message': 'Error getting exterior map'}
+        _logger.error(msg, ex)
+        msg.update({'exception': ex.__str__()})
+        return _generate_response(HTTP_500_INTERNAL_SERVER_ERROR, msg)
 
 
 @app.post(
-    path='/generate/interior',
-    response_model=StatusResponse,
+    path='/reclimate/exterior/{user_guid}/{map_guid}',
+    response_model=ReclimateResponse,
     status_code=HTTP_200_OK,
+    summary='Re-climate an exterior map',
+    description='Store an already generated exterior map re-biomed for a new temperature without regenerating it, '
+                'returning the new map id and which regions changed biome'
+)
+async def reclimate_exterior_map(user_guid: str, map_guid: str, req: ReclimateExteriorRequest) -> Response:
+    try:
+        return await run_in_threadpool(_reclimate, map_guid, req)
+    except Exception as ex:
+        msg = {'message': 'Error re-climating exterior map'}
+        _logger.error(msg, ex)
+        msg.update({'exception': ex.__str__()})
+        return _generate_response(HTTP_500_INTERNAL_SERVER_ERROR, msg)
+
+
+@app.post(
+    path='/generate/exterior/variants',
+    response_model=NotReadyResponse,
+    status_code=HTTP_202_ACCEPTED,
+    summary='Generate an exterior map in several climates',
+    description='Submit an exterior map for generation in every combination of the given temperatures and humidities, '
+                'returning the job id to poll for the set of maps, or the set itself if already generated'
+)
+async def create_exterior_variants(req: CreateExteriorVariantsRequest,
+                                   accept: Optional[str] = Header(None)) -> Response:
+    try:
+        req.exterior.format = _requested_format(req.exterior.format, accept)
+
+        # Variants share their terrain through a common seed, so unseeded requests get one
+        if req.exterior.seed is None:
+            req.exterior.seed = random.getrandbits(32)
+
+        return await run_in_threadpool(_submit_job, GenerationMessage(map_guid=req.map_guid(), variants=req))
+    except Exception as ex:
+        msg = {'message': 'Error generating exterior map variants'}
+        _logger.error(msg, ex)
+        msg.update({'exception': ex.__str__()})
+        return _generate_response(HTTP_500_INTERNAL_SERVER_ERROR, msg)
+
+
+@app.get(
+    path='/exterior/variants/{user_guid}/{variants_guid}',
+    response_model=VariantsResponse,
+    status_code=HTTP_200_OK,
+    summary='Get a set of exterior map variants',
+    description='Get the climate and map id of each variant, or how long to wait for them if still generating'
+)
+async def get_exterior_variants(user_guid: str, variants_guid: str) -> Response:
+    try:
+        return await run_in_threadpool(_poll_job, f'variants:{variants_guid}', variants_guid)
+    except Exception as ex:
+        msg = {'message': 'Error getting exterior map variants'}
+        _logger.error(msg, ex)
+        msg.update({'exception': ex.__str__()})
+        return _generate_response(HTTP_500_INTERNAL_SERVER_ERROR, msg)
+
+
+@app.post(
+    path='/generate/interior',
+    response_model=NotReadyResponse,
+    status_code=HTTP_202_ACCEPTED,
     summary='Generate an interior map',
-    description='Generate an interior map'
+    description='Submit an interior map for generation, returning the job id to poll for it, or the map itself if already generated'
 )
-async def create_interior(req: CreateInteriorRequest) -> JSONResponse:
+async def create_interior(req: CreateInteriorRequest, accept: Optional[str] = Header(None)) -> Response:
     try:
-        _interior_map_generator.instantiate(req)
-        interior_map_guid: str = ''
+        req.format = _requested_format(req.format, accept)
         if req.debug:
-            _interior_map_generator.debug_render()
-            # _interior_map_generator.debug_save()
-        else:
-            interior_map_guid = _interior_map_generator.generate()
-        return _generate_response(200, {'map_guid': interior_map_guid})
+            context: GenerationContext = GenerationContext(_logger, _biome_calculator)
+            context.interior_generator.instantiate(req)
+            context.interior_generator.debug_render()
+            # context.interior_generator.debug_save()
+            return _generate_response(HTTP_200_OK, {'map_guid': ''})
+
+        map_guid: str = uuid.uuid4().hex
+        return await run_in_threadpool(_submit_job, GenerationMessage(map_guid=map_guid, interior=req))
     except Exception as ex:
         msg = {'message': 'Error generating interior map'}
         _logger.error(msg, ex)
@@ -130,17 +314,24 @@ async def create_interior(req: CreateInteriorRequest) -> JSONResponse:
 
 @app.get(
     path='/interior/{user_guid}/{map_guid}',
-    response_model=StatusResponse,
+    response_model=NotReadyResponse,
     status_code=HTTP_200_OK,
     summary='Get an interior map',
-    description='Get an interior map'
+    description='Get an interior map, or how long to wait for it if still generating'
 )
-async def get_interior(user_guid: str, map_guid: str) -> JSONResponse:
-    pass
+async def get_interior(user_guid: str, map_guid: str) -> Response:
+    try:
+        return await run_in_threadpool(_poll_job, f'interior:{map_guid}', map_guid)
+    except Exception as ex:
+        msg = {'message': 'Error getting interior map'}
+        _logger.error(msg, ex)
+        msg.update({'exception': ex.__str__()})
+        return _generate_response(HTTP_500_INTERNAL_SERVER_ERROR, msg)
 
 
 @app.on_event('shutdown')
 def shutdown_event() -> None:
+    _job_runner.shutdown()
     _logger.info('Service shutdown')
 
 
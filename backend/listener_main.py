@@ -4,31 +4,92 @@ Separate listener process which works through queue to generate results.
 @author GalenS <galen.scovell@gmail.com>
 """
 
+import multiprocessing
+import time
 
-from service.generator.exterior_map_generator import ExteriorMapGenerator
-from service.generator.interior_map_generator import InteriorMapGenerator
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from model.requests import GenerationMessage
+from service.datastore.sqlite_datastore import SqliteDatastore
+from service.generator.generation_context import generate_map, set_shared_services
 from service.queue.i_queue import IQueue
-from service.queue.gcp_queue import GCPQueue
+from service.queue.queue_factory import create_queue
 from service.read_thru_cache.i_read_thru_cache import IReadThruCache
 from service.read_thru_cache.gcp_read_thru_cache import GCPReadThruCache
-from util.i_biome_calculator import IBiomeCalculator
 from util.biome_calculator import BiomeCalculator
-from util.i_hex_utility import IHexUtility
-from util.hex_utils import HexUtils
+from util.constants import number_of_listeners, listener_poll_seconds, map_days_ttl, local_datastore_path
 from util.i_logger import ILogger
 from util.logger import Logger
 
 
-_logger: ILogger = Logger()
-_biome_calculator: IBiomeCalculator = BiomeCalculator()
-_hex_util: IHexUtility = HexUtils()
+def _handle(logger: ILogger, cache: IReadThruCache, payload: str) -> bool:
+    """
+    Generate the map a message requests, returning whether the message can be acknowledged:
+    only once the result is persisted, or if the message is malformed or its parameters can never generate a map.
+    Messages left unacknowledged are redelivered, so a failed generation is retried.
+    Once acknowledged, the map's pending marker is removed, an error being recorded first if it can never be generated.
+    """
+    try:
+        message: GenerationMessage = GenerationMessage.model_validate_json(payload)
+    except ValidationError as ex:
+        logger.error(f'Dropping malformed queue message: {payload}', ex)
+        return True
+
+    logger.info(f'Listener -> Generating {message.cache_key()}')
+    try:
+        results: Dict[str, bytes] = generate_map(message)
+    except ValueError as ex:
+        logger.error(f'Dropping message which can never generate a map: {payload}', ex)
+        cache.set(GenerationMessage.error_key(message.map_guid), str(ex), map_days_ttl)
+        cache.delete(GenerationMessage.pending_key(message.map_guid))
+        return True
+
+    for cache_key, content in results.items():
+        if not cache.set(cache_key, content, map_days_ttl):
+            logger.warn(f'Unable to persist {cache_key}, leaving {message.cache_key()} for redelivery')
+            return False
+
+    cache.delete(GenerationMessage.pending_key(message.map_guid))
+    return True
 
-_cache: IReadThruCache = GCPReadThruCache(_logger)
-_queue: IQueue = GCPQueue(_logger)
 
-_exterior_generator: ExteriorMapGenerator = ExteriorMapGenerator(
-    _logger, _biome_calculator, _hex_util)
-_interior_map_generator: InteriorMapGenerator = InteriorMapGenerator(_logger)
+def listen(listener_id: int) -> None:
+    """
+    Work through queue until stopped. Each listener runs in its own process with its own clients.
+    Messages are pulled one at a time and acknowledged as soon as handled, so none wait on other generations
+    past their visibility timeout, and queued messages go to whichever listener is free.
+    """
+    logger: ILogger = Logger()
+    set_shared_services(logger, BiomeCalculator())
+    cache: IReadThruCache = GCPReadThruCache(logger, SqliteDatastore(logger, local_datastore_path))
+    queue: IQueue = create_queue(logger)
+    logger.info(f'Listener {listener_id} -> Started')
+
+    while True:
+        pulled: Optional[Tuple[str, str]] = queue.get_message()
+        if not pulled:
+            time.sleep(listener_poll_seconds)
+            continue
+
+        ack_id, payload = pulled
+        try:
+            if _handle(logger, cache, payload):
+                queue.ack_message(ack_id)
+        except Exception as ex:
+            logger.error(f'Listener {listener_id} -> Unable to handle queue message', ex)
+
 
 if __name__ == '__main__':
-    pass
+    listeners: List[multiprocessing.Process] = [
+        multiprocessing.Process(target=listen, args=(n,), daemon=True) for n in range(number_of_listeners)]
+    for listener in listeners:
+        listener.start()
+
+    try:
+        for listener in listeners:
+            listener.join()
+    except KeyboardInterrupt:
+        for listener in listeners:
+            listener.terminate()
@@ -2,10 +2,15 @@
 Defines all request model for the service.
 """
 
+import hashlib
+import json
+
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+from state.geometry import Geometry
 from state.humidity import Humidity
+from state.map_format import MapFormat
 from state.temperature import Temperature
 
 
@@ -21,8 +26,21 @@ class CreateExteriorRequest(BaseModel):
     min_region_expansions: int
     max_region_expansions: int
     min_region_size_pct: float
+    seed: Optional[int] = None
+    format: MapFormat = MapFormat.Json
+    geometry: Geometry = Geometry.PerHex
     debug: bool = True
 
+    def map_guid(self) -> Optional[str]:
+        """
+        Content address of the map this request generates, None if unseeded (and so not reproducible).
+        """
+        if self.seed is None:
+            return None
+
+        params: str = json.dumps(self.dict(exclude={'debug'}), sort_keys=True)
+        return hashlib.sha256(params.encode('utf-8')).hexdigest()
+
 
 class CreateInteriorRequest(BaseModel):
     pixel_width: int
@@ -33,4 +51,78 @@ class CreateInteriorRequest(BaseModel):
     max_room_size: int
     min_corridor_length: int
     max_corridor_length: int
+    format: MapFormat = MapFormat.Json
     debug: bool = True
+
+
+class CreateExteriorVariantsRequest(BaseModel):
+    """
+    Request for the same exterior map in every combination of the given temperatures and humidities.
+    """
+    exterior: CreateExteriorRequest
+    temperatures: List[Temperature]
+    humidities: List[Humidity]
+
+    def climates(self) -> List[Tuple[Temperature, Humidity]]:
+        climates: List[Tuple[Temperature, Humidity]] = []
+        for temperature in self.temperatures:
+            for humidity in self.humidities:
+                if (temperature, humidity) not in climates:
+                    climates.append((temperature, humidity))
+
+        return climates
+
+    def variant(self, temperature: Temperature, humidity: Humidity) -> CreateExteriorRequest:
+        return self.exterior.model_copy(update={'temperature': temperature, 'humidity': humidity})
+
+    def map_guid(self) -> Optional[str]:
+        """
+        Content address of the variants this request generates, None if unseeded (and so not reproducible).
+        """
+        if self.exterior.seed is None:
+            return None
+
+        params: str = json.dumps(self.dict(exclude={'exterior': {'debug'}}), sort_keys=True)
+        return hashlib.sha256(params.encode('utf-8')).hexdigest()
+
+
+class ReclimateExteriorRequest(BaseModel):
+    """
+    Request for an already generated exterior map in a new temperature, its terrain and regions kept as they are.
+    """
+    temperature: Temperature
+
+    def map_guid(self, source_guid: str) -> str:
+        """
+        Content address of the map re-climating the given source map produces.
+        """
+        params: str = f'{source_guid}:{self.temperature.name}'
+        return hashlib.sha256(params.encode('utf-8')).hexdigest()
+
+
+class GenerationMessage(BaseModel):
+    """
+    Queued request for a listener to generate a map, exactly one of exterior, interior or variants being set.
+    """
+    map_guid: str
+    exterior: Optional[CreateExteriorRequest] = None
+    interior: Optional[CreateInteriorRequest] = None
+    variants: Optional[CreateExteriorVariantsRequest] = None
+
+    def cache_key(self) -> str:
+        map_type: str = 'exterior' if self.exterior else 'variants' if self.variants else 'interior'
+        return f'{map_type}:{self.map_guid}'
+
+    @staticmethod
+    def pending_key(map_guid: str) -> str:
+        """
+        Key of the marker recording a map as queued but not yet generated, shared by every process.
+        """
+        return f'pending:{map_guid}'
+
+    @staticmethod
+    def error_key(map_guid: str) -> str:
+        """
+        Key of the reason a queued map could never be generated, shared by every process.
+        """
+        return f'error:{map_guid}'
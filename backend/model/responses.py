@@ -18,3 +18,25 @@ class NotReadyResponse(BaseModel):
 
 class ErrorResponse(BaseModel):
     message: str
+
+
+class ClimateVariant(BaseModel):
+    temperature: str
+    humidity: str
+    mapId: str
+
+
+class VariantsResponse(BaseModel):
+    variants: List[ClimateVariant]
+
+
+class RegionBiomeChange(BaseModel):
+    regionId: int
+    previousBiome: str
+    biome: str
+
+
+class ReclimateResponse(BaseModel):
+    mapId: str
+    temperature: str
+    changedRegions: List[RegionBiomeChange]
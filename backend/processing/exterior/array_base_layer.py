@@ -0,0 +1,184 @@
+import numpy as np
+
+from typing import List, Optional, Set, Tuple
+
+from processing.exterior.base_layer import BaseLayer
+from processing.exterior.hex import Hex
+from util.disjoint_set import DisjointSet
+from util.i_hex_utility import IHexUtility
+
+from state.terraform import Terraform
+
+
+class ArrayBaseLayer(BaseLayer):
+    """
+    Base layer variant which stores terrain state as a single integer array over the Doubled Coordinate grid.
+
+    Randomizing, terraforming and finalizing run as whole-array neighbor counts instead of per-hex updates.
+    Hex objects are only built once something asks for them (islands, serialization, debug rendering),
+    at which point their states are copied over from the array. From then on hexes may also be changed directly,
+    so array operations first copy their states back unless the array has changed since they were synced.
+    """
+    _no_hex: int = -1
+    _padding: int = 3
+
+    def __init__(self,
+                 hex_util: IHexUtility,
+                 pixel_width: int,
+                 hex_size: int,
+                 initial_land_pct: float,
+                 required_land_pct: float,
+                 pointy: bool = True,
+                 seed: Optional[int] = None) -> None:
+        self.state: Optional[np.ndarray] = None
+        self._valid: Optional[np.ndarray] = None
+        self._hexes_built: bool = False
+        self._hexes_stale: bool = False
+
+        super().__init__(hex_util, pixel_width, hex_size, initial_land_pct, required_land_pct, pointy, seed)
+
+    def __getitem__(self, xy: Tuple[int, int]) -> Optional[Hex]:
+        self._sync_hexes()
+        return super().__getitem__(xy)
+
+    def _build_grid(self) -> None:
+        """
+        Build the state array, marking coordinates which hold no hex. Hexes themselves are deferred.
+        """
+        self._valid = self.topology.valid
+        self.state = np.full((self._columns, self._rows), self._no_hex, dtype=np.int8)
+        self.state[self._valid] = Terraform.Ocean
+
+    def _sync_hexes(self) -> None:
+        """
+        Build hexes if not yet done, then copy array states over to them if the array has changed since.
+        """
+        if not self._hexes_built:
+            self._hexes_built = True
+            super()._build_grid()
+            self._hexes_stale = True
+
+        if self._hexes_stale:
+            self._hexes_stale = False
+            states: List[Terraform] = list(Terraform)
+            for column, column_states in zip(self.grid, self.state.tolist()):
+                for h, state in zip(column, column_states):
+                    if h:
+                        h.set_state(states[state])
+
+    def _pull_hexes(self) -> None:
+        """
+        Copy hex states back into the array, as they may have been modified directly since last synced
+        (islands turning small ones into water, for one).
+        """
+        if not self._hexes_built or self._hexes_stale:
+            return
+
+        coordinates: np.ndarray = self.topology.coordinates
+        self.state[coordinates[:, 0], coordinates[:, 1]] = [
+            self.grid[x][y].get_state() for x, y in coordinates.tolist()]
+
+    def _mark_changed(self) -> None:
+        self._hexes_stale = self._hexes_built
+
+    def _count_neighbors(self, state: Terraform, offsets: Tuple[Tuple[int, int], ...]) -> np.ndarray:
+        """
+        Count, for every coordinate, how many of the neighbors at the given offsets are in a state.
+        """
+        padded: np.ndarray = np.pad((self.state == state).astype(np.int8), self._padding)
+        counts: np.ndarray = np.zeros((self._columns, self._rows), dtype=np.int8)
+        for dx, dy in offsets:
+            x: int = self._padding + dx
+            y: int = self._padding + dy
+            counts += padded[x:x + self._columns, y:y + self._rows]
+
+        return counts
+
+    def total_land_hexes(self) -> int:
+        self._pull_hexes()
+        return int(np.count_nonzero(self.state == Terraform.Land))
+
+    def randomize(self) -> None:
+        """
+        Randomly distribute land hexes across grid.
+        """
+        rng: np.random.Generator = np.random.default_rng(self._random.getrandbits(64))
+        land: np.ndarray = rng.uniform(0, 1, self.state.shape) <= self.initial_land_pct
+        self.state[self._valid & land] = Terraform.Land
+        self.state[self._valid & ~land] = Terraform.Ocean
+        self._mark_changed()
+
+    def terraform(self) -> int:
+        """
+        Grow land hexes across grid, returning how many grew.
+        """
+        self._pull_hexes()
+        total_land: np.ndarray = self._count_neighbors(Terraform.Land, self._direct_neighbors) \
+            + self._count_neighbors(Terraform.Land, self._secondary_neighbors)
+        grow: np.ndarray = self._valid & (self.state != Terraform.Land) & (total_land > 6)
+        self.state[grow] = Terraform.Land
+        self._mark_changed()
+
+        return int(np.count_nonzero(grow))
+
+    def _remove_stray_land(self) -> None:
+        """
+        Remove stray patches of land across grid.
+        """
+        self._pull_hexes()
+        direct_land: np.ndarray = self._count_neighbors(Terraform.Land, self._direct_neighbors)
+        self.state[(self.state == Terraform.Land) & (direct_land < 4)] = Terraform.Ocean
+        self._mark_changed()
+
+    def _enforce_ocean_border(self) -> None:
+        """
+        Ensure a border of ocean hexes on map, keeping track of them to identify the main ocean later.
+        """
+        self._pull_hexes()
+        xs, ys, corners = self._border_coordinates()
+
+        border: np.ndarray = np.zeros(self.state.shape, dtype=bool)
+        border[[x for x in xs if 0 <= x < self._columns], :] = True
+        border[:, [y for y in ys if 0 <= y < self._rows]] = True
+        for x, y in corners:
+            if 0 <= x < self._columns and 0 <= y < self._rows:
+                border[x, y] = True
+
+        border &= self._valid
+        self.state[border] = Terraform.Ocean
+        self._border_ids = np.flatnonzero(border).tolist()
+        self._mark_changed()
+
+    def _remove_interior_oceans(self) -> None:
+        """
+        Locate any 'interior' oceans, and if present replace them with land.
+        All bodies of ocean are found at once, the main ocean being the one connected to the map border.
+        """
+        self._pull_hexes()
+        ocean: np.ndarray = self.state == Terraform.Ocean
+        ids: np.ndarray = np.arange(self.state.size).reshape(self.state.shape)
+
+        # Pair up every ocean coordinate with each of its ocean neighbors
+        a: List[np.ndarray] = []
+        b: List[np.ndarray] = []
+        for dx, dy in self._direct_neighbors:
+            source: Tuple[slice, slice] = (
+                slice(max(0, -dx), self._columns - max(0, dx)), slice(max(0, -dy), self._rows - max(0, dy)))
+            target: Tuple[slice, slice] = (
+                slice(max(0, dx), self._columns - max(0, -dx)), slice(max(0, dy), self._rows - max(0, -dy)))
+            both: np.ndarray = ocean[source] & ocean[target]
+            a.append(ids[source][both])
+            b.append(ids[target][both])
+
+        bodies: DisjointSet = DisjointSet(self.state.size)
+        bodies.union(np.concatenate(a), np.concatenate(b))
+        roots: np.ndarray = bodies.roots()
+
+        flat_ocean: np.ndarray = ocean.ravel()
+        ocean_ids: List[int] = np.flatnonzero(flat_ocean).tolist()
+        main_roots: Set[int] = self._main_ocean_roots(
+            roots, ocean_ids, [i for i in self._border_ids if flat_ocean[i]])
+
+        interior: np.ndarray = ocean & ~np.isin(roots, list(main_roots)).reshape(self.state.shape)
+        self.state[interior] = Terraform.Land
+        self._mark_changed()
@@ -1,13 +1,16 @@
-import math
 import random
+import numpy as np
 import pygame
 
-from typing import List, Optional, Tuple, Set
+from typing import Iterator, List, Optional, Tuple, Set
 
+from processing.exterior.grid_topology import GridTopology
 from processing.exterior.hex import Hex
+from util.disjoint_set import DisjointSet
 from util.i_hex_utility import IHexUtility
 from util.constants import dryness_color, freshwater_color
 
+from state.geometry import Geometry
 from state.terraform import Terraform
 
 
@@ -18,6 +21,7 @@ class BaseLayer:
     Defines a 2D grid of hexes, using Doubled Coordinates as offset.
     Hexes can be either pointy or flat topped - calculations will shift accordingly.
     Allows for both indexed set/get and generator looping of all hexes.
+    Layout-only details are taken from a topology shared with other maps of the same layout.
     """
     def __init__(self,
                  hex_util: IHexUtility,
@@ -25,65 +29,30 @@ class BaseLayer:
                  hex_size: int,
                  initial_land_pct: float,
                  required_land_pct: float,
-                 pointy: bool = True) -> None:
+                 pointy: bool = True,
+                 seed: Optional[int] = None) -> None:
         self.hex_util: IHexUtility = hex_util
+        self.topology: GridTopology = GridTopology.get(hex_util, pixel_width, hex_size, pointy)
         self._pixel_width: int = pixel_width
-        self._pixel_height: int = round(math.sqrt(1 / 3) * self._pixel_width)
+        self._pixel_height: int = self.topology.pixel_height
         self.initial_land_pct: float = initial_land_pct
         self.required_land_pct: float = required_land_pct
 
-        width_diameter, height_diameter, horizontal_spacing, vertical_spacing = \
-            self.hex_util.calculate_layout(hex_size, pointy)
+        self._columns: int = self.topology.columns
+        self._rows: int = self.topology.rows
+        self._direct_neighbors: Tuple[Tuple[int, int], ...] = self.topology.direct_offsets
+        self._secondary_neighbors: Tuple[Tuple[int, int], ...] = self.topology.secondary_offsets
 
-        self._columns: int = int(self._pixel_width // (width_diameter / 2))
-        self._rows: int = int(self._pixel_height // (height_diameter / 2))
-
-        self._direct_neighbors = ((1, 1), (-1, -1), (1, -1), (-1, 1), (2, 0), (-2, 0))
-        self._secondary_neighbors = ((0, 2), (0, -2), (3, 1), (-3, 1), (-3, -1), (3, -1))
-
-        # We assume pointy hexes - swap grid dimensions and modify neighbors if flat-topped instead
-        if not pointy:
-            self._rows, self._columns = self._columns, self._rows
-            self._direct_neighbors = ((1, 1), (-1, -1), (1, -1), (-1, 1), (0, 2), (0, -2))
-            self._secondary_neighbors = ((2, 0), (-2, 0), (1, 3), (-1, 3), (1, -3), (-1, -3))
-
-        # Init grid as 2D array of None
+        self._hex_size: int = hex_size
+        self.pointy: bool = pointy
         self.grid: List[List[Optional[Hex]]] = []
-        for x in range(self._columns):
-            self.grid.append([])
-            for y in range(self._rows):
-                self.grid[x].append(None)
-
-        hex_id: int = 0
-        # Create even hexagons
-        for x in range(0, self._columns, 2):
-            for y in range(0, self._rows, 2):
-                self[x, y] = Hex(hex_id, x, y)
-                hex_id += 1
-
-        # Create odd hexagons
-        for x in range(1, self._columns, 2):
-            for y in range(1, self._rows, 2):
-                self[x, y] = Hex(hex_id, x, y)
-                hex_id += 1
-
-        # Set all neighbors
-        for x in range(self._columns):
-            for y in range(self._rows):
-                h: Hex = self[x, y]
-                if h:
-                    h.direct_neighbors = self._set_direct_neighbors(h)
-                    h.secondary_neighbors = self._set_secondary_neighbors(h)
-
-        # Set hex properties
-        for h in self.generator():
-            h.construct(width_diameter, height_diameter, horizontal_spacing, vertical_spacing)
-            h.vertices = self.hex_util.calculate_hex_corners(h.pixel_center_x, h.pixel_center_y, hex_size, pointy)
+        self._build_grid()
 
-        self._random: random.Random = random.Random()
+        self._random: random.Random = random.Random(seed)
+        self._border_ids: List[int] = []
 
-        self.actual_width: int = round(horizontal_spacing / 2 + horizontal_spacing * self._columns)
-        self.actual_height: int = round(vertical_spacing + vertical_spacing * self._rows)
+        self.actual_width: int = self.topology.actual_width
+        self.actual_height: int = self.topology.actual_height
 
         self.hex_util.set_max_distance((self._columns * self._rows) / 200)
 
@@ -101,21 +70,63 @@ class BaseLayer:
             return self.grid[xy[0]][xy[1]]
         return None
 
-    def serialize(self) -> dict:
-        hexes: dict = {}
+    def __getstate__(self) -> dict:
+        # Hexes are pickled without their neighbors, so keep those alongside the grid instead,
+        # listed last so every hex has already been pickled by the time they are reached.
+        # The topology is shared rather than part of this layer's state, so is looked up again on load
+        state: dict = self.__dict__.copy()
+        state['topology'] = None
+        state['_hex_neighbors'] = [
+            (h.direct_neighbors, h.secondary_neighbors) for row in self.grid for h in row if h]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        hex_neighbors: List[Tuple[List[Hex], List[Hex]]] = state.pop('_hex_neighbors')
+        self.__dict__.update(state)
+        self.topology = GridTopology.get(self.hex_util, self._pixel_width, self._hex_size, self.pointy)
+
+        hexes: List[Hex] = [h for row in self.grid for h in row if h]
+        for h, (direct_neighbors, secondary_neighbors) in zip(hexes, hex_neighbors):
+            h.direct_neighbors = direct_neighbors
+            h.secondary_neighbors = secondary_neighbors
+            h.grid_vertices = self.topology.vertices
+
+    def grid_size(self) -> Tuple[int, int]:
+        """
+        Get the number of Doubled Coordinate columns and rows in the grid.
+        """
+        return self._columns, self._rows
+
+    def serialize(self, geometry: Geometry = Geometry.PerHex) -> dict:
+        return dict(self.serialize_items(geometry))
+
+    def serialize_items(self, geometry: Geometry = Geometry.PerHex) -> Iterator[Tuple[str, dict]]:
+        """
+        Serialize hexes one at a time, as (uid, hex) items.
+        """
         for h in self.generator():
-            hexes[str(h.uid)] = h.serialize()
+            yield str(h.uid), h.serialize(geometry)
 
-        return hexes
+    def serialize_layout(self) -> dict:
+        """
+        Serialize what's needed to recompute hex corners from hex centers: corner i lies at
+        center + hex size * (cos, sin) of 60 * i degrees (less 30 if pointy), truncated to integers.
+        """
+        return {
+            'hex-size': self._hex_size,
+            'pointy': self.pointy
+        }
 
-    def total_usable_hexes(self) -> int:
-        total: int = 0
-        for _ in self.generator():
-            total += 1
+    def _build_grid(self) -> None:
+        """
+        Build the grid of hexes, their neighbors and pixel properties coming from the topology.
+        """
+        self.grid = self.topology.create_grid()
 
-        return total
+    def total_usable_hexes(self) -> int:
+        return len(self.topology)
 
-    def _total_land_hexes(self) -> int:
+    def total_land_hexes(self) -> int:
         total: int = 0
         for h in self.generator():
             if h.is_land():
@@ -127,27 +138,7 @@ class BaseLayer:
         """
         Return whether or not the generated map has a reasonable amount of land.
         """
-        return self._total_land_hexes() >= (self.total_usable_hexes() * self.required_land_pct)
-
-    def _set_direct_neighbors(self, h: Hex) -> List[Optional[Hex]]:
-        """
-        Return the 6 direct neighbours of a hex.
-        """
-        delta: List[Tuple[int, int]] = [(h.x + dx, h.y + dy) for dx, dy in self._direct_neighbors]
-        return [self[x, y] for x, y in delta if x > -1 and y > -1 and self[x, y]]
-
-    def _set_secondary_neighbors(self, h: Hex) -> List[Optional[Hex]]:
-        """
-        Return the 6 secondary neighbours of a hex.
-        """
-        delta: List[Tuple[int, int]] = [(h.x + dx, h.y + dy) for dx, dy in self._secondary_neighbors]
-        return [self[x, y] for x, y in delta if x > -1 and y > -1 and self[x, y]]
-
-    def update_hex_neighbors(self) -> None:
-        """
-        Update the neighbor states for all hexes in the grid.
-        """
-        [h.set_neighbor_states() for h in self.generator()]
+        return self.total_land_hexes() >= (self.total_usable_hexes() * self.required_land_pct)
 
     def generator(self) -> Optional[Hex]:
         """
@@ -172,14 +163,16 @@ class BaseLayer:
             else:
                 h.set_ocean()
 
-    def terraform(self) -> None:
+    def terraform(self) -> int:
         """
-        Grow land hexes across grid.
+        Grow land hexes across grid, returning how many grew.
+        Hexes to grow are all found before any is changed, so each pass only counts land from the previous one.
         """
-        self.update_hex_neighbors()
-        for h in self.generator():
-            if not h.is_land() and h.total[Terraform.Land] > 6:
-                h.set_land()
+        grown: List[Hex] = [h for h in self.generator() if not h.is_land() and h.total[Terraform.Land] > 6]
+        for h in grown:
+            h.set_land()
+
+        return len(grown)
 
     def finalize(self) -> None:
         self._remove_stray_land()
@@ -190,14 +183,13 @@ class BaseLayer:
         """
         Remove stray patches of land across grid.
         """
-        self.update_hex_neighbors()
-        for h in self.generator():
-            if h.is_land() and h.direct[Terraform.Land] < 4:
-                h.set_ocean()
+        stray: List[Hex] = [h for h in self.generator() if h.is_land() and h.direct[Terraform.Land] < 4]
+        for h in stray:
+            h.set_ocean()
 
-    def _enforce_ocean_border(self) -> None:
+    def _border_coordinates(self) -> Tuple[List[int], List[int], List[Tuple[int, int]]]:
         """
-        Ensure a border of ocean hexes on map.
+        Return the columns, rows and corner coordinates which make up the map's ocean border.
         """
         xs: List[int] = [0, 1, self._columns, self._columns - 1]
         ys: List[int] = [0, 1, self._rows - 2, self._rows - 3]
@@ -208,51 +200,57 @@ class BaseLayer:
             (2, self._rows - 5), (3, self._rows - 4),
             (self._columns - 2, self._rows - 5), (self._columns - 3, self._rows - 4)
         ]
+        return xs, ys, corners
+
+    def _enforce_ocean_border(self) -> None:
+        """
+        Ensure a border of ocean hexes on map, keeping track of them to identify the main ocean later.
+        """
+        xs, ys, corners = self._border_coordinates()
+
+        self._border_ids = []
         for h in self.generator():
             if h.x in xs or h.y in ys or h.get_tuple_coord() in corners:
                 h.set_ocean()
+                self._border_ids.append(h.uid)
 
     def _remove_interior_oceans(self) -> None:
         """
         Locate any 'interior' oceans, and if present replace them with land.
+        All bodies of ocean are found at once, the main ocean being the one connected to the map border.
         """
-        usable_hexes: List[Hex] = [h for h in self.generator() if h.is_ocean()]
-        found_oceans: List[List[Hex]] = []
-
-        # Pick random ocean hex to start, then expand out until no more ocean to expand to
-        start: Hex = self._random.choice(usable_hexes)
-        usable_hexes.remove(start)
-        ocean_hexes: Set[Hex] = {start}
-        expanded: Set[Hex] = {start}
-        to_expand: Set[Hex] = set()
-        while usable_hexes:
-            for h in expanded:
-                for n in h.direct_neighbors:
-                    if n and n in usable_hexes:
-                        to_expand.add(n)
-                        ocean_hexes.add(n)
-                        usable_hexes.remove(n)
-
-            if not to_expand:
-                found_oceans.append(list(ocean_hexes))
-                ocean_hexes.clear()
-                next_start_hex: Hex = self._random.choice(usable_hexes)
-                expanded = {next_start_hex}
-                ocean_hexes = {next_start_hex}
-                usable_hexes.remove(next_start_hex)
-            else:
-                expanded = to_expand.copy()
-                to_expand.clear()
-
-        if ocean_hexes:
-            found_oceans.append(list(ocean_hexes))
-
-        # Turn all 'oceans" smaller than the largest one into land
-        if len(found_oceans) > 1:
-            found_oceans.sort(key=len, reverse=True)
-            for ocean in found_oceans[1:]:
-                for h in ocean:
-                    h.set_land()
+        ocean_hexes: List[Hex] = [h for h in self.generator() if h.is_ocean()]
+        a: List[int] = []
+        b: List[int] = []
+        for h in ocean_hexes:
+            for n in h.direct_neighbors:
+                if n.is_ocean():
+                    a.append(h.uid)
+                    b.append(n.uid)
+
+        bodies: DisjointSet = DisjointSet(self.total_usable_hexes())
+        bodies.union(np.array(a, dtype=np.int64), np.array(b, dtype=np.int64))
+        roots: np.ndarray = bodies.roots()
+
+        ocean_ids: Set[int] = {h.uid for h in ocean_hexes}
+        main_roots: Set[int] = self._main_ocean_roots(
+            roots, list(ocean_ids), [uid for uid in self._border_ids if uid in ocean_ids])
+        for h in ocean_hexes:
+            if roots[h.uid] not in main_roots:
+                h.set_land()
+
+    @staticmethod
+    def _main_ocean_roots(roots: np.ndarray, ocean_ids: List[int], border_ids: List[int]) -> Set[int]:
+        """
+        Return the roots of the ocean bodies touching the map border, or of the largest body if none do.
+        """
+        if border_ids:
+            return set(roots[border_ids].tolist())
+
+        body_roots, body_sizes = np.unique(roots[ocean_ids], return_counts=True)
+        if len(body_roots) == 0:
+            return set()
+        return {int(body_roots[np.argmax(body_sizes)])}
 
     def debug_render(self, surface: pygame.Surface) -> None:
         for h in self.generator():
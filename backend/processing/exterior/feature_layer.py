@@ -2,7 +2,7 @@ import pygame
 
 from pygame import freetype
 from random import Random
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from processing.exterior.region_layer import RegionLayer
 from processing.exterior.region import Region
@@ -18,12 +18,12 @@ class FeatureLayer:
     """
     Defines feature layer of a map, detailing its landscape features and events.
     """
-    def __init__(self, region_layer: RegionLayer) -> None:
+    def __init__(self, region_layer: RegionLayer, seed: Optional[int] = None) -> None:
         self.regions: List[Region] = []
         for region_id in region_layer.keys():
             self.regions.append(region_layer[region_id])
 
-        self._random: Random = Random()
+        self._random: Random = Random(seed)
 
         self.biome_to_base_landform_possibilities: Dict[Biome, Dict[float, Landform]] = {
             Biome.Grassland: {
@@ -1,9 +1,11 @@
 import random
-from typing import List, Set, Tuple, Optional
+from typing import Dict, List, Set, Tuple, Optional
 
 from processing.exterior.hex import Hex
 from processing.exterior.base_layer import BaseLayer
+from processing.exterior.hydrology import Hydrology
 from util.i_hex_utility import IHexUtility
+from util.sampling_set import SamplingSet
 
 from state.terraform import Terraform
 
@@ -11,41 +13,67 @@ from state.terraform import Terraform
 class GeographyLayer:
     """
     Defines geographic qualities of map (elevation, depth, dryness, freshwater).
+
+    Drainage is analysed on creation, independent of climate. Lakes are then planned
+    from the climate's lake parameters, so one analysis can be shared by several climates.
     """
-    def __init__(self, hex_util: IHexUtility, base_layer: BaseLayer, min_lake_expansions: int, max_lake_expansions: int, min_lake_amount: int, max_lake_amount: int) -> None:
+    def __init__(self, hex_util: IHexUtility, base_layer: BaseLayer, seed: Optional[int] = None) -> None:
         self.hex_util: IHexUtility = hex_util
-        self._min_lake_expansions: int = min_lake_expansions
-        self._max_lake_expansions: int = max_lake_expansions
+        self._min_lake_expansions: int = 0
+        self._max_lake_expansions: int = 0
 
-        self._random: random.Random = random.Random()
+        self._random: random.Random = random.Random(seed)
 
         # Get all base hexes
         self.base_layer: BaseLayer = base_layer
-        self._usable_hexes: Set[Hex] = set()
-        for h in self.base_layer.generator():
-            self._usable_hexes.add(h)
+        self._usable_hexes: SamplingSet[Hex] = SamplingSet(self.base_layer.generator())
 
-        self._lake_amount_target: int = self._random.randint(min_lake_amount, max_lake_amount)
+        self._lake_amount_target: int = 0
         self._made_lakes: int = 0
 
+        # Ocean distances are unaffected by freshwater placement, so they are only calculated once
+        self._ocean_distances: Dict[Hex, float] = self.hex_util.distance_field(
+            list(self._usable_hexes), [Terraform.Ocean])
+
         # Set initial elevation using only oceans, so we can utilize it for freshwater placement
-        self.set_elevation(include_freshwater=False)
+        self.set_elevation(self._ocean_distances)
+
+        # Analyse drainage once, so lake viability and river paths are known before placing anything
+        self.hydrology: Hydrology = Hydrology(self._usable_hexes)
 
         # Collect a small pool of mid-elevation hexes as our possible lake starters
         mid_elevation_hexes_asc: List[Hex] = sorted(list(self._usable_hexes), key=lambda h: h.elevation)
         start_index: int = round(len(mid_elevation_hexes_asc) // 1.2)
         end_index: int = start_index + (start_index // 24)
-        mid_elevation_hexes_asc = mid_elevation_hexes_asc[start_index:end_index]
-        self._random.shuffle(mid_elevation_hexes_asc)
+        self._mid_elevation_hexes: List[Hex] = mid_elevation_hexes_asc[start_index:end_index]
+
+        self.possible_lake_starters: SamplingSet[Hex] = SamplingSet()
 
-        self.possible_lake_starters: List[Hex] = mid_elevation_hexes_asc
+    def plan_lakes(self, min_lake_expansions: int, max_lake_expansions: int, min_lake_amount: int, max_lake_amount: int) -> None:
+        """
+        Set how many lakes to place and how far they expand, which depend on climate, and pick lake starters to match.
+        """
+        self._min_lake_expansions = min_lake_expansions
+        self._max_lake_expansions = max_lake_expansions
+        self._lake_amount_target = self._random.randint(min_lake_amount, max_lake_amount)
+
+        # Only starters far enough inland to never reach the ocean are kept
+        self.possible_lake_starters = SamplingSet(
+            h for h in self._mid_elevation_hexes if self._max_expansions_from(h) >= self._min_lake_expansions)
+
+    def _max_expansions_from(self, h: Hex) -> int:
+        """
+        Return the most expansions a lake starting from a hex can make without bordering the ocean.
+        """
+        return self.hydrology.ocean_hops.get(h, 0) - 2
 
     def _expand_lake(self, start_hex: Hex) -> Tuple[List[Hex], List[Hex]]:
         """
         Expand lake from a starting hex a random amount. If lake is not viable, return a tuple of empty lists.
         At each expansion, a random number of hexes continue to expand to prevent uniformity.
         """
-        expansions: int = self._random.randint(self._min_lake_expansions, self._max_lake_expansions)
+        max_expansions: int = min(self._max_lake_expansions, self._max_expansions_from(start_hex))
+        expansions: int = self._random.randint(self._min_lake_expansions, max_expansions)
         lake_hexes: Set[Hex] = {start_hex}
         just_expanded: List[Hex] = [start_hex]
 
@@ -67,40 +95,34 @@ class GeographyLayer:
                     h: Hex = newly_expanded[n]
                     just_expanded.append(h)
 
-        # Find lake exterior
+        # Find lake exterior. Lakes bordering other freshwater would merge with it rather than make a new body
         exterior: List[Hex] = []
         for h in lake_hexes:
-            if h.direct[Terraform.Ocean] > 0 or h.direct[Terraform.River] > 0:
+            if any(n.is_ocean() or n.is_river() or n.is_lake() for n in h.direct_neighbors):
                 return [], []
-            elif h.direct[Terraform.Land] > 0:
+            elif any(n.is_land() for n in h.direct_neighbors):
                 exterior.append(h)
 
         return list(lake_hexes), exterior
 
-    @staticmethod
-    def _path_river(current: Optional[Hex]) -> List[Hex]:
+    def _path_river(self, lake_hexes: List[Hex], exterior: List[Hex]) -> List[Hex]:
         """
-        Plot a river with its hexes flowing down elevation to the ocean.
+        Plot a river from the lowest hex of a lake's exterior, following drainage down to the ocean.
+        The river starts where the flow leaves the lake for good, and ends early if it joins existing freshwater.
         """
-        river_hexes: List[Hex] = []
+        outlet: Hex = min(exterior, key=lambda h: self.hydrology.water_levels.get(h, h.elevation))
+        flow: List[Hex] = self.hydrology.flow_path(outlet)
 
-        pathing: bool = True
-        while pathing:
-            river_hexes.append(current)
-            neighbors_by_elevation_desc: List[Hex] = sorted(
-                current.direct_neighbors, key=lambda h: h.elevation, reverse=True)
+        lake_set: Set[Hex] = set(lake_hexes)
+        last_lake_index: int = max(n for n, h in enumerate(flow) if h in lake_set)
 
-            if neighbors_by_elevation_desc:
-                next: Hex = neighbors_by_elevation_desc.pop()
-                if current.elevation > next.elevation:
-                    current: Hex = next
-                else:
-                    pathing = False
+        river_hexes: List[Hex] = []
+        for h in flow[last_lake_index + 1:]:
+            if h not in lake_set and (h.is_lake() or h.is_river()):
+                break
+            river_hexes.append(h)
 
-        # Final hex in river should be neighboring ocean
-        if river_hexes[-1].direct[Terraform.Ocean] == 0:
-            return []
-        return list(river_hexes)
+        return river_hexes
 
     def place_freshwater(self) -> bool:
         """
@@ -108,68 +130,64 @@ class GeographyLayer:
         from them to the ocean. Return False once target reached or pool exhausted.
         """
         if self._made_lakes < self._lake_amount_target and self.possible_lake_starters:
-            self.base_layer.update_hex_neighbors()
-            lake_hexes, exterior = self._expand_lake(self.possible_lake_starters.pop())
+            start_hex: Hex = self.possible_lake_starters.pop_random(self._random)
+            if start_hex not in self._usable_hexes:
+                return True
+
+            lake_hexes, exterior = self._expand_lake(start_hex)
             if exterior:
-                exterior.sort(key=lambda h: h.elevation)  # Sort ascending
-                while exterior:
-                    river_hexes: List[Hex] = self._path_river(exterior.pop())
-                    if river_hexes:
-                        # If final result was usable, finalize it
-                        for h in lake_hexes:
-                            h.set_lake()
-                            if h in self._usable_hexes:
-                                self._usable_hexes.remove(h)
-
-                        for h in river_hexes:
-                            h.set_river()
-                            if h in self._usable_hexes:
-                                self._usable_hexes.remove(h)
-
-                        self._made_lakes += 1
-                        return True
+                river_hexes: List[Hex] = self._path_river(lake_hexes, exterior)
+                for h in lake_hexes:
+                    h.set_lake()
+                    self._usable_hexes.discard(h)
+
+                for h in river_hexes:
+                    h.set_river()
+                    self._usable_hexes.discard(h)
+
+                self._made_lakes += 1
             return True
         return False
 
     def finalize(self) -> None:
-        self.base_layer.update_hex_neighbors()
-
         # Set elevation including both ocean and freshwater distances
-        self.set_elevation(include_freshwater=True)
+        hexes: List[Hex] = list(self.base_layer.generator())
+        freshwater_distances: Optional[Dict[Hex, float]] = None
+        if self._made_lakes > 0:
+            freshwater_distances = self.hex_util.distance_field(hexes, [Terraform.Lake, Terraform.River])
+        self.set_elevation(self._ocean_distances, freshwater_distances)
 
         # Set remaining geographic details
-        self.set_dryness()
-        self.set_depth()
-
-        self.base_layer.update_hex_neighbors()
+        self.set_dryness(self._ocean_distances, freshwater_distances)
+        self.set_depth(self.hex_util.distance_field(hexes, [Terraform.Land]))
 
-    def set_elevation(self, include_freshwater: bool) -> None:
+    def set_elevation(self, ocean_distances: Dict[Hex, float], freshwater_distances: Optional[Dict[Hex, float]] = None) -> None:
         """
-        Expand out from each hex until water is hit to determine elevation grade.
+        Use distance fields to determine elevation grade.
         Elevation is a land hex's distance from (mostly) ocean and (minorly) freshwater.
         """
         for h in self.base_layer.generator():
             if h.is_land() or h.is_coast():
-                ocean_elevation: float = self.hex_util.distance(h, [Terraform.Ocean])
+                ocean_elevation: float = ocean_distances[h]
                 elevation: float = ocean_elevation
-                if include_freshwater and self._made_lakes > 0:
-                    freshwater_elevation: float = self.hex_util.distance(h, [Terraform.Lake, Terraform.River])
+                if freshwater_distances:
+                    freshwater_elevation: float = freshwater_distances[h]
                     elevation = (ocean_elevation * 0.6) + (freshwater_elevation * 0.4)
 
                 h.elevation = elevation
             else:
                 h.elevation = 0
 
-    def set_dryness(self) -> None:
+    def set_dryness(self, ocean_distances: Dict[Hex, float], freshwater_distances: Optional[Dict[Hex, float]] = None) -> None:
         """
-        Expand out from each hex until lake is hit to determine moisture grade.
+        Use distance fields to determine moisture grade.
         Dryness is a land hex's distance from (mostly) freshwater sources and (minorly) ocean.
         """
         for h in self.base_layer.generator():
             if h.is_land() or h.is_coast():
-                ocean_distance: float = self.hex_util.distance(h, [Terraform.Ocean])
-                if self._made_lakes > 0:
-                    freshwater_distance = self.hex_util.distance(h, [Terraform.Lake, Terraform.River])
+                ocean_distance: float = ocean_distances[h]
+                if freshwater_distances:
+                    freshwater_distance = freshwater_distances[h]
                 else:
                     freshwater_distance = self.hex_util.normalize(self.hex_util.get_max_distance())
 
@@ -177,13 +195,13 @@ class GeographyLayer:
             else:
                 h.dryness = 0
 
-    def set_depth(self) -> None:
+    def set_depth(self, land_distances: Dict[Hex, float]) -> None:
         """
-        Expand out from each hex until land is hit to determine depth grade.
+        Use distance field to determine depth grade.
         Depth is an ocean hex's distance from land.
         """
         for h in self.base_layer.generator():
             if h.is_ocean() or h.is_lake() or h.is_river():
-                h.depth = self.hex_util.distance(h, [Terraform.Land])
+                h.depth = land_distances[h]
             else:
                 h.depth = 0
@@ -0,0 +1,238 @@
+import hashlib
+import math
+import os
+import threading
+import numpy as np
+
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from processing.exterior.hex import Hex
+from util import shared_arrays
+from util.i_hex_utility import IHexUtility
+from util.constants import data_path, topology_cache_size, topology_cache_path, topology_shared_memory
+
+
+class GridTopology:
+    """
+    Everything about a hex grid which only depends on its layout: grid dimensions, which coordinates hold hexes,
+    each hex's neighbors, pixel center and vertices. Shared between every map generated with the same layout,
+    so must never be modified once built - generations only create fresh hexes from it.
+
+    Hexes are identified by uid, assigned column by column to even hexes first, then odd hexes.
+    Per-hex data is held in read-only arrays, neighbor ids being padded with -1 where a hex has fewer than 6.
+    Those arrays are placed in shared memory if enabled, so every process of the service maps a single copy.
+    Otherwise recently used topologies are kept per process, and every topology built is also saved to disk
+    if a path is configured, so layouts used before only need loading rather than building in new processes.
+
+    Shared memory is host-wide, so blocks are named and tagged by the array format version and the deployment
+    (its install and data directories) as well as the layout, and blocks left by any other are never used.
+    Bump the format version whenever the arrays built for a layout change.
+    """
+    format_version: int = 1
+    _deployment: str = f'{os.path.dirname(os.path.abspath(__file__))}\0{data_path}'
+
+    _cache: 'OrderedDict[Tuple[int, int, bool], GridTopology]' = OrderedDict()
+    _lock: threading.Lock = threading.Lock()
+
+    def __init__(self, hex_util: IHexUtility, pixel_width: int, hex_size: int, pointy: bool) -> None:
+        self.pixel_width: int = pixel_width
+        self.pixel_height: int = round(math.sqrt(1 / 3) * pixel_width)
+        self.hex_size: int = hex_size
+        self.pointy: bool = pointy
+
+        width_diameter, height_diameter, horizontal_spacing, vertical_spacing = \
+            hex_util.calculate_layout(hex_size, pointy)
+        self.layout: Tuple[int, int, int, int] = (width_diameter, height_diameter, horizontal_spacing, vertical_spacing)
+
+        self.columns: int = int(self.pixel_width // (width_diameter / 2))
+        self.rows: int = int(self.pixel_height // (height_diameter / 2))
+
+        self.direct_offsets: Tuple[Tuple[int, int], ...] = ((1, 1), (-1, -1), (1, -1), (-1, 1), (2, 0), (-2, 0))
+        self.secondary_offsets: Tuple[Tuple[int, int], ...] = ((0, 2), (0, -2), (3, 1), (-3, 1), (-3, -1), (3, -1))
+
+        # We assume pointy hexes - swap grid dimensions and modify neighbors if flat-topped instead
+        if not pointy:
+            self.rows, self.columns = self.columns, self.rows
+            self.direct_offsets = ((1, 1), (-1, -1), (1, -1), (-1, 1), (0, 2), (0, -2))
+            self.secondary_offsets = ((2, 0), (-2, 0), (1, 3), (-1, 3), (1, -3), (-1, -3))
+
+        self.actual_width: int = round(horizontal_spacing / 2 + horizontal_spacing * self.columns)
+        self.actual_height: int = round(vertical_spacing + vertical_spacing * self.rows)
+
+        arrays: Dict[str, np.ndarray] = self._find_arrays(hex_util)
+        self.coordinates: np.ndarray = arrays['coordinates']
+        self.uid_grid: np.ndarray = arrays['uid_grid']
+        self.valid: np.ndarray = arrays['valid']
+        self.direct_neighbor_ids: np.ndarray = arrays['direct_neighbor_ids']
+        self.secondary_neighbor_ids: np.ndarray = arrays['secondary_neighbor_ids']
+        self.centers: np.ndarray = arrays['centers']
+        self.vertices: np.ndarray = arrays['vertices']
+
+    def __len__(self) -> int:
+        return len(self.coordinates)
+
+    @classmethod
+    def get(cls, hex_util: IHexUtility, pixel_width: int, hex_size: int, pointy: bool) -> 'GridTopology':
+        """
+        Get the topology for a layout, only looking up or building its arrays if not recently used.
+        """
+        key: Tuple[int, int, bool] = (pixel_width, hex_size, pointy)
+        with cls._lock:
+            topology: Optional[GridTopology] = cls._cache.get(key)
+            if topology is None:
+                topology = GridTopology(hex_util, pixel_width, hex_size, pointy)
+                cls._cache[key] = topology
+                if len(cls._cache) > topology_cache_size:
+                    cls._cache.popitem(last=False)
+            else:
+                cls._cache.move_to_end(key)
+
+            return topology
+
+    def _name(self) -> str:
+        return f'bouken-topology-v{self.format_version}-{self.pixel_width}-{self.hex_size}-' \
+               f'{"pointy" if self.pointy else "flat"}'
+
+    def _shared_name(self) -> str:
+        deployment: str = hashlib.sha256(self._deployment.encode('utf-8')).hexdigest()[:12]
+        return f'{self._name()}-{deployment}'
+
+    def _shared_tag(self) -> bytes:
+        """
+        Identify the layout, format and deployment in full, as the name only holds a prefix of the deployment's hash.
+        """
+        return hashlib.blake2b(f'{self._name()}\0{self._deployment}'.encode('utf-8'), digest_size=16).digest()
+
+    def _find_arrays(self, hex_util: IHexUtility) -> Dict[str, np.ndarray]:
+        """
+        Map the arrays from shared memory if another process already placed them there,
+        otherwise load or build them and place them there for others.
+        """
+        arrays: Optional[Dict[str, np.ndarray]] = None
+        if topology_shared_memory:
+            arrays = shared_arrays.attach(self._shared_name(), self._shared_tag())
+            if arrays is not None:
+                return arrays
+
+        arrays = self._load()
+        if arrays is None:
+            arrays = self._build(hex_util)
+            self._save(arrays)
+
+        if topology_shared_memory:
+            # Another process may have placed them there while these were being built, in which case theirs are used
+            # A block of the same name that doesn't match is never attached, so these stay private to this process
+            name: str = self._shared_name()
+            tag: bytes = self._shared_tag()
+            shared: Optional[Dict[str, np.ndarray]] = \
+                shared_arrays.create(name, tag, arrays) or shared_arrays.attach(name, tag, wait_seconds=1)
+            if shared is not None:
+                return shared
+
+        for array in arrays.values():
+            array.flags.writeable = False
+        return arrays
+
+    def _build(self, hex_util: IHexUtility) -> Dict[str, np.ndarray]:
+        # Even hexes, then odd hexes
+        coordinates: np.ndarray = np.array(
+            [(x, y) for x in range(0, self.columns, 2) for y in range(0, self.rows, 2)] +
+            [(x, y) for x in range(1, self.columns, 2) for y in range(1, self.rows, 2)], dtype=np.int32).reshape(-1, 2)
+        xs: np.ndarray = coordinates[:, 0]
+        ys: np.ndarray = coordinates[:, 1]
+
+        uid_grid: np.ndarray = np.full((self.columns, self.rows), -1, dtype=np.int32)
+        uid_grid[xs, ys] = np.arange(len(coordinates), dtype=np.int32)
+
+        width_diameter, height_diameter, horizontal_spacing, vertical_spacing = self.layout
+        centers: np.ndarray = np.stack(
+            [int(width_diameter / 2) + xs * horizontal_spacing, int(height_diameter / 2) + ys * vertical_spacing], axis=1)
+        vertices: np.ndarray = np.array(
+            [hex_util.calculate_hex_corners(center_x, center_y, self.hex_size, self.pointy)
+             for center_x, center_y in centers.tolist()], dtype=np.int32).reshape(-1, 6, 2)
+
+        return {
+            'coordinates': coordinates,
+            'uid_grid': uid_grid,
+            'valid': uid_grid >= 0,
+            'direct_neighbor_ids': self._neighbor_ids(uid_grid, xs, ys, self.direct_offsets),
+            'secondary_neighbor_ids': self._neighbor_ids(uid_grid, xs, ys, self.secondary_offsets),
+            'centers': centers.astype(np.int32),
+            'vertices': vertices
+        }
+
+    def _neighbor_ids(self,
+                      uid_grid: np.ndarray,
+                      xs: np.ndarray,
+                      ys: np.ndarray,
+                      offsets: Tuple[Tuple[int, int], ...]) -> np.ndarray:
+        """
+        Find the uid of each hex's neighbor at every offset, -1 where it would fall outside the grid.
+        """
+        ids: np.ndarray = np.full((len(xs), len(offsets)), -1, dtype=np.int32)
+        for i, (dx, dy) in enumerate(offsets):
+            nx: np.ndarray = xs + dx
+            ny: np.ndarray = ys + dy
+            inside: np.ndarray = (nx >= 0) & (nx < self.columns) & (ny >= 0) & (ny < self.rows)
+            ids[inside, i] = uid_grid[nx[inside], ny[inside]]
+
+        return ids
+
+    def _path(self) -> str:
+        return os.path.join(topology_cache_path, f'{self._name()}.npz')
+
+    def _load(self) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Load previously saved arrays, None if there are none or they can't be read (and so are rebuilt instead).
+        """
+        if topology_cache_path is None:
+            return None
+
+        try:
+            with np.load(self._path(), allow_pickle=False) as saved:
+                return {name: saved[name] for name in saved.files}
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save(self, arrays: Dict[str, np.ndarray]) -> None:
+        """
+        Save arrays for other processes to load, written to a temporary file first so they are never read half written.
+        Failing to save only means they are built again elsewhere.
+        """
+        if topology_cache_path is None:
+            return
+
+        path: str = self._path()
+        temp_path: str = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            os.makedirs(topology_cache_path, exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(temp_path, path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def create_grid(self) -> List[List[Optional[Hex]]]:
+        """
+        Create a fresh hex for every uid with its neighbors set and counted, laid out as a grid of columns
+        with None where no hex is.
+        """
+        hexes: List[Hex] = []
+        for uid, ((x, y), (center_x, center_y)) in enumerate(zip(self.coordinates.tolist(), self.centers.tolist())):
+            h: Hex = Hex(uid, x, y)
+            h.pixel_center_x = center_x
+            h.pixel_center_y = center_y
+            h.grid_vertices = self.vertices
+            hexes.append(h)
+
+        for h, direct_ids, secondary_ids in zip(
+                hexes, self.direct_neighbor_ids.tolist(), self.secondary_neighbor_ids.tolist()):
+            h.direct_neighbors = [hexes[uid] for uid in direct_ids if uid >= 0]
+            h.secondary_neighbors = [hexes[uid] for uid in secondary_ids if uid >= 0]
+
+        for h in hexes:
+            h.set_neighbor_states()
+
+        return [[hexes[uid] if uid >= 0 else None for uid in column] for column in self.uid_grid.tolist()]
@@ -1,14 +1,40 @@
 from __future__ import annotations
 
-from typing import List, Tuple
+import numpy as np
 
+from operator import attrgetter
+from typing import List, Optional, Sequence, Tuple
+
+
+from state.geometry import Geometry
 from state.terraform import Terraform
 
 
 class Hex:
     """
     Defines a single hexagon cell.
+
+    Slotted, as grids hold a great many of them. Vertices are only looked up from the grid's shared vertex table
+    once asked for, and hashing uses the uid, which is unique within a grid.
     """
+    __slots__ = ('x', 'y', 'uid', 'pixel_center_x', 'pixel_center_y', 'grid_vertices', '_vertices',
+                 'direct_neighbors', 'secondary_neighbors', 'total', 'direct', 'secondary',
+                 '_state', '_on_island', '_in_region', 'island_id', 'region_id', 'elevation', 'dryness', 'depth')
+
+    _state_options: Tuple[Terraform, ...] = (
+        Terraform.Land,
+        Terraform.Coast,
+        Terraform.Ocean,
+        Terraform.Lake,
+        Terraform.River)
+
+    # Neighbors are pickled by the base layer once every hex has been, here they would recurse across the whole grid.
+    # Vertices are looked up again from the grid once restored
+    _pickled: Tuple[str, ...] = ('x', 'y', 'uid', 'pixel_center_x', 'pixel_center_y', 'total', 'direct', 'secondary',
+                                 '_state', '_on_island', '_in_region', 'island_id', 'region_id',
+                                 'elevation', 'dryness', 'depth')
+    _get_pickled: attrgetter = attrgetter(*_pickled)
+
     def __init__(self, uid: int, x: int, y: int) -> None:
         assert ((x + y) % 2 == 0), f'Hex col and row must sum to an even number (found {x}, {y})'
         self.x: int = x
@@ -18,84 +44,133 @@ class Hex:
         self.pixel_center_x: int = 0
         self.pixel_center_y: int = 0
 
-        # Define points of hex cell, connected in order
-        self.vertices: List[Tuple[int, int]] = []
+        # Vertex table of the grid this hex belongs to, holding the 6 vertices of each hex by uid
+        self.grid_vertices: Optional[np.ndarray] = None
+        self._vertices: Optional[List[Tuple[int, int]]] = None
 
-        self.direct_neighbors: List[Hex] = []
-        self.secondary_neighbors: List[Hex] = []
-        self.total: List[Terraform] = []
-        self.direct: List[Terraform] = []
-        self.secondary: List[Terraform] = []
+        self.direct_neighbors: Sequence[Hex] = ()
+        self.secondary_neighbors: Sequence[Hex] = ()
+        self.total: Optional[List[int]] = None
+        self.direct: Optional[List[int]] = None
+        self.secondary: Optional[List[int]] = None
 
         self._state: Terraform = Terraform.Ocean
         self._on_island: bool = False
         self._in_region: bool = False
 
-        self._state_options: List[Terraform] = [
-            Terraform.Land,
-            Terraform.Coast,
-            Terraform.Ocean,
-            Terraform.Lake,
-            Terraform.River]
-
         self.island_id: int = -1
         self.region_id: int = -1
         self.elevation: float = 0
         self.dryness: float = 0
         self.depth: float = 0
 
-    def construct(self, width_diameter: int, height_diameter: int, horizontal_spacing: int, vertical_spacing: int) -> None:
-        width_radius: int = int(width_diameter / 2)
-        height_radius: int = int(height_diameter / 2)
-
-        self.pixel_center_x = width_radius + self.x * horizontal_spacing
-        self.pixel_center_y = height_radius + self.y * vertical_spacing
-
     def __eq__(self, other) -> bool:
         if isinstance(other, Hex):
             return self.uid == other.uid
         return False
 
     def __hash__(self) -> int:
-        return hash((self.x, self.y))
-
-    def serialize(self) -> dict:
-        return {
+        return self.uid
+
+    def __getstate__(self) -> tuple:
+        return Hex._get_pickled(self)
+
+    def __setstate__(self, state: tuple) -> None:
+        for name, value in zip(Hex._pickled, state):
+            setattr(self, name, value)
+
+        self.grid_vertices = None
+        self._vertices = None
+        self.direct_neighbors = ()
+        self.secondary_neighbors = ()
+
+    @property
+    def vertices(self) -> List[Tuple[int, int]]:
+        """
+        Points of hex cell, connected in order.
+        """
+        if self._vertices is None:
+            self._vertices = [tuple(v) for v in self.grid_vertices[self.uid].tolist()]
+        return self._vertices
+
+    @vertices.setter
+    def vertices(self, vertices: List[Tuple[int, int]]) -> None:
+        self._vertices = vertices
+
+    def serialize(self, geometry: Geometry = Geometry.PerHex) -> dict:
+        serialized: dict = {
             'type': self._state.name,
             'elevation': self.elevation,
             'dryness': self.dryness,
-            'depth': self.depth,
-            'vertices': self.vertices
+            'depth': self.depth
         }
 
+        if geometry == Geometry.Layout:
+            serialized['center'] = (self.pixel_center_x, self.pixel_center_y)
+        else:
+            serialized['vertices'] = self.vertices
+
+        return serialized
+
     def get_tuple_coord(self) -> Tuple[int, int]:
         return self.x, self.y
 
     def set_neighbor_states(self) -> None:
-        self.direct = [0 for s in self._state_options]
+        """
+        Count the states of this hex's neighbors from scratch.
+        Only needed once neighbors are first set, as state changes keep their neighbors' counts current from then on.
+        """
+        self.direct = [0] * len(Hex._state_options)
         for h in self.direct_neighbors:
             self.direct[h._state] += 1
 
-        self.secondary = [0 for s in self._state_options]
+        self.secondary = [0] * len(Hex._state_options)
         for h in self.secondary_neighbors:
             self.secondary[h._state] += 1
 
         self.total = [self.direct[n] + self.secondary[n] for n in range(len(self._state_options))]
 
+    def _transition(self, state: Terraform) -> None:
+        """
+        Change state, moving this hex between state counts of each of its neighbors.
+        """
+        previous: Terraform = self._state
+        if previous == state:
+            return
+
+        self._state = state
+        for h in self.direct_neighbors:
+            h.direct[previous] -= 1
+            h.direct[state] += 1
+            h.total[previous] -= 1
+            h.total[state] += 1
+
+        for h in self.secondary_neighbors:
+            h.secondary[previous] -= 1
+            h.secondary[state] += 1
+            h.total[previous] -= 1
+            h.total[state] += 1
+
+    def get_state(self) -> Terraform:
+        return self._state
+
+    def set_state(self, state: Terraform) -> None:
+        self._transition(state)
+
     def set_land(self) -> None:
-        self._state = Terraform.Land
+        self._transition(Terraform.Land)
 
     def set_coast(self) -> None:
-        self._state = Terraform.Coast
+        self._transition(Terraform.Coast)
 
     def set_ocean(self) -> None:
-        self._state = Terraform.Ocean
+        self._transition(Terraform.Ocean)
 
     def set_lake(self) -> None:
-        self._state = Terraform.Lake
+        self._transition(Terraform.Lake)
 
     def set_river(self) -> None:
-        self._state = Terraform.River
+        self._transition(Terraform.River)
 
     def is_land(self) -> bool:
         return self._state == Terraform.Land
@@ -0,0 +1,65 @@
+import heapq
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from processing.exterior.hex import Hex
+
+
+class Hydrology:
+    """
+    Drainage analysis of the land on a map, computed once from hex elevations.
+
+    A priority-flood runs inland from the coast, always continuing from the lowest hex reached so far.
+    Every land hex gets a receiver it flows into, so following receivers from any land hex leads to a hex
+    bordering the ocean. Depressions are filled up to the level they spill over at.
+    """
+    def __init__(self, hexes: Iterable[Hex]) -> None:
+        self.receivers: Dict[Hex, Optional[Hex]] = {}
+        self.water_levels: Dict[Hex, float] = {}
+        self.ocean_hops: Dict[Hex, int] = {}
+
+        coast: List[Hex] = [h for h in hexes if h.is_land() and any(n.is_ocean() for n in h.direct_neighbors)]
+
+        # Flood inward from the coast by elevation, each hex flowing into the hex it was reached from
+        queue: List[Tuple[float, int, Hex]] = []
+        for h in coast:
+            self.receivers[h] = None
+            self.water_levels[h] = h.elevation
+            heapq.heappush(queue, (h.elevation, h.uid, h))
+
+        while queue:
+            level, _, h = heapq.heappop(queue)
+            for n in h.direct_neighbors:
+                if n.is_land() and n not in self.water_levels:
+                    self.receivers[n] = h
+                    self.water_levels[n] = max(n.elevation, level)
+                    heapq.heappush(queue, (self.water_levels[n], n.uid, n))
+
+        # Count hexes to nearest ocean, so we know how far a lake can expand from any hex without reaching it
+        expanded: List[Hex] = coast
+        hops: int = 1
+        for h in expanded:
+            self.ocean_hops[h] = hops
+
+        while expanded:
+            hops += 1
+            newly_expanded: List[Hex] = []
+            for h in expanded:
+                for n in h.direct_neighbors:
+                    if n.is_land() and n not in self.ocean_hops:
+                        self.ocean_hops[n] = hops
+                        newly_expanded.append(n)
+
+            expanded = newly_expanded
+
+    def flow_path(self, h: Hex) -> List[Hex]:
+        """
+        Return the hexes water flows through from a hex down to the ocean, starting with the hex itself.
+        """
+        path: List[Hex] = []
+        current: Optional[Hex] = h
+        while current:
+            path.append(current)
+            current = self.receivers.get(current)
+
+        return path
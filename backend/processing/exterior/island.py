@@ -1,16 +1,15 @@
-from typing import List, Tuple, Set
-
-from shapely.geometry import Polygon, Point
-from shapely.ops import unary_union
+from typing import List, Optional, Tuple, Set
 
 from processing.exterior.hex import Hex
+from processing.exterior.outline import Outline
+from util.sampling_set import SamplingSet
 
 
 class Island:
     """
     Defines an island of a map, composed of multiple hexes.
     """
-    def __init__(self, island_id: int, start_hex: Hex) -> None:
+    def __init__(self, island_id: int, start_hex: Hex, pointy: bool) -> None:
         self.island_id: int = island_id
         self.hexes: List[Hex] = [start_hex]
         self.region_keys: Set[int] = set()
@@ -18,43 +17,54 @@ class Island:
         self.expanded_hexes: Set[Hex] = {start_hex}
         self.can_expand: bool = True
 
-        self.polygon: Polygon = Polygon(start_hex.vertices)
-        self.area: float = self.polygon.area
+        self._pointy: bool = pointy
+        self._outline: Optional[Outline] = None
 
         start_hex.set_island(self.island_id)
 
+    @property
+    def area(self) -> float:
+        return self._get_outline().area
+
     def add_hex(self, h: Hex) -> None:
         """
         Add a hex to this island.
         """
         h.set_island(self.island_id)
         self.hexes.append(h)
+        self._outline = None
 
-    def refresh(self) -> None:
+    def fill(self, hexes: List[Hex]) -> None:
         """
-        Refresh this island's polygon shape and area.
+        Add a complete area of connected hexes to this island at once.
         """
-        to_join = [self.polygon]
+        self.expanded_hexes = {h for h in hexes if not h.is_on_island()}
         for h in self.expanded_hexes:
-            to_join.append(Polygon(h.vertices))
+            self.add_hex(h)
+
+        self.can_expand = False
 
-        self.polygon = unary_union(to_join)
-        self.area: float = self.polygon.area
+    def _get_outline(self) -> Outline:
+        """
+        Get this island's outline, only tracing it again if hexes were added since it was last traced.
+        """
+        if self._outline is None:
+            self._outline = Outline(self.hexes, self._pointy)
+        return self._outline
 
     def get_vertices(self) -> List[Tuple[int, int]]:
         """
         Get this island's exterior vertices defining its shape.
         """
-        return [(int(p[0]), int(p[1])) for p in self.polygon.exterior.coords]
+        return self._get_outline().get_vertices()
 
     def get_centroid(self) -> Tuple[int, int]:
         """
-        Get this island's polygon centroid position.
+        Get this island's outline centroid position.
         """
-        p: Point = self.polygon.centroid
-        return int(p.x), int(p.y)
+        return self._get_outline().get_centroid()
 
-    def expand(self, usable_hexes: Set[Hex]):
+    def expand(self, usable_hexes: SamplingSet[Hex]):
         """
         Expand this island's area outward from its exterior hexes.
         """
@@ -71,5 +81,3 @@ class Island:
             for h in newly_expanded:
                 self.expanded_hexes.add(h)
                 self.add_hex(h)
-
-            self.refresh()
@@ -1,12 +1,13 @@
 import random
 import pygame
 
-from typing import List, Optional, Dict, KeysView, Set
+from typing import Iterator, List, Optional, Dict, KeysView, Set, Tuple
 
 from processing.exterior.hex import Hex
 from processing.exterior.island import Island
 from processing.exterior.base_layer import BaseLayer
 from util.constants import island_fill_color
+from util.sampling_set import SamplingSet
 
 
 class IslandLayer:
@@ -14,13 +15,13 @@ class IslandLayer:
     Defines island layer of a map, detailing separate areas.
     Interactions directly with this object deal with the Islands dict, its primary data.
     """
-    def __init__(self, base_layer: BaseLayer, min_island_size: int) -> None:
+    def __init__(self, base_layer: BaseLayer, min_island_size: int, seed: Optional[int] = None) -> None:
         self._min_island_size: int = min_island_size
-        self._random: random.Random = random.Random()
+        self.pointy: bool = base_layer.pointy
+        self._random: random.Random = random.Random(seed)
 
         # Collect all non-water hexes from base layer grid
-        self._usable_hexes: Set[Hex] = set()
-        [self._usable_hexes.add(h) for h in base_layer.generator() if h.is_land()]
+        self._usable_hexes: SamplingSet[Hex] = SamplingSet(h for h in base_layer.generator() if h.is_land())
 
         self._island_key_to_island: Dict[int, Island] = {}
         self._current_island: Optional[Island] = None
@@ -47,21 +48,58 @@ class IslandLayer:
         return list(self._island_key_to_island.values())
 
     def serialize(self) -> dict:
-        island_map: dict = {}
+        return dict(self.serialize_items())
+
+    def serialize_items(self) -> Iterator[Tuple[str, dict]]:
+        """
+        Serialize islands one at a time, as (island id, island) items.
+        """
         for island_id in self.keys():
             island: Island = self[island_id]
-            island_map[str(island_id)] = {
+            serialized: dict = {
                 'region-ids': list(island.region_keys),
                 'area': island.area,
                 'centroid': island.get_centroid(),
-                'vertices': island.get_vertices(),
+                'vertices': island.get_vertices()
             }
 
-        return island_map
+            yield str(island_id), serialized
+
+    def label(self, base_layer: BaseLayer) -> None:
+        """
+        Discover all islands in a single pass, labeling each connected area of land hexes as one island.
+        Areas under the minimum island size are turned into water straight away, and each island's shape
+        is only built once its area is complete.
+        """
+        labeled: Set[Hex] = set()
+        for start_hex in base_layer.generator():
+            if start_hex not in self._usable_hexes or start_hex in labeled:
+                continue
+
+            area: List[Hex] = [start_hex]
+            labeled.add(start_hex)
+            for h in area:
+                for n in h.direct_neighbors:
+                    if n in self._usable_hexes and n not in labeled:
+                        labeled.add(n)
+                        area.append(n)
+
+            if len(area) < self._min_island_size:
+                for h in area:
+                    h.set_ocean()
+            else:
+                island_id: int = len(self) + 1
+                island: Island = Island(island_id, start_hex, self.pointy)
+                island.fill(area)
+                self[island_id] = island
+
+        self._usable_hexes.clear()
+        self._current_island = None
 
     def discover(self) -> bool:
         """
-        Place random island starting hexes.
+        Place random island starting hexes, expanding one step per call. Used for stepwise (debug) rendering,
+        otherwise label() discovers all islands at once.
         Returns True if there is remaining space to discover, False otherwise.
         """
         if self._current_island:
@@ -69,12 +107,12 @@ class IslandLayer:
             return True
         else:
             if self._usable_hexes:
-                random_h: Hex = self._random.choice(list(self._usable_hexes))
+                random_h: Hex = self._usable_hexes.choice(self._random)
                 if random_h.is_on_island():
                     self._usable_hexes.remove(random_h)
                 else:
                     island_id: int = len(self) + 1
-                    new_island: Island = Island(island_id, random_h)
+                    new_island: Island = Island(island_id, random_h, self.pointy)
                     self._island_key_to_island[island_id] = new_island
                     self._current_island = new_island
 
@@ -90,8 +128,7 @@ class IslandLayer:
             self._current_island.expand(self._usable_hexes)
         else:
             for h in self._current_island.hexes:
-                if h in self._usable_hexes:
-                    self._usable_hexes.remove(h)
+                self._usable_hexes.discard(h)
 
             self._current_island = None
 
@@ -0,0 +1,89 @@
+from typing import Dict, Iterable, List, Set, Tuple
+
+from processing.exterior.hex import Hex
+
+
+class Outline:
+    """
+    Defines the outline of an area of hexes, traced once from its member hexes.
+
+    Every hex side is keyed in an integer edge table (hex uid * 6 + side). Sides shared by two member hexes
+    cancel out, and the remaining boundary sides are chained corner to corner into rings.
+    The ring enclosing the largest area is the exterior, any others are holes or separate parts.
+    """
+    # Doubled Coordinate offset of the neighbor across each side, side n running from corner n to corner n + 1
+    _pointy_sides: Tuple[Tuple[int, int], ...] = ((2, 0), (1, 1), (-1, 1), (-2, 0), (-1, -1), (1, -1))
+    _flat_sides: Tuple[Tuple[int, int], ...] = ((1, 1), (0, 2), (-1, 1), (-1, -1), (0, -2), (1, -1))
+
+    def __init__(self, hexes: Iterable[Hex], pointy: bool) -> None:
+        sides: Tuple[Tuple[int, int], ...] = self._pointy_sides if pointy else self._flat_sides
+        members: Dict[Tuple[int, int], Hex] = {h.get_tuple_coord(): h for h in hexes}
+
+        # Cancel shared sides, leaving the boundary edge table
+        boundary: Dict[int, Tuple[Hex, int]] = {}
+        for (x, y), h in members.items():
+            for side, (dx, dy) in enumerate(sides):
+                if (x + dx, y + dy) not in members:
+                    boundary[h.uid * 6 + side] = (h, side)
+
+        # Chain boundary edges into rings, pivoting around each corner through member hexes sharing it
+        self.rings: List[List[Tuple[int, int]]] = []
+        visited: Set[int] = set()
+        for key, (h, side) in boundary.items():
+            if key in visited:
+                continue
+
+            ring: List[Tuple[int, int]] = []
+            while h.uid * 6 + side not in visited:
+                visited.add(h.uid * 6 + side)
+                vertex: Tuple[int, int] = tuple(h.vertices[side])
+                if not ring or ring[-1] != vertex:
+                    ring.append(vertex)
+
+                side = (side + 1) % 6
+                dx, dy = sides[side]
+                while (h.x + dx, h.y + dy) in members:
+                    h = members[h.x + dx, h.y + dy]
+                    side = (side + 4) % 6
+                    dx, dy = sides[side]
+
+            if ring[0] != ring[-1]:
+                ring.append(ring[0])
+            self.rings.append(ring)
+
+        signed_areas: List[float] = [self._signed_area(ring) for ring in self.rings]
+        total_area: float = sum(signed_areas)
+        self.area: float = abs(total_area)
+
+        self.exterior: List[Tuple[int, int]] = []
+        if self.rings:
+            self.exterior = max(zip(signed_areas, self.rings), key=lambda r: abs(r[0]))[1]
+
+        self.centroid: Tuple[float, float] = (0, 0)
+        if total_area:
+            cx: float = 0
+            cy: float = 0
+            for ring in self.rings:
+                for (x0, y0), (x1, y1) in zip(ring, ring[1:]):
+                    cross: float = x0 * y1 - x1 * y0
+                    cx += (x0 + x1) * cross
+                    cy += (y0 + y1) * cross
+            self.centroid = (cx / (6 * total_area), cy / (6 * total_area))
+        elif self.exterior:
+            self.centroid = self.exterior[0]
+
+    @staticmethod
+    def _signed_area(ring: List[Tuple[int, int]]) -> float:
+        return sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(ring, ring[1:])) / 2
+
+    def get_vertices(self) -> List[Tuple[int, int]]:
+        """
+        Get the exterior vertices defining this outline's shape.
+        """
+        return list(self.exterior)
+
+    def get_centroid(self) -> Tuple[int, int]:
+        """
+        Get this outline's centroid position.
+        """
+        return int(self.centroid[0]), int(self.centroid[1])
@@ -1,21 +1,19 @@
 from __future__ import annotations
 
-from typing import List, Tuple, Set
-
-from shapely.geometry import Polygon, Point
-from shapely.ops import unary_union
+from typing import List, Optional, Tuple, Set
 
 from processing.exterior.hex import Hex
+from processing.exterior.outline import Outline
 from state.biome import Biome
-from state.terraform import Terraform
 from util.i_biome_calculator import IBiomeCalculator
+from util.sampling_set import SamplingSet
 
 
 class Region:
     """
     Defines a region of a map, composed of multiple hexes.
     """
-    def __init__(self, region_id: int, island_id: int, start_hex: Hex, expansions: int) -> None:
+    def __init__(self, region_id: int, island_id: int, start_hex: Hex, expansions: int, pointy: bool) -> None:
         self.region_id: int = region_id
         self.island_id: int = island_id
         self.hexes: Set[Hex] = {start_hex}
@@ -28,8 +26,8 @@ class Region:
         self._expansions: int = expansions
         self._can_expand: bool = True
 
-        self.polygon: Polygon = Polygon(start_hex.vertices)
-        self.area: float = self.polygon.area
+        self._pointy: bool = pointy
+        self._outline: Optional[Outline] = None
 
         self.is_coastal: bool = False
         self.is_secluded: bool = False
@@ -37,6 +35,10 @@ class Region:
         self.near_lake: bool = False
         self.near_river: bool = False
 
+        self.elevation_sum: float = 0.0
+        self.dryness_sum: float = 0.0
+        self.base_elevation: float = 0.0
+        self.base_dryness: float = 0.0
         self.avg_elevation: float = 0.0
         self.avg_dryness: float = 0.0
         self.biome: Biome = Biome.Bare
@@ -44,40 +46,37 @@ class Region:
 
         start_hex.set_region(self.region_id)
 
+    @property
+    def area(self) -> float:
+        return self._get_outline().area
+
     def add_hex(self, h: Hex) -> None:
         """
         Add a hex to this region.
         """
         h.set_region(self.region_id)
         self.hexes.add(h)
+        self._outline = None
 
-    def update_shape(self, to_join_hexes=None) -> None:
+    def _get_outline(self) -> Outline:
         """
-        Refresh this region's polygon shape and area.
+        Get this region's outline, only tracing it again if hexes were added since it was last traced.
         """
-        to_join = [self.polygon]
-        if to_join_hexes:
-            for h in to_join_hexes:
-                to_join.append(Polygon(h.vertices))
-        else:
-            for h in self.hexes:
-                to_join.append(Polygon(h.vertices))
-
-        self.polygon = unary_union(to_join)
-        self.area = self.polygon.area
+        if self._outline is None:
+            self._outline = Outline(self.hexes, self._pointy)
+        return self._outline
 
     def get_vertices(self) -> List[Tuple[int, int]]:
         """
         Get this region's exterior vertices defining its shape.
         """
-        return [(int(p[0]), int(p[1])) for p in self.polygon.exterior.coords]
+        return self._get_outline().get_vertices()
 
     def get_centroid(self) -> Tuple[int, int]:
         """
-        Get this regions polygon centroid position.
+        Get this regions outline centroid position.
         """
-        p: Point = self.polygon.centroid
-        return int(p.x), int(p.y)
+        return self._get_outline().get_centroid()
 
     def can_expand(self) -> bool:
         """
@@ -85,7 +84,7 @@ class Region:
         """
         return self._can_expand and self._expansions > 0
 
-    def expand(self, usable_hexes: List[Hex]) -> None:
+    def expand(self, usable_hexes: SamplingSet[Hex]) -> None:
         """
         Expand this region's area outward from its exterior hexes.
         """
@@ -104,14 +103,6 @@ class Region:
                 self._expanded_hexes.add(h)
                 self.add_hex(h)
 
-            self.update_shape(self._expanded_hexes)
-
-    def update_hex_neighbors(self) -> None:
-        """
-        Update the neighbor states for all hexes in the region.
-        """
-        [h.set_neighbor_states() for h in self.hexes]
-
     def set_exterior_details(self) -> None:
         """
         Set hexes forming exterior perimeter as well as coast and neighboring region ids.
@@ -132,42 +123,80 @@ class Region:
 
                     self.exterior_hexes.add(h)
 
-    def set_geographic_details(self, elevation_modifier: float, dryness_modifier: float, biome_calculator: IBiomeCalculator) -> None:
+    def set_aggregates(self) -> None:
         """
-        Find this region's exterior hexes and its overall status geographically.
+        Sum up this region's hex elevation and dryness, and find which kinds of water it borders.
         """
-        self.is_coastal: bool = False
-        self.is_secluded: bool = False
-        self.is_surrounded: bool = False
-        self.near_lake: bool = False
-        self.near_river: bool = False
+        self.elevation_sum = 0.0
+        self.dryness_sum = 0.0
+        self.is_coastal = False
+        self.near_lake = False
+        self.near_river = False
 
-        avg_elevation: float = 0.0
-        avg_dryness: float = 0.0
         for h in self.hexes:
-            avg_elevation += h.elevation
-            avg_dryness += h.dryness
-            if h.direct[Terraform.Ocean] > 0:
-                self.is_coastal = True
-            if h.direct[Terraform.Lake] > 0:
-                self.near_lake = True
-            if h.direct[Terraform.River] > 0:
-                self.near_river = True
+            self.elevation_sum += h.elevation
+            self.dryness_sum += h.dryness
+
+        for h in self.exterior_hexes:
+            for n in h.direct_neighbors:
+                if n.is_ocean():
+                    self.is_coastal = True
+                elif n.is_lake():
+                    self.near_lake = True
+                elif n.is_river():
+                    self.near_river = True
 
+    def absorb(self, other: Region) -> None:
+        """
+        Take over all hexes of another region, combining its aggregates with this region's own.
+        Neighboring region ids are left for the region layer to relink.
+        """
+        for h in other.hexes:
+            self.add_hex(h)
+
+        self.elevation_sum += other.elevation_sum
+        self.dryness_sum += other.dryness_sum
+        self.is_coastal = self.is_coastal or other.is_coastal
+        self.near_lake = self.near_lake or other.near_lake
+        self.near_river = self.near_river or other.near_river
+        self.coast_hexes |= other.coast_hexes
+
+        # Only hexes on the previous perimeters can still be on the combined perimeter
+        self.exterior_hexes = {
+            h for h in self.exterior_hexes | other.exterior_hexes
+            if any(n.region_id != self.region_id for n in h.direct_neighbors)}
+
+    @staticmethod
+    def apply_modifier(base: float, modifier: float) -> float:
+        """
+        Apply a climate modifier to a base average, keeping the result within [0, 1].
+        """
+        modified: float = base + modifier
+        if modified > 1:
+            return 1
+        elif modified < 0:
+            return 0
+        return modified
+
+    def set_adjacency_details(self) -> None:
+        """
+        Set whether this region is secluded or surrounded from its neighboring regions.
+        """
         self.is_secluded = len(self.neighbor_region_ids) < 1
         self.is_surrounded = not self.is_coastal and not self.is_secluded
 
-        self.avg_elevation = (avg_elevation / len(self.hexes)) + elevation_modifier
-        if self.avg_elevation > 1:
-            self.avg_elevation = 1
-        elif self.avg_elevation < 0:
-            self.avg_elevation = 0
-
-        self.avg_dryness = (avg_dryness / len(self.hexes)) + dryness_modifier
-        if self.avg_dryness > 1:
-            self.avg_dryness = 1
-        elif self.avg_dryness < 0:
-            self.avg_dryness = 0
+    def set_geographic_details(self, elevation_modifier: float, dryness_modifier: float, biome_calculator: IBiomeCalculator) -> None:
+        """
+        Set this region's overall status geographically from its aggregates.
+        Base averages are kept before climate modifiers apply, so the region can be re-climated later.
+        """
+        self.set_adjacency_details()
+
+        self.base_elevation = self.elevation_sum / len(self.hexes)
+        self.avg_elevation = Region.apply_modifier(self.base_elevation, elevation_modifier)
+
+        self.base_dryness = self.dryness_sum / len(self.hexes)
+        self.avg_dryness = Region.apply_modifier(self.base_dryness, dryness_modifier)
 
         self.biome = biome_calculator.pick_biome(self.avg_elevation, self.avg_dryness)
         self.base_color = biome_calculator.find_biome_color(self.biome)
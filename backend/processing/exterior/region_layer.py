@@ -1,14 +1,18 @@
+import heapq
 import random
+import numpy as np
 import pygame
 
-from typing import List, Optional, Dict, KeysView, Set
+from typing import Iterator, List, Optional, Dict, KeysView, Set, Tuple
 
 from processing.exterior.hex import Hex
 from processing.exterior.island import Island
 from processing.exterior.island_layer import IslandLayer
 from processing.exterior.region import Region
+from util.disjoint_set import DisjointSet
 from util.i_biome_calculator import IBiomeCalculator
 from util.i_hex_utility import IHexUtility
+from util.sampling_set import SamplingSet
 
 from state.terraform import Terraform
 
@@ -29,7 +33,8 @@ class RegionLayer:
                  min_region_size_pct: float,
                  total_map_size: int,
                  elevation_modifier: float,
-                 dryness_modifier: float) -> None:
+                 dryness_modifier: float,
+                 seed: Optional[int] = None) -> None:
         self.biome_calculator: IBiomeCalculator = biome_calculator
         self.hex_util: IHexUtility = hex_util
         self._min_region_expansions: int = min_region_expansions
@@ -38,17 +43,18 @@ class RegionLayer:
         self._elevation_modifier: float = elevation_modifier
         self._dryness_modifier: float = dryness_modifier
 
+        self.pointy: bool = island_layer.pointy
         self._region_key_to_region: Dict[int, Region] = dict()
         self._current_region: Optional[Region] = None
-        self._random: random.Random = random.Random()
+        self._random: random.Random = random.Random(seed)
 
         # Get all island layer hexes
-        self._usable_hexes: Set[Hex] = set()
+        self._usable_hexes: SamplingSet[Hex] = SamplingSet()
         for id_key in island_layer.keys():
             island: Island = island_layer[id_key]
             [self._usable_hexes.add(h) for h in island.hexes if h.is_land()]
 
-        self.to_merge: List[int] = []
+        self.to_merge: List[Tuple[int, int]] = []
 
     def __len__(self) -> int:
         return len(self._region_key_to_region)
@@ -89,10 +95,15 @@ class RegionLayer:
             # font.render_to(surface, region_center, str(region_key), region_center_color)
 
     def serialize(self) -> dict:
-        region_map: dict = dict()
+        return dict(self.serialize_items())
+
+    def serialize_items(self) -> Iterator[Tuple[str, dict]]:
+        """
+        Serialize regions one at a time, as (region id, region) items.
+        """
         for region_id in self.keys():
             region: Region = self[region_id]
-            region_map[str(region_id)] = {
+            serialized: dict = {
                 'biome': region.biome.name,
                 'island-id': region.island_id,
                 'area': region.area,
@@ -104,11 +115,13 @@ class RegionLayer:
                 'surrounded': region.is_surrounded,
                 'average-dryness': region.avg_dryness,
                 'average-elevation': region.avg_elevation,
+                'base-dryness': region.base_dryness,
+                'base-elevation': region.base_elevation,
                 'centroid': region.get_centroid(),
                 'vertices': region.get_vertices()
             }
 
-        return region_map
+            yield str(region_id), serialized
 
     def discover(self, island_layer: IslandLayer) -> bool:
         """
@@ -119,14 +132,15 @@ class RegionLayer:
             self.expand()
         else:
             if self._usable_hexes:
-                random_hex: Hex = self._random.choice(list(self._usable_hexes))
+                random_hex: Hex = self._usable_hexes.choice(self._random)
                 if random_hex.is_in_region():
                     self._usable_hexes.remove(random_hex)
                 else:
                     region_id: int = len(self) + 1
                     new_region: Region = Region(
                         region_id, random_hex.island_id, random_hex,
-                        self._random.randint(self._min_region_expansions, self._max_region_expansions))
+                        self._random.randint(self._min_region_expansions, self._max_region_expansions),
+                        self.pointy)
                     self[region_id] = new_region
                     self._current_region = new_region
                     island_layer[random_hex.island_id].region_keys.add(region_id)
@@ -142,61 +156,83 @@ class RegionLayer:
             self._current_region.expand(self._usable_hexes)
         else:
             for h in self._current_region.hexes:
-                if h in self._usable_hexes:
-                    self._usable_hexes.remove(h)
+                self._usable_hexes.discard(h)
 
             self._current_region = None
 
     def _refresh_regions(self) -> None:
         """
-        Refresh details for each region.
+        Refresh details for each region, building the region adjacency graph and per-region aggregates.
         """
         for region_key in self.keys():
-            self[region_key].update_hex_neighbors()
+            self[region_key].set_exterior_details()
 
         for region_key in self.keys():
             region: Region = self[region_key]
-            region.set_exterior_details()
+            region.set_aggregates()
             region.set_geographic_details(self._elevation_modifier, self._dryness_modifier, self.biome_calculator)
 
     def establish_regions_to_merge(self) -> None:
         """
-        Determine which regions ought to be merged to reach an appropriate size.
+        Determine which regions ought to be merged to reach an appropriate size, queueing them smallest first.
         """
-        self.to_merge: Set[int] = set()
+        self._refresh_regions()
+
+        self.to_merge: List[Tuple[int, int]] = []
         for region_key in self.keys():
             region = self[region_key]
             if len(region.hexes) < self._min_region_size:
-                self.to_merge.add(region_key)
+                heapq.heappush(self.to_merge, (len(region.hexes), region_key))
 
     def merge(self, island_layer: IslandLayer) -> bool:
         """
         Merge smaller regions together to make them larger.
+        Each call merges the smallest queued region into its smallest neighbor, only updating those two regions.
+        Regions which have already reached the minimum size by absorbing others are left as they are.
         """
-        if self.to_merge:
-            self._refresh_regions()
-            region_key: int = self.to_merge.pop()
+        while self.to_merge:
+            size, region_key = heapq.heappop(self.to_merge)
             region = self[region_key]
-            island: Island = island_layer[region.island_id]
+            if len(region.hexes) >= self._min_region_size:
+                continue
+            if size != len(region.hexes):
+                heapq.heappush(self.to_merge, (len(region.hexes), region_key))
+                continue
 
             if region.neighbor_region_ids:
-                neighbors: List[Region] = [self[region_id] for region_id in region.neighbor_region_ids]
-                neighbors.sort(key=lambda r: len(r.hexes))
-
-                smallest_neighbor: Region = neighbors[0]
-                [smallest_neighbor.add_hex(h) for h in region.hexes]
-                smallest_neighbor.update_shape(region.hexes)
+                smallest_neighbor: Region = min(
+                    (self[region_id] for region_id in region.neighbor_region_ids),
+                    key=lambda r: (len(r.hexes), r.region_id))
+                self._absorb(smallest_neighbor, region)
 
+                island: Island = island_layer[region.island_id]
                 island.region_keys.remove(region_key)
                 del self[region_key]
 
-            self._refresh_regions()
             return True
         return False
 
+    def _absorb(self, absorber: Region, region: Region) -> None:
+        """
+        Merge a region into another, relinking the adjacency graph around them.
+        Relinked neighbors have their adjacency details refreshed, the absorber all of its details.
+        """
+        absorber.absorb(region)
+
+        for neighbor_id in region.neighbor_region_ids:
+            neighbor: Region = self[neighbor_id]
+            neighbor.neighbor_region_ids.discard(region.region_id)
+            if neighbor_id != absorber.region_id:
+                neighbor.neighbor_region_ids.add(absorber.region_id)
+                absorber.neighbor_region_ids.add(neighbor_id)
+                neighbor.set_adjacency_details()
+        absorber.neighbor_region_ids.discard(region.region_id)
+
+        absorber.set_geographic_details(self._elevation_modifier, self._dryness_modifier, self.biome_calculator)
+
     def remove_stray_regions(self, island_layer: IslandLayer) -> None:
         """
-        Remove any regions composed of less than 6 hexes post-merge.
+        Remove any regions composed of less than 6 hexes post-merge, turning them into ocean or lake.
         """
         to_remove: List[int] = []
         for region_key in self.keys():
@@ -216,11 +252,34 @@ class RegionLayer:
             island.region_keys.remove(region_key)
             del self[region_key]
 
-        # Calculate water depth for the new ocean hexes
-        for h in new_water_hexes:
-            if h.direct[Terraform.Lake] + h.direct[Terraform.River] > 5:
-                h.set_lake()
-            else:
-                h.set_ocean()
-            depth: float = self.hex_util.distance(h, [Terraform.Land])
-            h.depth = depth
+        if new_water_hexes:
+            # Find connected bodies of new water at once: bodies joining the ocean become ocean, others lakes
+            local_ids: Dict[Hex, int] = {h: n for n, h in enumerate(new_water_hexes)}
+            a: List[int] = []
+            b: List[int] = []
+            for h in new_water_hexes:
+                for n in h.direct_neighbors:
+                    if n in local_ids:
+                        a.append(local_ids[h])
+                        b.append(local_ids[n])
+
+            bodies: DisjointSet = DisjointSet(len(new_water_hexes))
+            bodies.union(np.array(a, dtype=np.int64), np.array(b, dtype=np.int64))
+            roots: np.ndarray = bodies.roots()
+
+            oceanic_roots: Set[int] = {
+                int(roots[local_ids[h]]) for h in new_water_hexes if any(n.is_ocean() for n in h.direct_neighbors)}
+            for h in new_water_hexes:
+                if roots[local_ids[h]] in oceanic_roots:
+                    h.set_ocean()
+                else:
+                    h.set_lake()
+
+            # Calculate water depth for the new water hexes, expanding from all remaining land at once
+            hexes: List[Hex] = [h for region in self.values() for h in region.hexes] + new_water_hexes
+            land_distances: Dict[Hex, float] = self.hex_util.distance_field(hexes, [Terraform.Land])
+            for h in new_water_hexes:
+                h.depth = land_distances[h]
+
+        # Neighbors of removed regions now border water instead, so refresh all remaining regions once
+        self._refresh_regions()
@@ -1,71 +1,103 @@
-from typing import List, Tuple
+from typing import List, Optional, Sequence, Tuple
 
 from state.construction import Construction
 
 
 class Cell:
+    """
+    Defines a single interior grid cell, slotted as grids hold a great many of them.
+    Hashing uses the uid, which is unique within a grid.
+    """
+    __slots__ = ('uid', 'x', 'y', 'size', '_state', 'room_id', '_in_room', 'neighbors', 'direct')
+
+    _state_options: Tuple[Construction, ...] = (
+        Construction.Floor,
+        Construction.Wall,
+        Construction.Empty,
+        Construction.Padding,
+        Construction.Corridor,
+        Construction.Corner,
+        Construction.Water)
+
     def __init__(self, uid: int, x: int, y: int, size: int) -> None:
         self.uid: int = uid
         self.x: int = x
         self.y: int = y
         self.size: int = size
-        self.box: Tuple[int, int, int, int] = (self.x * self.size, self.y * self.size, self.size, self.size)
 
         self._state: Construction = Construction.Empty
-        self._state_options: List[Construction] = [
-            Construction.Floor,
-            Construction.Wall,
-            Construction.Empty,
-            Construction.Padding,
-            Construction.Corridor,
-            Construction.Corner,
-            Construction.Water]
 
         self.room_id: int = -1
         self._in_room: bool = False
 
-        self.neighbors: List[Cell] = []
+        self.neighbors: Sequence[Cell] = ()
+        self.direct: Optional[List[int]] = None
 
     def __eq__(self, other) -> bool:
         if isinstance(other, Cell):
-            return self.x == other.x and self.y == other.y
+            return self.uid == other.uid
+        return False
 
     def __hash__(self) -> int:
-        return hash((self.x, self.y))
+        return self.uid
+
+    @property
+    def box(self) -> Tuple[int, int, int, int]:
+        return self.x * self.size, self.y * self.size, self.size, self.size
 
     def serialize(self) -> dict:
         return {
             'type': self._state.name
         }
 
+    def get_state(self) -> Construction:
+        return self._state
+
     def get_tuple_coord(self) -> Tuple[int, int]:
         return self.x, self.y
 
     def set_neighbor_states(self) -> None:
-        self.direct = [0 for s in self._state_options]
+        """
+        Count the states of this cell's neighbors from scratch.
+        Only needed once neighbors are first set, as state changes keep their neighbors' counts current from then on.
+        """
+        self.direct = [0] * len(Cell._state_options)
         for c in self.neighbors:
             self.direct[c._state] += 1
 
+    def _transition(self, state: Construction) -> None:
+        """
+        Change state, moving this cell between state counts of each of its neighbors.
+        """
+        previous: Construction = self._state
+        if previous == state:
+            return
+
+        self._state = state
+        for c in self.neighbors:
+            c.direct[previous] -= 1
+            c.direct[state] += 1
+
     def set_floor(self) -> None:
-        self._state = Construction.Floor
+        self._transition(Construction.Floor)
 
     def set_wall(self) -> None:
-        self._state = Construction.Wall
+        self._transition(Construction.Wall)
 
     def set_empty(self) -> None:
-        self._state = Construction.Empty
+        self._transition(Construction.Empty)
 
     def set_padding(self) -> None:
-        self._state = Construction.Padding
+        self._transition(Construction.Padding)
 
     def set_corridor(self) -> None:
-        self._state = Construction.Corridor
+        self._transition(Construction.Corridor)
 
     def set_corner(self) -> None:
-        self._state = Construction.Corner
+        self._transition(Construction.Corner)
 
     def set_water(self) -> None:
-        self._state = Construction.Water
+        self._transition(Construction.Water)
 
     def is_floor(self) -> bool:
         return self._state == Construction.Floor
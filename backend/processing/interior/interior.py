@@ -53,6 +53,9 @@ class Interior:
                 c: Cell = self[x, y]
                 c.neighbors = self._set_neighbors(c)
 
+        for c in self.generator():
+            c.set_neighbor_states()
+
         col_middle: int = ((self._columns - 1) // 2)
         col_left_offset: int = col_middle - (col_middle // 6)
         col_right_offset: int = col_middle + (col_middle // 6)
@@ -134,8 +137,6 @@ class Interior:
         If corridor is viable, build a room at the end of it.
         If room is also viable, return True, otherwise False.
         """
-        self._update_neighbors()
-
         corridor_dir: Tuple[int, int] = (0, 0)
         for dx, dy in self._orthogonal_neighbors:
             c: Cell = self[start_cell.x + dx, start_cell.y + dy]
@@ -171,8 +172,6 @@ class Interior:
         Build a room at the end of a corridor.
         If viable return it, otherwise None.
         """
-        self._update_neighbors()
-
         room_width: int = self._random.randint(self._min_room_size, self._max_room_size)
         room_height: int = self._random.randint(self._min_room_size, self._max_room_size)
 
@@ -223,7 +222,6 @@ class Interior:
         """
         Add a one cell border of padding around created room so rooms aren't built touching each other.
         """
-        self._update_neighbors()
         for c in room.perimeter_and_corners:
             for n in c.neighbors:
                 if n.is_empty():
@@ -236,12 +234,6 @@ class Interior:
         delta: List[Tuple[int, int]] = [(c.x + dx, c.y + dy) for dx, dy in self._orthogonal_neighbors]
         return [self[x, y] for x, y in delta if x > -1 and y > -1 and self[x, y]]
 
-    def _update_neighbors(self) -> None:
-        """
-        Update the neighbor states for all cells in the grid.
-        """
-        [c.set_neighbor_states() for c in self.generator()]
-
     def debug_render(self, surface: pygame.Surface) -> None:
         for c in self.generator():
             if c.is_floor():
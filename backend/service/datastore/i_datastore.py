@@ -0,0 +1,24 @@
+from typing import Optional
+
+
+class IDatastore:
+    """Persistent key-value datastore service interface, holding serialized items without expiry."""
+    def ping(self) -> bool:
+        """Check connectivity to datastore."""
+        pass
+
+    def exists(self, key: str) -> bool:
+        """Check if item with given key exists in datastore."""
+        pass
+
+    def set(self, key: str, value: bytes) -> bool:
+        """Set (or update) a single serialized item with given key, returning whether it was persisted."""
+        pass
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get a single serialized item with given key, None if it does not exist."""
+        pass
+
+    def delete(self, key: str) -> bool:
+        """Delete a single item with given key if it exists, returning whether the datastore could be updated."""
+        pass
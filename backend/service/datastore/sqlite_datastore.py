@@ -0,0 +1,70 @@
+import os
+import sqlite3
+import threading
+
+from typing import Optional, Tuple
+
+from service.datastore.i_datastore import IDatastore
+from util.i_logger import ILogger
+
+
+class SqliteDatastore(IDatastore):
+    """Local datastore service implementation backed by a SQLite database file, safe to share between processes."""
+    def __init__(self, logger: ILogger, path: str):
+        self.logger: ILogger = logger
+        self.path: str = path
+
+        self._lock: threading.Lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection: sqlite3.Connection = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS items (key TEXT PRIMARY KEY, value BLOB NOT NULL)')
+
+    def ping(self) -> bool:
+        try:
+            with self._lock:
+                self._connection.execute('SELECT 1').fetchone()
+            return True
+        except Exception as ex:
+            self.logger.error('Unable to ping datastore', ex)
+            return False
+
+    def exists(self, key: str) -> bool:
+        try:
+            with self._lock:
+                row: Optional[Tuple[int]] = self._connection.execute(
+                    'SELECT 1 FROM items WHERE key = ?', (key,)).fetchone()
+            return row is not None
+        except Exception as ex:
+            self.logger.error(f'Unable to check if item exists in datastore, key: {key}', ex)
+            return False
+
+    def set(self, key: str, value: bytes) -> bool:
+        try:
+            with self._lock:
+                self._connection.execute('INSERT OR REPLACE INTO items (key, value) VALUES (?, ?)', (key, value))
+            return True
+        except Exception as ex:
+            self.logger.error(f'Unable to set item in datastore, key: {key}', ex)
+            return False
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with self._lock:
+                row: Optional[Tuple[bytes]] = self._connection.execute(
+                    'SELECT value FROM items WHERE key = ?', (key,)).fetchone()
+            return row[0] if row else None
+        except Exception as ex:
+            self.logger.error(f'Unable to get item from datastore, key: {key}', ex)
+            return None
+
+    def delete(self, key: str) -> bool:
+        try:
+            with self._lock:
+                self._connection.execute('DELETE FROM items WHERE key = ?', (key,))
+            return True
+        except Exception as ex:
+            self.logger.error(f'Unable to delete item from datastore, key: {key}', ex)
+            return False
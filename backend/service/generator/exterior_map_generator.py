@@ -1,19 +1,33 @@
+import hashlib
 import json
-from typing import Optional, Tuple
+import random
+import time
+import numpy as np
+
+from typing import Iterator, List, Optional, Tuple
 
 from model.requests import CreateExteriorRequest
+from processing.exterior.array_base_layer import ArrayBaseLayer
 from processing.exterior.base_layer import BaseLayer
+from processing.exterior.hex import Hex
 from processing.exterior.feature_layer import FeatureLayer
 from processing.exterior.geography_layer import GeographyLayer
 from processing.exterior.island_layer import IslandLayer
 from processing.exterior.region_layer import RegionLayer
-from util.compact_json_encoder import CompactJsonEncoder
+from service.generator.exterior_stage import ExteriorStage
+from service.stage_cache.i_stage_cache import IStageCache
+from util import binary_map_format, snapshot, streaming_json
+from util.streaming_json import StreamedObject
 from util.i_biome_calculator import IBiomeCalculator
 from util.i_hex_utility import IHexUtility
 from util.i_logger import ILogger
-from util.constants import background_color, update_rate, frame_rate
+from util.constants import background_color, update_rate, frame_rate, grid_backend, \
+    terraform_max_attempts, terraform_time_budget_seconds, terraform_finalize_margin
 
+from state.geometry import Geometry
+from state.grid_backend import GridBackend
 from state.humidity import Humidity
+from state.map_format import MapFormat
 from state.temperature import Temperature
 
 
@@ -24,10 +38,25 @@ class ExteriorMapGenerator:
     def __init__(self,
                  logger: ILogger,
                  biome_calculator: IBiomeCalculator,
-                 hex_util: IHexUtility) -> None:
+                 hex_util: IHexUtility,
+                 stage_cache: Optional[IStageCache] = None) -> None:
         self.logger: ILogger = logger
         self.biome_calculator: IBiomeCalculator = biome_calculator
         self.hex_util: IHexUtility = hex_util
+        self.stage_cache: Optional[IStageCache] = stage_cache
+
+        # Climate tweaks resume after drainage and region tweaks after geography, the expensive stages
+        self.stages: List[ExteriorStage] = [
+            ExteriorStage('terraform', self._terraform, (
+                'seed', 'pixel_width', 'hex_size', 'initial_land_pct', 'required_land_pct', 'terraform_iterations')),
+            ExteriorStage('islands', self._discover_islands, ('min_island_size',)),
+            ExteriorStage('drainage', self._analyse_drainage, (), snapshot=True),
+            ExteriorStage('geography', self._place_geography, ('temperature', 'humidity'), snapshot=True),
+            ExteriorStage('regions', self._generate_regions, (
+                'min_region_expansions', 'max_region_expansions', 'min_region_size_pct')),
+            ExteriorStage('features', self._generate_features, ())
+        ]
+        self._stage_keys: List[Optional[str]] = [None for _ in self.stages]
 
         self.base_layer = None
         self.island_layer = None
@@ -35,6 +64,14 @@ class ExteriorMapGenerator:
         self.region_layer = None
         self.feature_layer = None
 
+        self._random: random.Random = random.Random()
+        self._island_seed: int = 0
+        self._geography_seed: int = 0
+        self._region_seed: int = 0
+        self._feature_seed: int = 0
+
+        self.map_format: MapFormat = MapFormat.Json
+        self.geometry: Geometry = Geometry.PerHex
         self.temperature: Temperature = Temperature.Temperate
         self.humidity: Humidity = Humidity.Average
 
@@ -59,18 +96,16 @@ class ExteriorMapGenerator:
         self.min_region_size_pct: float = 0
 
     def instantiate(self, gen_request: CreateExteriorRequest) -> None:
-        # Biome
-        self.temperature: Temperature = gen_request.temperature
-        self.humidity: Humidity = gen_request.humidity
+        # Every layer is seeded from this, so a seeded request always generates the same map
+        self._random: random.Random = random.Random(gen_request.seed)
 
-        climate_modifiers: Tuple[float, float, int, int, int, int] = \
-            self.biome_calculator.calc_climate_modifiers(self.temperature, self.humidity)
-        self.elevation_modifier: float = climate_modifiers[0]
-        self.dryness_modifier: float = climate_modifiers[1]
-        self.min_lakes: int = climate_modifiers[2]
-        self.max_lakes: int = climate_modifiers[3]
-        self.min_lake_expansions: int = climate_modifiers[4]
-        self.max_lake_expansions: int = climate_modifiers[5]
+        self.map_format: MapFormat = gen_request.format
+        self.geometry: Geometry = gen_request.geometry
+
+        self._gen_request: CreateExteriorRequest = gen_request
+
+        # Biome
+        self._set_climate(gen_request.temperature, gen_request.humidity)
 
         # Base parameters
         self.pixel_width: int = gen_request.pixel_width
@@ -80,13 +115,6 @@ class ExteriorMapGenerator:
         self.initial_land_pct: float = gen_request.initial_land_pct
         self.required_land_pct: float = gen_request.required_land_pct
         self.terraform_iterations: int = gen_request.terraform_iterations
-        self.base_layer: Optional[BaseLayer] = BaseLayer(
-            self.hex_util,
-            self.pixel_width,
-            self.hex_diameter,
-            self.initial_land_pct,
-            self.required_land_pct,
-            False)
 
         # Island parameters
         self.min_island_size: int = gen_request.min_island_size
@@ -96,53 +124,174 @@ class ExteriorMapGenerator:
         self.max_region_expansions: int = gen_request.max_region_expansions
         self.min_region_size_pct: float = gen_request.min_region_size_pct
 
-        # Reset layers
-        self.base_layer: Optional[BaseLayer] = BaseLayer(
-            self.hex_util,
-            self.pixel_width,
-            self.hex_diameter,
-            self.initial_land_pct,
-            self.required_land_pct,
-            False)
+        # Reset layers. A base layer used to be created and thrown away first, its seed is still drawn
+        # so seeded requests keep generating the same maps
+        self._layer_seed()
+        self.base_layer: Optional[BaseLayer] = self._create_base_layer()
         self.island_layer: Optional[IslandLayer] = None
         self.geography_layer: Optional[GeographyLayer] = None
         self.region_layer: Optional[RegionLayer] = None
         self.feature_layer: Optional[FeatureLayer] = None
 
-    def generate(self) -> str:
-        acceptable: bool = False
-        while not acceptable:
-            self.logger.info('Exterior -> Terraforming')
-            for n in range(self.terraform_iterations):
-                self.base_layer.terraform()
-            self.base_layer.finalize()
+        # Drawn up front in generation order, so stages resumed from a snapshot still get the same seeds
+        self._island_seed: int = self._layer_seed()
+        self._geography_seed: int = self._layer_seed()
+        self._region_seed: int = self._layer_seed()
+        self._feature_seed: int = self._layer_seed()
+        self._stage_keys: List[Optional[str]] = self._create_stage_keys(gen_request)
 
-            acceptable = self.base_layer.has_enough_land()
-            if not acceptable:
-                self.base_layer.randomize()
+    def _set_climate(self, temperature: Temperature, humidity: Humidity) -> None:
+        self.temperature: Temperature = temperature
+        self.humidity: Humidity = humidity
 
+        climate_modifiers: Tuple[float, float, int, int, int, int] = \
+            self.biome_calculator.calc_climate_modifiers(self.temperature, self.humidity)
+        self.elevation_modifier: float = climate_modifiers[0]
+        self.dryness_modifier: float = climate_modifiers[1]
+        self.min_lakes: int = climate_modifiers[2]
+        self.max_lakes: int = climate_modifiers[3]
+        self.min_lake_expansions: int = climate_modifiers[4]
+        self.max_lake_expansions: int = climate_modifiers[5]
+
+    def _create_base_layer(self) -> BaseLayer:
+        """
+        Create the base layer using the configured grid backend.
+        """
+        base_layer_type = ArrayBaseLayer if grid_backend == GridBackend.Array else BaseLayer
+        return base_layer_type(
+            self.hex_util,
+            self.pixel_width,
+            self.hex_diameter,
+            self.initial_land_pct,
+            self.required_land_pct,
+            False,
+            self._layer_seed())
+
+    def _layer_seed(self) -> int:
+        """
+        Draw the seed for the next layer created.
+        """
+        return self._random.getrandbits(64)
+
+    def generate(self) -> bytes:
+        self._run_stages(self._restore_latest_snapshot(), len(self.stages))
+        return self._serialize_map()
+
+    def generate_variants(self, climates: List[Tuple[Temperature, Humidity]]) -> List[bytes]:
+        """
+        Generate the map once per climate. Only freshwater, regions and biomes depend on climate,
+        so terrain, islands and drainage are generated once and every climate resumes from a copy of them.
+        """
+        shared_until: int = self._stage_index('drainage') + 1
+        self._run_stages(self._restore_latest_snapshot(shared_until), shared_until)
+        shared: bytes = snapshot.dump(self._layers(), self._services())
+
+        maps: List[bytes] = []
+        for temperature, humidity in climates:
+            self.logger.info(f'Exterior -> Generating {temperature.name} {humidity.name} variant')
+            self._set_climate(temperature, humidity)
+            self._stage_keys = self._create_stage_keys(
+                self._gen_request.model_copy(update={'temperature': temperature, 'humidity': humidity}))
+
+            resume_from: int = self._restore_latest_snapshot()
+            if resume_from < shared_until:
+                self._restore(shared)
+                resume_from = shared_until
+            self._run_stages(resume_from, len(self.stages))
+            maps.append(self._serialize_map())
+
+        return maps
+
+    def _run_stages(self, start: int, stop: int) -> None:
+        """
+        Run stages from start up to (not including) stop, caching snapshots of those marked for it.
+        """
+        for n in range(start, stop):
+            stage: ExteriorStage = self.stages[n]
+            stage.run()
+            if stage.snapshot and self.stage_cache and self._stage_keys[n]:
+                self.stage_cache.set(self._stage_keys[n], snapshot.dump(self._layers(), self._services()))
+
+    def _stage_index(self, name: str) -> int:
+        return next(n for n, stage in enumerate(self.stages) if stage.name == name)
+
+    def _serialize_map(self) -> bytes:
+        self.logger.info('Exterior -> Serializing')
+        if self.map_format == MapFormat.Binary:
+            return self.serialize_binary()
+        return self.serialize()
+
+    def _terraform(self) -> None:
+        """
+        Terraform the base layer until it has enough land, randomizing it again after every failed attempt.
+        Raises ValueError once out of attempts or time, as the request's parameters are unlikely to ever succeed.
+        """
+        started: float = time.monotonic()
+        for attempt in range(1, terraform_max_attempts + 1):
+            self.logger.info('Exterior -> Terraforming')
+            if self._terraform_attempt():
+                return
+
+            elapsed: float = time.monotonic() - started
+            if elapsed > terraform_time_budget_seconds:
+                raise ValueError(f'Unable to terraform enough land within {elapsed:.1f}s ({attempt} attempts), '
+                                 f'try a lower required land or higher initial land percentage')
+            self.base_layer.randomize()
+
+        raise ValueError(f'Unable to terraform enough land in {terraform_max_attempts} attempts, '
+                         f'try a lower required land or higher initial land percentage')
+
+    def _terraform_attempt(self) -> bool:
+        """
+        Run terraforming passes then finalize, returning whether the base layer ended up with enough land.
+        Passes stop once they no longer grow any land, and the attempt is abandoned without finalizing
+        once it is predicted to fall short.
+        """
+        usable: int = self.base_layer.total_usable_hexes()
+        land_fraction: float = self.base_layer.total_land_hexes() / usable
+        for n in range(self.terraform_iterations):
+            grown_fraction: float = self.base_layer.terraform() / usable
+            if grown_fraction == 0:
+                break
+
+            land_fraction += grown_fraction
+            if self._falls_short(land_fraction, grown_fraction, self.terraform_iterations - n - 1):
+                return False
+
+        self.base_layer.finalize()
+        return self.base_layer.has_enough_land()
+
+    def _falls_short(self, land_fraction: float, grown_fraction: float, passes_left: int) -> bool:
+        """
+        Predict whether terraforming will end with too little land, continuing the land fraction's trajectory
+        at the last pass's growth for every pass left, less the most land finalizing could still add.
+        """
+        projected: float = land_fraction + grown_fraction * passes_left
+        return passes_left > 0 and projected + terraform_finalize_margin < self.required_land_pct
+
+    def _discover_islands(self) -> None:
         self.logger.info('Exterior -> Discovering islands')
-        self.island_layer = IslandLayer(self.base_layer, self.min_island_size)
+        self.island_layer = IslandLayer(self.base_layer, self.min_island_size, self._island_seed)
+        self.island_layer.label(self.base_layer)
 
-        running: bool = True
-        while running:
-            running = self.island_layer.discover()
-        self.island_layer.clean_up(self.base_layer)
+    def _analyse_drainage(self) -> None:
+        self.logger.info('Exterior -> Analysing drainage')
+        self.geography_layer = GeographyLayer(self.hex_util, self.base_layer, self._geography_seed)
 
+    def _place_geography(self) -> None:
         self.logger.info('Exterior -> Placing geographic details')
-        self.geography_layer = GeographyLayer(
-            self.hex_util,
-            self.base_layer,
+        self.geography_layer.plan_lakes(
             self.min_lake_expansions,
             self.max_lake_expansions,
             self.min_lakes,
             self.max_lakes)
 
-        running = True
+        running: bool = True
         while running:
             running = self.geography_layer.place_freshwater()
         self.geography_layer.finalize()
 
+    def _generate_regions(self) -> None:
         self.logger.info('Exterior -> Generating regions')
         self.region_layer = RegionLayer(
             self.biome_calculator,
@@ -153,9 +302,10 @@ class ExteriorMapGenerator:
             self.min_region_size_pct,
             self.base_layer.total_usable_hexes(),
             self.elevation_modifier,
-            self.dryness_modifier)
+            self.dryness_modifier,
+            self._region_seed)
 
-        running = True
+        running: bool = True
         while running:
             running = self.region_layer.discover(self.island_layer)
         self.region_layer.establish_regions_to_merge()
@@ -166,21 +316,122 @@ class ExteriorMapGenerator:
             running = self.region_layer.merge(self.island_layer)
         self.region_layer.remove_stray_regions(self.island_layer)
 
+    def _generate_features(self) -> None:
         self.logger.info('Exterior -> Generating features and events')
-        self.feature_layer = FeatureLayer(self.region_layer)
+        self.feature_layer = FeatureLayer(self.region_layer, self._feature_seed)
         self.feature_layer.construct()
 
-        self.logger.info('Exterior -> Serializing')
-        serialized: dict = {
-            'dimensions': (self.base_layer.actual_width, self.base_layer.actual_height),
-            'temperature': self.temperature.name,
-            'humidity': self.humidity.name,
-            'islands': self.island_layer.serialize(),
-            'regions': self.region_layer.serialize(),
-            'hexes': self.base_layer.serialize()
+    def _create_stage_keys(self, gen_request: CreateExteriorRequest) -> List[Optional[str]]:
+        """
+        Key each stage by a hash of every request field it and earlier stages read, so a request
+        sharing those fields with an earlier one can resume from that request's snapshot.
+        Unseeded requests aren't reproducible, so get no keys.
+        """
+        if gen_request.seed is None:
+            return [None for _ in self.stages]
+
+        params: dict = gen_request.model_dump()
+        inputs: dict = {'grid-backend': grid_backend.name, 'snapshot-version': snapshot.version}
+        keys: List[Optional[str]] = []
+        for stage in self.stages:
+            inputs.update({field: params[field] for field in stage.inputs})
+            digest: str = hashlib.sha256(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+            keys.append(f'{stage.name}-{digest}')
+
+        return keys
+
+    def _layers(self) -> Tuple[BaseLayer, IslandLayer, GeographyLayer, RegionLayer, FeatureLayer]:
+        return self.base_layer, self.island_layer, self.geography_layer, self.region_layer, self.feature_layer
+
+    def _services(self) -> dict:
+        """
+        Services layers refer to, left out of snapshots and replaced by this generator's own when restoring.
+        """
+        return {'hex-util': self.hex_util, 'biome-calculator': self.biome_calculator}
+
+    def _restore(self, cached: bytes) -> None:
+        self.base_layer, self.island_layer, self.geography_layer, self.region_layer, self.feature_layer = \
+            snapshot.load(cached, self._services())
+
+    def _restore_latest_snapshot(self, limit: Optional[int] = None) -> int:
+        """
+        Restore the layers from the snapshot of the latest stage cached (before limit, if given),
+        returning the index of the stage to resume at.
+        """
+        if not self.stage_cache:
+            return 0
+
+        for n in reversed(range(len(self.stages) if limit is None else limit)):
+            if not self.stages[n].snapshot or not self._stage_keys[n]:
+                continue
+
+            cached: Optional[bytes] = self.stage_cache.get(self._stage_keys[n])
+            if cached is None:
+                continue
+
+            self.logger.info(f'Exterior -> Resuming after {self.stages[n].name}')
+            self._restore(cached)
+            return n + 1
+
+        return 0
+
+    def serialize(self) -> bytes:
+        return b''.join(self.serialize_stream())
+
+    def serialize_stream(self) -> Iterator[bytes]:
+        """
+        Serialize to JSON in chunks, islands, regions and hexes being encoded as their layers are walked.
+        Geometry is written out per hex, or as hex centers plus the layout to recompute corners from.
+        """
+        return streaming_json.iter_json(self._serialized_items())
+
+    def _serialized_items(self) -> Iterator[Tuple[str, object]]:
+        yield 'dimensions', (self.base_layer.actual_width, self.base_layer.actual_height)
+        yield 'temperature', self.temperature.name
+        yield 'humidity', self.humidity.name
+        yield 'islands', StreamedObject(self.island_layer.serialize_items())
+        yield 'regions', StreamedObject(self.region_layer.serialize_items())
+        yield 'hexes', StreamedObject(self.base_layer.serialize_items(self.geometry))
+        if self.geometry == Geometry.Layout:
+            yield 'layout', self.base_layer.serialize_layout()
+
+    def serialize_binary(self) -> bytes:
+        """
+        Serialize to the binary map format, hex details being packed into arrays instead of per-hex objects.
+        """
+        hexes: List[Hex] = sorted(self.base_layer.generator(), key=lambda h: h.uid)
+        index_of: dict = {h: i for i, h in enumerate(hexes)}
+
+        island_ids: np.ndarray = np.full(len(hexes), -1, dtype=np.int64)
+        for island_id in self.island_layer.keys():
+            island_ids[[index_of[h] for h in self.island_layer[island_id].hexes]] = island_id
+
+        region_ids: np.ndarray = np.full(len(hexes), -1, dtype=np.int64)
+        for region_id in self.region_layer.keys():
+            region_ids[[index_of[h] for h in self.region_layer[region_id].hexes]] = region_id
+
+        columns, rows = self.base_layer.grid_size()
+        info: dict = {
+            'columns': columns,
+            'rows': rows,
+            'pointy': int(self.base_layer.pointy),
+            'hex_size': self.hex_diameter,
+            'width': self.base_layer.actual_width,
+            'height': self.base_layer.actual_height,
+            'temperature': self.temperature,
+            'humidity': self.humidity
         }
 
-        return json.dumps(serialized, cls=CompactJsonEncoder, indent=2)
+        return binary_map_format.encode_exterior(
+            info,
+            np.array([(h.x, h.y) for h in hexes], dtype=np.int64).reshape(-1, 2),
+            np.array([h.get_state() for h in hexes], dtype=np.int64),
+            np.array([h.elevation for h in hexes], dtype=np.float64),
+            np.array([h.dryness for h in hexes], dtype=np.float64),
+            np.array([h.depth for h in hexes], dtype=np.float64),
+            island_ids,
+            region_ids,
+            {'islands': self.island_layer.serialize(), 'regions': self.region_layer.serialize()})
 
     def debug_save(self) -> None:
         import pygame
@@ -237,7 +488,7 @@ class ExteriorMapGenerator:
                         self.base_layer.finalize()
 
                         if self.base_layer.has_enough_land():
-                            self.island_layer = IslandLayer(self.base_layer, self.min_island_size)
+                            self.island_layer = IslandLayer(self.base_layer, self.min_island_size, self._layer_seed())
                             self.base_layer.debug_render(surface)
                             terraforming = False
                             island_filling = True
@@ -248,9 +499,8 @@ class ExteriorMapGenerator:
                     processing: bool = self.island_layer.discover()
                     if not processing:
                         self.island_layer.clean_up(self.base_layer)
-                        self.geography_layer = GeographyLayer(
-                            self.hex_util,
-                            self.base_layer,
+                        self.geography_layer = GeographyLayer(self.hex_util, self.base_layer, self._layer_seed())
+                        self.geography_layer.plan_lakes(
                             self.min_lake_expansions,
                             self.max_lake_expansions,
                             self.min_lakes,
@@ -270,7 +520,8 @@ class ExteriorMapGenerator:
                             self.min_region_size_pct,
                             self.base_layer.total_usable_hexes(),
                             self.elevation_modifier,
-                            self.dryness_modifier)
+                            self.dryness_modifier,
+                            self._layer_seed())
 
                         placing_freshwater = False
                         region_filling = True
@@ -284,7 +535,7 @@ class ExteriorMapGenerator:
                     processing: bool = self.region_layer.merge(self.island_layer)
                     if not processing:
                         self.region_layer.remove_stray_regions(self.island_layer)
-                        self.feature_layer = FeatureLayer(self.region_layer)
+                        self.feature_layer = FeatureLayer(self.region_layer, self._layer_seed())
                         merging = False
                         feature_filling = True
                 elif feature_filling:
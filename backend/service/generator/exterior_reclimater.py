@@ -0,0 +1,85 @@
+import json
+
+from typing import Dict, List, Optional, Tuple
+
+from model.responses import RegionBiomeChange
+from processing.exterior.region import Region
+from state.humidity import Humidity
+from state.temperature import Temperature
+from util import binary_map_format
+from util.i_biome_calculator import IBiomeCalculator
+
+_decoder: json.JSONDecoder = json.JSONDecoder()
+_encoder: json.JSONEncoder = json.JSONEncoder(separators=(',', ':'))
+
+
+class ExteriorReclimater:
+    """
+    Changes the temperature of an already generated exterior map without regenerating it.
+    Temperature only shifts region elevation before biomes are picked, so only region biomes and average elevations
+    are recomputed from the base averages stored with each region, everything else being copied across as is.
+    """
+    def __init__(self, biome_calculator: IBiomeCalculator):
+        self.biome_calculator: IBiomeCalculator = biome_calculator
+
+    def reclimate(self, content: bytes, temperature: Temperature) -> Tuple[bytes, List[RegionBiomeChange]]:
+        """
+        Re-climate a serialized map in either format, returning it alongside the regions whose biome changed.
+        """
+        if binary_map_format.is_binary_map(content):
+            return self._reclimate_binary(content, temperature)
+        return self._reclimate_json(content, temperature)
+
+    def _reclimate_binary(self, content: bytes, temperature: Temperature) -> Tuple[bytes, List[RegionBiomeChange]]:
+        _, humidity, details = binary_map_format.read_exterior_details(content)
+        changes: List[RegionBiomeChange] = self._reclimate_regions(details['regions'], temperature, Humidity(humidity))
+        return binary_map_format.replace_exterior_details(content, temperature, details), changes
+
+    def _reclimate_json(self, content: bytes, temperature: Temperature) -> Tuple[bytes, List[RegionBiomeChange]]:
+        """
+        Walk the map's top level entries only as far as its regions, splicing in the new temperature and regions.
+        Hexes come after regions, so the bulk of the map is never decoded.
+        """
+        text: str = content.decode('utf-8')
+        pieces: List[str] = []
+        copied_to: int = 0
+        position: int = 1
+        humidity: Optional[Humidity] = None
+        changes: Optional[List[RegionBiomeChange]] = None
+        while changes is None:
+            key, key_end = _decoder.raw_decode(text, position)
+            value, value_end = _decoder.raw_decode(text, key_end + 1)
+            if key == 'temperature':
+                pieces += [text[copied_to:key_end + 1], _encoder.encode(temperature.name)]
+                copied_to = value_end
+            elif key == 'humidity':
+                humidity = Humidity[value]
+            elif key == 'regions':
+                changes = self._reclimate_regions(value, temperature, humidity)
+                pieces += [text[copied_to:key_end + 1], _encoder.encode(value)]
+                copied_to = value_end
+            position = value_end + 1
+
+        pieces.append(text[copied_to:])
+        return ''.join(pieces).encode('utf-8'), changes
+
+    def _reclimate_regions(self,
+                           regions: Dict[str, dict],
+                           temperature: Temperature,
+                           humidity: Humidity) -> List[RegionBiomeChange]:
+        """
+        Recompute serialized regions' average elevation and biome in place, as the region layer would have set them.
+        """
+        elevation_modifier: float = self.biome_calculator.calc_climate_modifiers(temperature, humidity)[0]
+        changes: List[RegionBiomeChange] = []
+        for region_id, region in regions.items():
+            if 'base-elevation' not in region:
+                raise ValueError('Map has no base region averages to re-climate from, it must be regenerated')
+
+            region['average-elevation'] = Region.apply_modifier(region['base-elevation'], elevation_modifier)
+            biome: str = self.biome_calculator.pick_biome(region['average-elevation'], region['average-dryness']).name
+            if biome != region['biome']:
+                changes.append(RegionBiomeChange(regionId=int(region_id), previousBiome=region['biome'], biome=biome))
+                region['biome'] = biome
+
+        return changes
@@ -0,0 +1,14 @@
+from typing import Callable, Tuple
+
+
+class ExteriorStage:
+    """
+    A single step of exterior map generation, declaring the request fields it reads on top of those
+    read by earlier steps. Stages marked for snapshotting have their output cached, so later
+    requests only differing in the fields of later stages can resume after them.
+    """
+    def __init__(self, name: str, run: Callable[[], None], inputs: Tuple[str, ...], snapshot: bool = False) -> None:
+        self.name: str = name
+        self.run: Callable[[], None] = run
+        self.inputs: Tuple[str, ...] = inputs
+        self.snapshot: bool = snapshot
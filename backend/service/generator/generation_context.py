@@ -0,0 +1,121 @@
+from typing import Dict, List, Optional, Tuple
+
+from model.requests import CreateExteriorRequest, CreateExteriorVariantsRequest, CreateInteriorRequest, GenerationMessage
+from model.responses import ClimateVariant, RegionBiomeChange, VariantsResponse
+from service.generator.exterior_map_generator import ExteriorMapGenerator
+from service.generator.exterior_reclimater import ExteriorReclimater
+from service.generator.interior_map_generator import InteriorMapGenerator
+from service.stage_cache.i_stage_cache import IStageCache
+from service.stage_cache.file_stage_cache import FileStageCache
+from state.temperature import Temperature
+from util.biome_calculator import BiomeCalculator
+from util.constants import stage_cache_path, stage_cache_max_bytes
+from util.hex_utils import HexUtils
+from util.i_biome_calculator import IBiomeCalculator
+from util.i_hex_utility import IHexUtility
+from util.i_logger import ILogger
+from util.logger import Logger
+
+
+class GenerationContext:
+    """
+    Holds everything a single map generation mutates (generator fields, distance normalization).
+    A new context is created per request so concurrent generations never share state,
+    only the stateless logger and biome calculator, and the stage cache, being shared between them.
+    """
+    def __init__(self,
+                 logger: ILogger,
+                 biome_calculator: IBiomeCalculator,
+                 stage_cache: Optional[IStageCache] = None) -> None:
+        self.hex_util: IHexUtility = HexUtils()
+        self.exterior_generator: ExteriorMapGenerator = \
+            ExteriorMapGenerator(logger, biome_calculator, self.hex_util, stage_cache)
+        self.interior_generator: InteriorMapGenerator = InteriorMapGenerator(logger)
+
+
+# Shared by every context in a process, created once as creating a logger registers a new handler
+_logger: Optional[ILogger] = None
+_biome_calculator: Optional[IBiomeCalculator] = None
+_stage_cache: Optional[IStageCache] = None
+
+
+def set_shared_services(logger: ILogger, biome_calculator: IBiomeCalculator) -> None:
+    """
+    Share already created services with contexts in this process (and any worker processes forked from it).
+    """
+    global _logger, _biome_calculator
+    _logger = logger
+    _biome_calculator = biome_calculator
+
+
+def create_context() -> GenerationContext:
+    global _logger, _biome_calculator, _stage_cache
+    if _logger is None:
+        _logger = Logger()
+        _biome_calculator = BiomeCalculator()
+    if _stage_cache is None:
+        _stage_cache = FileStageCache(_logger, stage_cache_path, stage_cache_max_bytes)
+
+    return GenerationContext(_logger, _biome_calculator, _stage_cache)
+
+
+def generate_exterior(req: CreateExteriorRequest) -> bytes:
+    """
+    Generate an exterior map in a fresh context. Safe to run concurrently and in worker processes.
+    """
+    generator: ExteriorMapGenerator = create_context().exterior_generator
+    generator.instantiate(req)
+    return generator.generate()
+
+
+def generate_interior(req: CreateInteriorRequest) -> bytes:
+    """
+    Generate an interior map in a fresh context. Safe to run concurrently and in worker processes.
+    """
+    generator: InteriorMapGenerator = create_context().interior_generator
+    generator.instantiate(req)
+    return generator.generate()
+
+
+def generate_exterior_variants(req: CreateExteriorVariantsRequest) -> List[bytes]:
+    """
+    Generate an exterior map in each requested climate in a fresh context, in the order of the request's climates.
+    """
+    generator: ExteriorMapGenerator = create_context().exterior_generator
+    generator.instantiate(req.exterior)
+    return generator.generate_variants(req.climates())
+
+
+def reclimate_exterior(content: bytes, temperature: Temperature) -> Tuple[bytes, List[RegionBiomeChange]]:
+    """
+    Re-climate a generated exterior map to a new temperature, returning it alongside the regions whose biome changed.
+    """
+    global _biome_calculator
+    if _biome_calculator is None:
+        _biome_calculator = BiomeCalculator()
+
+    return ExteriorReclimater(_biome_calculator).reclimate(content, temperature)
+
+
+def generate_map(message: GenerationMessage) -> Dict[str, bytes]:
+    """
+    Generate whichever map a queued generation message requests, returning the serialized results by cache key.
+    Climate variants are each stored as their own exterior map, alongside a listing of them under the message's key.
+    """
+    if message.exterior:
+        return {message.cache_key(): generate_exterior(message.exterior)}
+    if message.interior:
+        return {message.cache_key(): generate_interior(message.interior)}
+
+    results: Dict[str, bytes] = {}
+    listing: List[ClimateVariant] = []
+    for (temperature, humidity), content in zip(message.variants.climates(),
+                                                generate_exterior_variants(message.variants)):
+        variant: CreateExteriorRequest = message.variants.variant(temperature, humidity)
+        variant_message: GenerationMessage = GenerationMessage(map_guid=variant.map_guid(), exterior=variant)
+        results[variant_message.cache_key()] = content
+        listing.append(ClimateVariant(temperature=temperature.name, humidity=humidity.name, mapId=variant.map_guid()))
+
+    # Added last so it is persisted last, every variant being available once the listing is
+    results[message.cache_key()] = VariantsResponse(variants=listing).model_dump_json().encode('utf-8')
+    return results
@@ -1,13 +1,16 @@
-import json
+import numpy as np
 
-from typing import Optional
+from typing import Iterator, List, Optional, Tuple
 
 from model.requests import CreateInteriorRequest
+from processing.interior.cell import Cell
 from processing.interior.interior import Interior
-from util.compact_json_encoder import CompactJsonEncoder
+from util import binary_map_format, streaming_json
 from util.i_logger import ILogger
 from util.constants import frame_rate, update_rate, background_color
 
+from state.map_format import MapFormat
+
 
 class InteriorMapGenerator:
     """
@@ -24,6 +27,7 @@ class InteriorMapGenerator:
         self.max_room_size: int = 0
         self.min_corridor_length: int = 0
         self.max_corridor_length: int = 0
+        self.map_format: MapFormat = MapFormat.Json
         self.interior: Optional[Interior] = None
 
     def instantiate(self, req: CreateInteriorRequest) -> None:
@@ -35,6 +39,7 @@ class InteriorMapGenerator:
         self.max_room_size = req.max_room_size
         self.min_corridor_length = req.min_corridor_length
         self.max_corridor_length = req.max_corridor_length
+        self.map_format = req.format
 
         self.interior = Interior(
             self.pixel_width,
@@ -46,14 +51,28 @@ class InteriorMapGenerator:
             self.min_corridor_length,
             self.max_corridor_length)
 
-    def generate(self) -> str:
+    def generate(self) -> bytes:
         self.logger.info('Interior -> Serializing')
+        if self.map_format == MapFormat.Binary:
+            return self.serialize_binary()
         return self.serialize()
 
-    def serialize(self) -> str:
-        serialized: dict = {}
+    def serialize(self) -> bytes:
+        return b''.join(self.serialize_stream())
+
+    def serialize_stream(self) -> Iterator[bytes]:
+        serialized: List[Tuple[str, object]] = []
 
-        return json.dumps(serialized, cls=CompactJsonEncoder, indent=2)
+        return streaming_json.iter_json(serialized)
+
+    def serialize_binary(self) -> bytes:
+        cells: List[Cell] = list(self.interior.generator())
+        return binary_map_format.encode_interior(
+            self.pixel_width // self.cell_size,
+            self.pixel_height // self.cell_size,
+            self.cell_size,
+            np.array([c.get_state() for c in cells], dtype=np.int64),
+            np.array([c.room_id for c in cells], dtype=np.int64))
 
     def debug_render(self) -> None:
         import pygame
@@ -0,0 +1,94 @@
+import threading
+import time
+
+from collections import OrderedDict
+from concurrent.futures import Executor, Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+from model.requests import GenerationMessage
+from service.generator.generation_context import generate_map
+from service.job_runner.i_job_runner import IJobRunner
+from util.constants import job_errors_kept
+from util.i_logger import ILogger
+
+
+def _timed(work: Callable[..., object], *args) -> Tuple[object, float]:
+    """
+    Run work, returning its result alongside how long it took in milliseconds.
+    Kept at module level so it can be sent to worker processes.
+    """
+    started: float = time.monotonic()
+    result: object = work(*args)
+    return result, (time.monotonic() - started) * 1000
+
+
+class ExecutorJobRunner(IJobRunner):
+    """
+    Job runner implementation handing work to an executor's worker pool, either threads or processes.
+    Finished results are passed on through each job's completion callback, after which the job is forgotten.
+    Wait estimates are based on a moving average of previous job durations.
+    Errors of failed jobs are kept for the most recently failed ones only.
+    """
+    def __init__(self, logger: ILogger, executor: Executor, workers: int, initial_estimate_ms: int = 1000):
+        self.logger: ILogger = logger
+        self.executor: Executor = executor
+        self.workers: int = workers
+        self.average_ms: float = initial_estimate_ms
+        self._smoothing: float = 0.2
+
+        self._lock: threading.Lock = threading.Lock()
+        self._running: Dict[str, Future] = {}
+        self._order: List[str] = []
+        self._errors: 'OrderedDict[str, str]' = OrderedDict()
+
+    def submit(self, message: GenerationMessage, on_complete: Callable[[Dict[str, bytes]], None]) -> None:
+        job_id: str = message.map_guid
+        with self._lock:
+            if job_id in self._running:
+                return
+
+            self._errors.pop(job_id, None)
+            future: Future = self.executor.submit(_timed, generate_map, message)
+            self._running[job_id] = future
+            self._order.append(job_id)
+
+        future.add_done_callback(lambda f: self._finish(job_id, f, on_complete))
+
+    def _finish(self, job_id: str, future: Future, on_complete: Callable[[Dict[str, bytes]], None]) -> None:
+        try:
+            result, elapsed_ms = future.result()
+            with self._lock:
+                self.average_ms += self._smoothing * (elapsed_ms - self.average_ms)
+            on_complete(result)
+        except Exception as ex:
+            self.logger.error(f'Job failed, id: {job_id}', ex)
+            with self._lock:
+                self._errors[job_id] = str(ex)
+                self._errors.move_to_end(job_id)
+                if len(self._errors) > job_errors_kept:
+                    self._errors.popitem(last=False)
+
+        with self._lock:
+            self._running.pop(job_id, None)
+            self._order.remove(job_id)
+
+    def is_running(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._running
+
+    def get_error(self, job_id: str) -> Optional[str]:
+        with self._lock:
+            return self._errors.get(job_id)
+
+    def estimate_milliseconds(self, job_id: str) -> int:
+        with self._lock:
+            if job_id not in self._running:
+                return 0
+
+            # Jobs ahead in line share the workers, then this one still has to run itself
+            ahead: int = self._order.index(job_id)
+            remaining_ms: float = (ahead // self.workers + 1) * self.average_ms
+            return max(int(remaining_ms), 100)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,30 @@
+from typing import Callable, Dict, Optional
+
+from model.requests import GenerationMessage
+
+
+class IJobRunner:
+    """Background map generation job runner service interface, jobs being identified by their map guid."""
+    def submit(self, message: GenerationMessage, on_complete: Callable[[Dict[str, bytes]], None]) -> None:
+        """
+        Submit a map to generate in the background, calling on_complete with the serialized results by cache key
+        if it is generated in this process (otherwise whoever generates it is responsible for persisting it).
+        Submitting a job id which is already running does nothing.
+        """
+        pass
+
+    def is_running(self, job_id: str) -> bool:
+        """Check if job with given id is queued or running."""
+        pass
+
+    def get_error(self, job_id: str) -> Optional[str]:
+        """Get the error message of a failed job with given id, None if it has not failed."""
+        pass
+
+    def estimate_milliseconds(self, job_id: str) -> int:
+        """Estimate how long until job with given id is finished."""
+        pass
+
+    def shutdown(self) -> None:
+        """Stop accepting jobs, cancelling any not yet started."""
+        pass
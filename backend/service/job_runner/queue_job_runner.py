@@ -0,0 +1,62 @@
+import time
+
+from typing import Callable, Dict, Optional
+
+from model.requests import GenerationMessage
+from service.job_runner.i_job_runner import IJobRunner
+from service.queue.i_queue import IQueue
+from service.read_thru_cache.i_read_thru_cache import IReadThruCache
+from util.constants import map_days_ttl
+from util.i_logger import ILogger
+
+
+class QueueJobRunner(IJobRunner):
+    """
+    Job runner implementation pushing jobs onto a queue for listener processes to generate.
+    Jobs are tracked by markers in the shared datastore rather than in memory, so every API process agrees on them:
+    a pending marker from submission until a listener has persisted the map,
+    and an error marker should a listener find the map can never be generated.
+    Markers are always checked in the datastore itself, as local caches may still hold ones since removed.
+    """
+    def __init__(self, logger: ILogger, queue: IQueue, cache: IReadThruCache, estimate_ms: int = 1000):
+        self.logger: ILogger = logger
+        self.queue: IQueue = queue
+        self.cache: IReadThruCache = cache
+        self.estimate_ms: int = estimate_ms
+
+    def submit(self, message: GenerationMessage, on_complete: Callable[[Dict[str, bytes]], None]) -> None:
+        pending_key: str = GenerationMessage.pending_key(message.map_guid)
+        if self.cache.exists_in_datastore(pending_key):
+            return
+
+        self.cache.delete(GenerationMessage.error_key(message.map_guid))
+        if not self.cache.set(pending_key, {'submitted': time.time()}, map_days_ttl):
+            self.logger.warn(f'Unable to mark job as pending, id: {message.map_guid}')
+        self.queue.push_message(message.model_dump_json())
+
+    def is_running(self, job_id: str) -> bool:
+        return self.cache.exists_in_datastore(GenerationMessage.pending_key(job_id))
+
+    def get_error(self, job_id: str) -> Optional[str]:
+        # Failed generations are left on the queue to be retried, only ones which can never succeed are recorded
+        error_key: str = GenerationMessage.error_key(job_id)
+        if not self.cache.exists_in_datastore(error_key):
+            return None
+
+        error: Optional[object] = self.cache.get(error_key, map_days_ttl)
+        return str(error) if error is not None else None
+
+    def estimate_milliseconds(self, job_id: str) -> int:
+        pending_key: str = GenerationMessage.pending_key(job_id)
+        if not self.cache.exists_in_datastore(pending_key):
+            return 0
+
+        pending: Optional[object] = self.cache.get(pending_key, map_days_ttl)
+        if not isinstance(pending, dict):
+            return self.estimate_ms
+
+        elapsed_ms: float = (time.time() - pending['submitted']) * 1000
+        return max(int(self.estimate_ms - elapsed_ms), 100)
+
+    def shutdown(self) -> None:
+        pass
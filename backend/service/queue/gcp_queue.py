@@ -3,7 +3,7 @@ import os
 from google.cloud import pubsub
 from google.pubsub import PullResponse, ReceivedMessage
 from google.cloud.pubsub import SubscriberClient, PublisherClient
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from service.queue.i_queue import IQueue
 from util.i_logger import ILogger
@@ -24,25 +24,32 @@ class GCPQueue(IQueue):
             self.pub_sub_project, self.pub_sub_topic)
 
         self.subscriber_client: SubscriberClient = pubsub.SubscriberClient()
-        self.subscribe_path: str = self.subscriber_client.topic_path(
+        self.subscribe_path: str = self.subscriber_client.subscription_path(
             self.pub_sub_project, self.pub_sub_subscription)
 
-    def get_message(self) -> Optional[str]:
-        content: Optional[str] = None
+    def get_message(self) -> Optional[Tuple[str, str]]:
+        messages: List[Tuple[str, str]] = self.get_messages(1)
+        return messages[0] if messages else None
 
+    def get_messages(self, max_messages: int) -> List[Tuple[str, str]]:
         try:
             res: PullResponse = self.subscriber_client.pull(
-                subscription=self.subscribe_path, max_messages=1)
-            if not res:
-                return None
-
-            msg: ReceivedMessage = res[0]
-            content = str(msg.data)
-            msg.ack()
+                subscription=self.subscribe_path, max_messages=max_messages)
+            return [(msg.ack_id, msg.message.data.decode('utf-8')) for msg in res.received_messages]
         except Exception as ex:
             self.logger.error(f'Exception while pulling from queue', ex)
+            return []
+
+    def ack_message(self, ack_id: str) -> bool:
+        return self.ack_messages([ack_id])
 
-        return content
+    def ack_messages(self, ack_ids: List[str]) -> bool:
+        try:
+            self.subscriber_client.acknowledge(subscription=self.subscribe_path, ack_ids=ack_ids)
+            return True
+        except Exception as ex:
+            self.logger.error(f'Exception while acknowledging queue messages, ack ids: {ack_ids}', ex)
+            return False
 
     def push_message(self, payload: str) -> None:
         try:
@@ -1,10 +1,28 @@
-from typing import Optional
+from typing import List, Optional, Tuple
 
 
 class IQueue:
     """Queue service interface."""
-    def get_message(self) -> Optional[str]:
-        """Pull a single str message from the queue."""
+    def get_message(self) -> Optional[Tuple[str, str]]:
+        """
+        Pull a single str message from the queue, returned with the ack id to acknowledge it by.
+        Messages not acknowledged in time are redelivered.
+        """
+        pass
+
+    def get_messages(self, max_messages: int) -> List[Tuple[str, str]]:
+        """
+        Pull up to max_messages str messages from the queue, each returned with the ack id to acknowledge it by.
+        Messages not acknowledged in time are redelivered.
+        """
+        pass
+
+    def ack_message(self, ack_id: str) -> bool:
+        """Acknowledge a pulled message as handled, removing it from the queue."""
+        pass
+
+    def ack_messages(self, ack_ids: List[str]) -> bool:
+        """Acknowledge several pulled messages as handled at once, removing them from the queue."""
         pass
 
     def push_message(self, payload: str) -> None:
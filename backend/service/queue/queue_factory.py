@@ -0,0 +1,18 @@
+from service.queue.i_queue import IQueue
+from service.queue.sqlite_queue import SqliteQueue
+from util.constants import queue_backend, local_queue_path, queue_visibility_timeout_seconds
+from util.i_logger import ILogger
+
+from state.queue_backend import QueueBackend
+
+
+def create_queue(logger: ILogger) -> IQueue:
+    """
+    Create the queue service using the configured queue backend.
+    """
+    if queue_backend == QueueBackend.GCP:
+        # Only imported when used, so local deployments don't need the cloud client libraries
+        from service.queue.gcp_queue import GCPQueue
+        return GCPQueue(logger)
+
+    return SqliteQueue(logger, local_queue_path, queue_visibility_timeout_seconds)
@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+from service.queue.i_queue import IQueue
+from util.i_logger import ILogger
+
+
+class SqliteQueue(IQueue):
+    """
+    Local queue service implementation backed by a SQLite database file, safe to share between processes.
+
+    Pulled messages are hidden for a visibility timeout rather than removed, getting a fresh ack id each delivery.
+    Acknowledging deletes them, while messages whose worker crashed become visible again once the timeout passes.
+    A late ack from a timed out delivery no longer matches the message's ack id, so it can't delete a redelivery.
+    """
+    def __init__(self, logger: ILogger, path: str, visibility_timeout_seconds: float):
+        self.logger: ILogger = logger
+        self.path: str = path
+        self.visibility_timeout_seconds: float = visibility_timeout_seconds
+
+        self._lock: threading.Lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection: sqlite3.Connection = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS messages ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'payload TEXT NOT NULL, '
+            'visible_at REAL NOT NULL, '
+            'deliveries INTEGER NOT NULL DEFAULT 0, '
+            'ack_id TEXT)')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS messages_visible_at ON messages (visible_at)')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS messages_ack_id ON messages (ack_id)')
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run statements in a single write transaction, taking the database write lock up front.
+        """
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._connection
+                self._connection.execute('COMMIT')
+            except Exception:
+                self._connection.execute('ROLLBACK')
+                raise
+
+    def get_message(self) -> Optional[Tuple[str, str]]:
+        messages: List[Tuple[str, str]] = self.get_messages(1)
+        return messages[0] if messages else None
+
+    def get_messages(self, max_messages: int) -> List[Tuple[str, str]]:
+        try:
+            messages: List[Tuple[str, str]] = []
+            with self._transaction() as connection:
+                now: float = time.time()
+                rows: List[Tuple[int, str]] = connection.execute(
+                    'SELECT id, payload FROM messages WHERE visible_at <= ? ORDER BY id LIMIT ?',
+                    (now, max_messages)).fetchall()
+                for message_id, payload in rows:
+                    ack_id: str = uuid.uuid4().hex
+                    connection.execute(
+                        'UPDATE messages SET visible_at = ?, deliveries = deliveries + 1, ack_id = ? WHERE id = ?',
+                        (now + self.visibility_timeout_seconds, ack_id, message_id))
+                    messages.append((ack_id, payload))
+
+            return messages
+        except Exception as ex:
+            self.logger.error(f'Exception while pulling from queue', ex)
+            return []
+
+    def ack_message(self, ack_id: str) -> bool:
+        return self.ack_messages([ack_id])
+
+    def ack_messages(self, ack_ids: List[str]) -> bool:
+        try:
+            with self._transaction() as connection:
+                connection.executemany('DELETE FROM messages WHERE ack_id = ?', [(a,) for a in ack_ids])
+            return True
+        except Exception as ex:
+            self.logger.error(f'Exception while acknowledging queue messages, ack ids: {ack_ids}', ex)
+            return False
+
+    def push_message(self, payload: str) -> None:
+        try:
+            with self._lock:
+                self._connection.execute(
+                    'INSERT INTO messages (payload, visible_at) VALUES (?, ?)', (payload, time.time()))
+        except Exception as ex:
+            self.logger.error(f'Exception while pushing item to queue, payload: {payload}', ex)
@@ -3,14 +3,23 @@ import json
 from typing import Optional
 from redis.client import Redis
 
+from service.datastore.i_datastore import IDatastore
 from service.read_thru_cache.i_read_thru_cache import IReadThruCache
 from util.i_logger import ILogger
 
 
 class GCPReadThruCache(IReadThruCache):
-    """Google Cloud read-Through cache service implementation using Redis and Firestore."""
-    def __init__(self, logger: ILogger):
+    """
+    Google Cloud read-Through cache service implementation using Redis in front of a datastore.
+    Items are always persisted to the datastore, Redis holding them for their TTL.
+    Redis misses fall through to the datastore, repopulating Redis with what was found.
+    Bytes content is stored as is behind a marker byte, anything else as JSON.
+    """
+    _raw_marker: bytes = b'\x00'
+
+    def __init__(self, logger: ILogger, datastore: IDatastore):
         self.logger: ILogger = logger
+        self.datastore: IDatastore = datastore
         self.host: str = 'localhost'
         self.redis: Redis = Redis(host=self.host, port=6379, db=0, password='')
         self.seconds_in_day: int = 24 * 60 * 60
@@ -20,7 +29,7 @@ class GCPReadThruCache(IReadThruCache):
             res: bool = self.redis.ping()
             if not res:
                 self.logger.error('Unable to ping redis cache!')
-            return res
+            return res and self.datastore.ping()
         except Exception as ex:
             self.logger.error('Unable to ping redis cache', ex)
             return False
@@ -34,22 +43,58 @@ class GCPReadThruCache(IReadThruCache):
             return False
 
     def exists_in_datastore(self, key: str) -> bool:
-        pass
+        return self.datastore.exists(key)
+
+    @staticmethod
+    def _dumps(content: object) -> bytes:
+        if isinstance(content, bytes):
+            return GCPReadThruCache._raw_marker + content
+        return json.dumps(content).encode('utf-8')
 
-    def set(self, key: str, content: object, days_ttl: int) -> None:
+    @staticmethod
+    def _loads(val: bytes) -> object:
+        if val[:1] == GCPReadThruCache._raw_marker:
+            return bytes(val[1:])
+        return json.loads(val)
+
+    def _set_in_cache(self, key: str, val: bytes, days_ttl: int) -> bool:
         try:
-            val: str = json.dumps(content)
             expiration_seconds: int = days_ttl * self.seconds_in_day
             res: bool = self.redis.set(key, val, ex=expiration_seconds)
             if not res:
                 self.logger.error(f'Unable to set item in redis cache, key: {key}')
+            return bool(res)
         except Exception as ex:
             self.logger.error(f'Unable to set item in redis cache, key: {key}', ex)
+            return False
+
+    def set(self, key: str, content: object, days_ttl: int) -> bool:
+        val: bytes = self._dumps(content)
+        if not self.datastore.set(key, val):
+            return False
+
+        self._set_in_cache(key, val, days_ttl)
+        return True
 
     def get(self, key: str, days_ttl: int) -> Optional[object]:
         try:
-            res: str = self.redis.get(key)
-            return res
+            res: Optional[bytes] = self.redis.get(key)
+            if res is not None:
+                return self._loads(res)
         except Exception as ex:
             self.logger.error(f'Unable to get item from redis cache, key: {key}', ex)
+
+        val: Optional[bytes] = self.datastore.get(key)
+        if val is None:
             return None
+
+        self._set_in_cache(key, val, days_ttl)
+        return self._loads(val)
+
+    def delete(self, key: str) -> bool:
+        try:
+            self.redis.delete(key)
+        except Exception as ex:
+            self.logger.error(f'Unable to delete item from redis cache, key: {key}', ex)
+
+        return self.datastore.delete(key)
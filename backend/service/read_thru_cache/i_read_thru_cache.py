@@ -17,11 +17,12 @@ class IReadThruCache:
         """Check if item with given key exists in underlying data store."""
         pass
 
-    def set(self, key: str, content: object, days_ttl: int) -> None:
+    def set(self, key: str, content: object, days_ttl: int) -> bool:
         """
         Set (or update) a single read-through cache item with given key, content to be
         serialized, and TTL in days. Item will be created in underlying data
         store as well as cache, with TTL on cache item.
+        Returns whether the item was persisted.
         """
         pass
 
@@ -33,3 +34,10 @@ class IReadThruCache:
         cache with TTL in days.
         """
         pass
+
+    def delete(self, key: str) -> bool:
+        """
+        Delete a single read-through cache item with given key from cache and underlying data store.
+        Returns whether the item is gone from the data store.
+        """
+        pass
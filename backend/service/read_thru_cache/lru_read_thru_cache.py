@@ -0,0 +1,117 @@
+import json
+import threading
+
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from service.read_thru_cache.i_read_thru_cache import IReadThruCache
+from util.i_logger import ILogger
+
+
+class _Load:
+    """
+    A lookup in progress, handing its result to the callers whose misses were collapsed into it.
+    """
+    def __init__(self) -> None:
+        self.done: threading.Event = threading.Event()
+        self.content: Optional[object] = None
+
+
+class LruReadThruCache(IReadThruCache):
+    """
+    Bounded in-process LRU cache sitting in front of another read-through cache.
+    Items are sized by their serialized length, least recently used items being evicted once over the byte limit.
+    Misses fall through to the wrapped cache, and anything found there is kept locally.
+    Concurrent misses on the same key are collapsed into a single lookup, the other callers waiting on its result.
+    They are handed the result directly, as items too large to keep locally can't be looked up again.
+    """
+    def __init__(self, logger: ILogger, inner: IReadThruCache, max_bytes: int):
+        self.logger: ILogger = logger
+        self.inner: IReadThruCache = inner
+        self.max_bytes: int = max_bytes
+        self.total_bytes: int = 0
+        self._items: OrderedDict[str, Tuple[object, int]] = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+        self._loading: Dict[str, _Load] = {}
+
+    @staticmethod
+    def _size_of(content: object) -> int:
+        if isinstance(content, bytes):
+            return len(content)
+        if isinstance(content, str):
+            return len(content.encode('utf-8'))
+        return len(json.dumps(content).encode('utf-8'))
+
+    def _store(self, key: str, content: object) -> None:
+        size: int = self._size_of(content)
+        with self._lock:
+            if key in self._items:
+                self.total_bytes -= self._items.pop(key)[1]
+
+            if size > self.max_bytes:
+                self.logger.warn(f'Item too large for local cache, key: {key}, bytes: {size}')
+                return
+
+            self._items[key] = (content, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def _lookup(self, key: str) -> Optional[object]:
+        with self._lock:
+            if key not in self._items:
+                return None
+
+            self._items.move_to_end(key)
+            return self._items[key][0]
+
+    def ping(self) -> bool:
+        return self.inner.ping()
+
+    def exists_in_cache(self, key: str) -> bool:
+        with self._lock:
+            if key in self._items:
+                return True
+        return self.inner.exists_in_cache(key)
+
+    def exists_in_datastore(self, key: str) -> bool:
+        return self.inner.exists_in_datastore(key)
+
+    def set(self, key: str, content: object, days_ttl: int) -> bool:
+        self._store(key, content)
+        return self.inner.set(key, content, days_ttl)
+
+    def get(self, key: str, days_ttl: int) -> Optional[object]:
+        content: Optional[object] = self._lookup(key)
+        if content is not None:
+            return content
+
+        with self._lock:
+            loading: Optional[_Load] = self._loading.get(key)
+            if loading is None:
+                load: _Load = _Load()
+                self._loading[key] = load
+
+        # Another caller is already loading this key, use whatever it found
+        if loading is not None:
+            loading.done.wait()
+            return loading.content
+
+        try:
+            content = self.inner.get(key, days_ttl)
+            if content is not None:
+                self._store(key, content)
+            load.content = content
+            return content
+        finally:
+            with self._lock:
+                del self._loading[key]
+            load.done.set()
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            if key in self._items:
+                self.total_bytes -= self._items.pop(key)[1]
+
+        return self.inner.delete(key)
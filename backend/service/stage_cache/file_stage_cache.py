@@ -0,0 +1,83 @@
+import os
+import threading
+
+from typing import List, Optional, Tuple
+
+from service.stage_cache.i_stage_cache import IStageCache
+from util.i_logger import ILogger
+
+
+class FileStageCache(IStageCache):
+    """
+    Stage cache service implementation keeping snapshots as files in a local directory,
+    so they are shared by every worker and listener process on the host.
+    Snapshots are written under a temporary name and renamed into place, readers never seeing partial files.
+    Least recently used snapshots are removed once the directory grows over its byte limit.
+    """
+    _extension: str = '.snapshot'
+
+    def __init__(self, logger: ILogger, directory: str, max_bytes: int):
+        self.logger: ILogger = logger
+        self.directory: str = directory
+        self.max_bytes: int = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self._extension)
+
+    def get(self, key: str) -> Optional[bytes]:
+        path: str = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                snapshot: bytes = f.read()
+            os.utime(path)
+            return snapshot
+        except FileNotFoundError:
+            return None
+        except Exception as ex:
+            self.logger.error(f'Unable to read stage snapshot, key: {key}', ex)
+            return None
+
+    def set(self, key: str, snapshot: bytes) -> bool:
+        if len(snapshot) > self.max_bytes:
+            self.logger.warn(f'Stage snapshot too large to cache, key: {key}, bytes: {len(snapshot)}')
+            return False
+
+        path: str = self._path(key)
+        temporary_path: str = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(temporary_path, 'wb') as f:
+                f.write(snapshot)
+            os.replace(temporary_path, path)
+        except Exception as ex:
+            self.logger.error(f'Unable to write stage snapshot, key: {key}', ex)
+            return False
+
+        self._evict()
+        return True
+
+    def _evict(self) -> None:
+        """
+        Remove least recently used snapshots until back under the byte limit.
+        Other processes may be evicting at the same time, so files already gone are skipped.
+        """
+        snapshots: List[Tuple[float, int, str]] = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(self._extension):
+                    continue
+                try:
+                    stat: os.stat_result = entry.stat()
+                    snapshots.append((stat.st_mtime, stat.st_size, entry.path))
+                except FileNotFoundError:
+                    continue
+
+        total_bytes: int = sum(size for _, size, _ in snapshots)
+        for _, size, path in sorted(snapshots):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
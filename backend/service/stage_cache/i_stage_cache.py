@@ -0,0 +1,12 @@
+from typing import Optional
+
+
+class IStageCache:
+    """Generation stage cache service interface, holding snapshots of partly generated maps by stage key."""
+    def get(self, key: str) -> Optional[bytes]:
+        """Get the snapshot stored under given stage key, None if there is none."""
+        pass
+
+    def set(self, key: str, snapshot: bytes) -> bool:
+        """Store a snapshot under given stage key, returning whether it was stored."""
+        pass
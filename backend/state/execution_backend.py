@@ -0,0 +1,10 @@
+from enum import Enum
+
+
+class ExecutionBackend(Enum):
+    """
+    The worker pools available for running map generation jobs, the queue handing them to listener processes.
+    """
+    Thread = 0
+    Process = 1
+    Queue = 2
@@ -0,0 +1,11 @@
+from enum import IntEnum
+
+
+class Geometry(IntEnum):
+    """
+    The ways map geometry (hex corners and outlines) can be written out.
+    PerHex repeats coordinates on every hex and outline,
+    Layout drops hex corners in favor of hex centers and the layout to recompute them from.
+    """
+    PerHex = 0
+    Layout = 2
@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class GridBackend(Enum):
+    """
+    The storage backends available for an exterior base layer grid.
+    """
+    Object = 0
+    Array = 1
@@ -0,0 +1,9 @@
+from enum import IntEnum
+
+
+class MapFormat(IntEnum):
+    """
+    The output formats a generated map can be serialized to.
+    """
+    Json = 0
+    Binary = 1
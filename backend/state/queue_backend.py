@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class QueueBackend(Enum):
+    """
+    The queue services available for passing generation requests to listeners.
+    """
+    GCP = 0
+    Local = 1
@@ -0,0 +1,13 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+# Modules import each other from the backend directory, as when the services are run from it
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep caches written by tests out of the real data directory, set before util.constants is first imported
+_data_path: str = tempfile.mkdtemp(prefix='bouken_tests_')
+os.environ['BOUKEN_DATA_DIR'] = _data_path
+atexit.register(shutil.rmtree, _data_path, True)
@@ -0,0 +1,74 @@
+import json
+
+import numpy as np
+import pytest
+
+import api_main
+
+from typing import Callable, Dict, List, Optional
+
+from model.requests import CreateInteriorRequest, GenerationMessage
+from service.job_runner.i_job_runner import IJobRunner
+from service.read_thru_cache.i_read_thru_cache import IReadThruCache
+from util import binary_map_format
+
+
+class _Cache(IReadThruCache):
+    def __init__(self) -> None:
+        self.items: Dict[str, object] = {}
+
+    def get(self, key: str, days_ttl: int) -> Optional[object]:
+        return self.items.get(key)
+
+
+class _JobRunner(IJobRunner):
+    def __init__(self) -> None:
+        self.submitted: List[str] = []
+
+    def submit(self, message: GenerationMessage, on_complete: Callable[[Dict[str, bytes]], None]) -> None:
+        self.submitted.append(message.map_guid)
+
+    def estimate_milliseconds(self, job_id: str) -> int:
+        return 500
+
+
+@pytest.fixture
+def cache(monkeypatch: pytest.MonkeyPatch) -> _Cache:
+    cache: _Cache = _Cache()
+    monkeypatch.setattr(api_main, '_cache', cache)
+    return cache
+
+
+@pytest.fixture
+def job_runner(monkeypatch: pytest.MonkeyPatch) -> _JobRunner:
+    job_runner: _JobRunner = _JobRunner()
+    monkeypatch.setattr(api_main, '_job_runner', job_runner)
+    return job_runner
+
+
+def _message(map_guid: str) -> GenerationMessage:
+    return GenerationMessage(map_guid=map_guid, interior=CreateInteriorRequest(
+        pixel_width=320, pixel_height=320, cell_size=16, number_rooms=4, min_room_size=2, max_room_size=4,
+        min_corridor_length=1, max_corridor_length=3, debug=False))
+
+
+def test_new_map_submitted_and_polled(cache: _Cache, job_runner: _JobRunner) -> None:
+    response = api_main._submit_job(_message('a'))
+
+    assert response.status_code == 202
+    assert json.loads(response.body) == {
+        'jobId': 'a', 'message': 'Map is being generated', 'retryTimeMilliseconds': 500}
+    assert job_runner.submitted == ['a']
+
+
+def test_already_generated_map_returned_with_200(cache: _Cache, job_runner: _JobRunner) -> None:
+    cache.items['interior:a'] = b'{"cells": []}'
+    cache.items['interior:b'] = binary_map_format.encode_interior(1, 1, 16, np.zeros(1), np.zeros(1))
+
+    json_response = api_main._submit_job(_message('a'))
+    binary_response = api_main._submit_job(_message('b'))
+
+    assert job_runner.submitted == []
+    assert (json_response.status_code, json_response.media_type, json_response.body) == \
+        (200, 'application/json', b'{"cells": []}')
+    assert (binary_response.status_code, binary_response.media_type) == (200, binary_map_format.media_type)
@@ -0,0 +1,38 @@
+from processing.exterior.array_base_layer import ArrayBaseLayer
+from processing.exterior.base_layer import BaseLayer
+from processing.exterior.hex import Hex
+from util.hex_utils import HexUtils
+
+
+def _layer(seed: int = 3) -> ArrayBaseLayer:
+    layer: ArrayBaseLayer = ArrayBaseLayer(HexUtils(), 320, 8, 0.45, 0.35, pointy=False, seed=seed)
+    for _ in range(4):
+        layer.terraform()
+    layer.finalize()
+    return layer
+
+
+def test_matches_object_layer() -> None:
+    array_layer: ArrayBaseLayer = ArrayBaseLayer(HexUtils(), 320, 8, 0.45, 0.35, pointy=False, seed=3)
+    object_layer: BaseLayer = BaseLayer(HexUtils(), 320, 8, 0.45, 0.35, pointy=False, seed=3)
+    object_layer.grid = array_layer.topology.create_grid()
+    for h in array_layer.generator():
+        object_layer[h.x, h.y].set_state(h.get_state())
+
+    for layer in (array_layer, object_layer):
+        for _ in range(4):
+            layer.terraform()
+        layer.finalize()
+
+    assert [h.get_state() for h in array_layer.generator()] == [h.get_state() for h in object_layer.generator()]
+
+
+def test_array_picks_up_direct_hex_changes() -> None:
+    layer: ArrayBaseLayer = _layer()
+    land: int = layer.total_land_hexes()
+    h: Hex = next(h for h in layer.generator() if h.is_land())
+    h.set_ocean()
+
+    assert layer.total_land_hexes() == land - 1
+    layer.terraform()
+    assert layer.total_land_hexes() == sum(1 for h in layer.generator() if h.is_land())
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from util import binary_map_format
+
+
+def _exterior(count: int = 50) -> dict:
+    rng: np.random.Generator = np.random.default_rng(7)
+    return dict(
+        info={'columns': 10, 'rows': 10, 'pointy': 0, 'hex_size': 8, 'width': 140, 'height': 90,
+              'temperature': 2, 'humidity': 3},
+        coordinates=rng.integers(0, 20, (count, 2)),
+        states=rng.integers(0, 10, count),
+        elevation=rng.random(count),
+        dryness=rng.random(count),
+        depth=rng.random(count) * 5,
+        island_ids=rng.integers(-1, 4, count),
+        region_ids=rng.integers(-1, 12, count),
+        details={'islands': {'0': {'hexes': 3}}, 'regions': {'1': {'biome': 'Tundra'}}})
+
+
+def test_exterior_round_trip() -> None:
+    fields: dict = _exterior()
+    data: bytes = binary_map_format.encode_exterior(**fields)
+    decoded: dict = binary_map_format.decode(data)
+
+    assert binary_map_format.is_binary_map(data)
+    assert decoded['kind'] == 'exterior'
+    assert (decoded['columns'], decoded['rows'], decoded['hex_size']) == (10, 10, 8)
+    assert decoded['dimensions'] == (140, 90)
+    assert (decoded['temperature'], decoded['humidity']) == (2, 3)
+    assert np.array_equal(decoded['x'], fields['coordinates'][:, 0])
+    assert np.array_equal(decoded['y'], fields['coordinates'][:, 1])
+    assert np.array_equal(decoded['states'], fields['states'])
+    for field in ('elevation', 'dryness', 'depth'):
+        step: float = (fields[field].max() - fields[field].min()) / binary_map_format._quantized_max
+        assert np.allclose(decoded[field], fields[field], atol=step)
+    for field in ('island_ids', 'region_ids'):
+        assert np.array_equal(decoded[field], np.where(fields[field] < 0, binary_map_format.no_id, fields[field]))
+    assert decoded['islands'] == fields['details']['islands']
+    assert decoded['regions'] == fields['details']['regions']
+
+
+def test_exterior_details_replaced_in_place() -> None:
+    fields: dict = _exterior()
+    data: bytes = binary_map_format.encode_exterior(**fields)
+    details: dict = {'islands': {}, 'regions': {'1': {'biome': 'Grassland'}}}
+    replaced: bytes = binary_map_format.replace_exterior_details(data, 4, details)
+
+    assert binary_map_format.read_exterior_details(data) == (2, 3, fields['details'])
+    assert binary_map_format.read_exterior_details(replaced) == (4, 3, details)
+    before: dict = binary_map_format.decode(data)
+    after: dict = binary_map_format.decode(replaced)
+    for field in ('x', 'y', 'states', 'elevation', 'dryness', 'depth', 'island_ids', 'region_ids'):
+        assert np.array_equal(before[field], after[field])
+
+
+def test_interior_round_trip() -> None:
+    rng: np.random.Generator = np.random.default_rng(3)
+    states: np.ndarray = rng.integers(0, 6, (12, 8))
+    room_ids: np.ndarray = rng.integers(-1, 9, (12, 8))
+    data: bytes = binary_map_format.encode_interior(12, 8, 16, states.ravel(), room_ids.ravel())
+    decoded: dict = binary_map_format.decode(data)
+
+    assert (decoded['kind'], decoded['columns'], decoded['rows'], decoded['cell_size']) == ('interior', 12, 8, 16)
+    assert np.array_equal(decoded['states'], states)
+    assert np.array_equal(decoded['room_ids'], np.where(room_ids < 0, binary_map_format.no_id, room_ids))
+
+
+def test_rejects_ids_too_large_and_other_data() -> None:
+    with pytest.raises(ValueError):
+        binary_map_format.encode_interior(1, 1, 16, np.zeros(1), np.array([binary_map_format.no_id]))
+    assert not binary_map_format.is_binary_map(b'{"hexes": {}}')
+    with pytest.raises(ValueError):
+        binary_map_format.decode(b'{"hexes": {}}')
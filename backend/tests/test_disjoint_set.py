@@ -0,0 +1,33 @@
+import numpy as np
+
+from typing import List
+
+from util.disjoint_set import DisjointSet
+
+
+def _naive_roots(size: int, a: np.ndarray, b: np.ndarray) -> List[int]:
+    roots: List[int] = list(range(size))
+    for x, y in zip(a.tolist(), b.tolist()):
+        low, high = sorted((roots[x], roots[y]))
+        roots = [low if r == high else r for r in roots]
+    return roots
+
+
+def test_roots_match_pairwise_unions() -> None:
+    rng: np.random.Generator = np.random.default_rng(5)
+    for _ in range(20):
+        a: np.ndarray = rng.integers(0, 60, 40)
+        b: np.ndarray = rng.integers(0, 60, 40)
+        disjoint_set: DisjointSet = DisjointSet(60)
+        disjoint_set.union(a, b)
+
+        assert disjoint_set.roots().tolist() == _naive_roots(60, a, b)
+
+
+def test_unions_accumulate_and_roots_are_smallest_ids() -> None:
+    disjoint_set: DisjointSet = DisjointSet(8)
+    disjoint_set.union(np.array([7, 5]), np.array([6, 4]))
+    disjoint_set.union(np.array([6]), np.array([4]))
+
+    assert len(disjoint_set) == 8
+    assert disjoint_set.roots().tolist() == [0, 1, 2, 3, 4, 4, 4, 4]
@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+import service.job_runner.executor_job_runner as executor_job_runner
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List
+
+from model.requests import CreateExteriorRequest, GenerationMessage
+from service.job_runner.executor_job_runner import ExecutorJobRunner
+from util.logger import Logger
+
+_logger: Logger = Logger()
+
+
+def _message(map_guid: str) -> GenerationMessage:
+    return GenerationMessage(map_guid=map_guid, exterior=CreateExteriorRequest(
+        pixel_width=320, hex_size=8, initial_land_pct=0.45, required_land_pct=0.35, terraform_iterations=4,
+        min_island_size=10, humidity=3, temperature=2, min_region_expansions=2, max_region_expansions=5,
+        min_region_size_pct=0.01, debug=False, seed=5))
+
+
+def _failing_generate_map(message: GenerationMessage) -> Dict[str, bytes]:
+    raise ValueError(f'Unable to generate {message.map_guid}')
+
+
+def _wait_for(runner: ExecutorJobRunner, job_id: str) -> None:
+    while runner.is_running(job_id):
+        time.sleep(0.01)
+
+
+@pytest.mark.parametrize('executor_type', [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_generates_maps_on_executor(executor_type: type) -> None:
+    executor: Executor = executor_type(max_workers=2)
+    runner: ExecutorJobRunner = ExecutorJobRunner(_logger, executor, 2)
+    completions: List[Dict[str, bytes]] = []
+    try:
+        runner.submit(_message('a'), completions.append)
+        runner.submit(_message('a'), completions.append)
+        assert runner.is_running('a') and runner.estimate_milliseconds('a') >= 100
+
+        _wait_for(runner, 'a')
+    finally:
+        runner.shutdown()
+
+    assert len(completions) == 1
+    assert list(completions[0]) == ['exterior:a']
+    assert runner.get_error('a') is None and runner.estimate_milliseconds('a') == 0
+
+
+def test_keeps_errors_of_most_recent_failures(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(executor_job_runner, 'generate_map', _failing_generate_map)
+    monkeypatch.setattr(executor_job_runner, 'job_errors_kept', 2)
+    runner: ExecutorJobRunner = ExecutorJobRunner(_logger, ThreadPoolExecutor(max_workers=1), 1)
+    completions: List[Dict[str, bytes]] = []
+    try:
+        for job_id in ('a', 'b', 'c'):
+            runner.submit(_message(job_id), completions.append)
+            _wait_for(runner, job_id)
+    finally:
+        runner.shutdown()
+
+    assert not completions
+    assert runner.get_error('a') is None
+    assert runner.get_error('b') == 'Unable to generate b'
+    assert runner.get_error('c') == 'Unable to generate c'
+
+    # Resubmitting a failed job forgets its error
+    runner = ExecutorJobRunner(_logger, ThreadPoolExecutor(max_workers=1), 1)
+    runner._errors['b'] = 'Unable to generate b'
+    monkeypatch.setattr(executor_job_runner, 'generate_map', lambda message: {})
+    runner.submit(_message('b'), completions.append)
+    _wait_for(runner, 'b')
+    runner.shutdown()
+    assert runner.get_error('b') is None
@@ -0,0 +1,82 @@
+import time
+import pytest
+
+import service.generator.exterior_map_generator as exterior_map_generator
+
+from typing import List
+
+from model.requests import CreateExteriorRequest
+from service.generator.exterior_map_generator import ExteriorMapGenerator
+from state.grid_backend import GridBackend
+from state.humidity import Humidity
+from state.map_format import MapFormat
+from state.temperature import Temperature
+from util.biome_calculator import BiomeCalculator
+from util.constants import terraform_time_budget_seconds
+from util.hex_utils import HexUtils
+from util.logger import Logger
+
+_logger: Logger = Logger()
+
+
+def _request(**overrides) -> CreateExteriorRequest:
+    # Defaults of the frontend's generation form
+    params: dict = dict(
+        pixel_width=640, hex_size=8, initial_land_pct=0.3, required_land_pct=0.4, terraform_iterations=20,
+        min_island_size=12, humidity=Humidity.Barren, temperature=Temperature.Freezing,
+        min_region_expansions=2, max_region_expansions=5, min_region_size_pct=0.0125, debug=False, seed=0)
+    params.update(overrides)
+    return CreateExteriorRequest(**params)
+
+
+def _generator(request: CreateExteriorRequest) -> ExteriorMapGenerator:
+    generator: ExteriorMapGenerator = ExteriorMapGenerator(_logger, BiomeCalculator(), HexUtils())
+    generator.instantiate(request)
+    return generator
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_default_parameters_never_abandon_attempts(seed: int) -> None:
+    generator: ExteriorMapGenerator = _generator(_request(seed=seed))
+    predictions: List[bool] = []
+    falls_short = generator._falls_short
+
+    def recorded(*args) -> bool:
+        predictions.append(falls_short(*args))
+        return predictions[-1]
+
+    generator._falls_short = recorded
+    generator._terraform()
+
+    assert predictions and not any(predictions)
+    assert generator.base_layer.has_enough_land()
+
+
+def test_unreachable_land_raises_within_budget() -> None:
+    generator: ExteriorMapGenerator = _generator(_request(initial_land_pct=0.05, required_land_pct=0.9))
+
+    started: float = time.monotonic()
+    with pytest.raises(ValueError, match='Unable to terraform enough land'):
+        generator._terraform()
+    assert time.monotonic() - started < terraform_time_budget_seconds
+
+
+def test_time_budget_stops_retries(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(exterior_map_generator, 'terraform_time_budget_seconds', 0)
+    generator: ExteriorMapGenerator = _generator(_request(initial_land_pct=0.05, required_land_pct=0.9))
+
+    with pytest.raises(ValueError, match=r'\(1 attempts\)'):
+        generator._terraform()
+
+
+@pytest.mark.parametrize('backend', list(GridBackend))
+@pytest.mark.parametrize('map_format', list(MapFormat))
+def test_seeded_requests_generate_same_map(
+        monkeypatch: pytest.MonkeyPatch, backend: GridBackend, map_format: MapFormat) -> None:
+    monkeypatch.setattr(exterior_map_generator, 'grid_backend', backend)
+    request: CreateExteriorRequest = _request(pixel_width=320, seed=4, format=map_format)
+
+    generated: bytes = _generator(request).generate()
+
+    assert _generator(request).generate() == generated
+    assert _generator(_request(pixel_width=320, seed=5, format=map_format)).generate() != generated
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from typing import List
+
+from model.requests import CreateExteriorRequest
+from model.responses import RegionBiomeChange
+from service.generator.exterior_map_generator import ExteriorMapGenerator
+from service.generator.exterior_reclimater import ExteriorReclimater
+from state.geometry import Geometry
+from state.map_format import MapFormat
+from state.temperature import Temperature
+from util.biome_calculator import BiomeCalculator
+from util.hex_utils import HexUtils
+from util.logger import Logger
+
+_logger: Logger = Logger()
+
+
+def _generate(temperature: Temperature, map_format: MapFormat, geometry: Geometry = Geometry.PerHex) -> bytes:
+    generator: ExteriorMapGenerator = ExteriorMapGenerator(_logger, BiomeCalculator(), HexUtils())
+    generator.instantiate(CreateExteriorRequest(
+        pixel_width=480, hex_size=8, initial_land_pct=0.45, required_land_pct=0.35, terraform_iterations=4,
+        min_island_size=10, humidity=3, temperature=temperature, min_region_expansions=2, max_region_expansions=5,
+        min_region_size_pct=0.01, debug=False, seed=7, format=map_format, geometry=geometry))
+    return generator.generate()
+
+
+@pytest.mark.parametrize('map_format, geometry', [
+    (MapFormat.Json, Geometry.PerHex), (MapFormat.Json, Geometry.Layout), (MapFormat.Binary, Geometry.PerHex)])
+def test_reclimated_map_matches_map_generated_at_new_temperature(map_format: MapFormat, geometry: Geometry) -> None:
+    generated: bytes = _generate(Temperature.Freezing, map_format, geometry)
+    expected: bytes = _generate(Temperature.Hot, map_format, geometry)
+
+    reclimated, changes = ExteriorReclimater(BiomeCalculator()).reclimate(generated, Temperature.Hot)
+
+    assert reclimated == expected
+    assert changes
+
+
+def test_changes_list_regions_whose_biome_changed() -> None:
+    generated: bytes = _generate(Temperature.Freezing, MapFormat.Json)
+    expected: dict = json.loads(_generate(Temperature.Hot, MapFormat.Json))
+    before: dict = json.loads(generated)
+
+    changes: List[RegionBiomeChange] = ExteriorReclimater(BiomeCalculator()).reclimate(generated, Temperature.Hot)[1]
+
+    assert sorted(c.regionId for c in changes) == sorted(
+        int(k) for k, region in before['regions'].items() if region['biome'] != expected['regions'][k]['biome'])
+    for change in changes:
+        assert change.previousBiome == before['regions'][str(change.regionId)]['biome']
+        assert change.biome == expected['regions'][str(change.regionId)]['biome']
+
+
+def test_map_reclimated_to_its_own_temperature_unchanged() -> None:
+    generated: bytes = _generate(Temperature.Temperate, MapFormat.Json)
+
+    assert ExteriorReclimater(BiomeCalculator()).reclimate(generated, Temperature.Temperate) == (generated, [])
@@ -0,0 +1,48 @@
+import pytest
+
+from typing import List, Set
+
+from model.requests import CreateExteriorRequest
+from processing.exterior.hex import Hex
+from service.generator.exterior_map_generator import ExteriorMapGenerator
+from util.biome_calculator import BiomeCalculator
+from util.hex_utils import HexUtils
+from util.logger import Logger
+
+_logger: Logger = Logger()
+
+
+def _placed_freshwater(seed: int) -> ExteriorMapGenerator:
+    generator: ExteriorMapGenerator = ExteriorMapGenerator(_logger, BiomeCalculator(), HexUtils())
+    generator.instantiate(CreateExteriorRequest(
+        pixel_width=960, hex_size=8, initial_land_pct=0.45, required_land_pct=0.35, terraform_iterations=4,
+        min_island_size=10, humidity=3, temperature=2, min_region_expansions=2, max_region_expansions=5,
+        min_region_size_pct=0.01, debug=False, seed=seed))
+    generator._run_stages(0, generator._stage_index('geography') + 1)
+    return generator
+
+
+def _lake_bodies(hexes: List[Hex]) -> List[Set[Hex]]:
+    unvisited: Set[Hex] = {h for h in hexes if h.is_lake()}
+    bodies: List[Set[Hex]] = []
+    while unvisited:
+        body: Set[Hex] = {unvisited.pop()}
+        frontier: List[Hex] = list(body)
+        while frontier:
+            for n in frontier.pop().direct_neighbors:
+                if n in unvisited:
+                    unvisited.remove(n)
+                    body.add(n)
+                    frontier.append(n)
+        bodies.append(body)
+    return bodies
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_each_lake_is_its_own_body_with_a_river(seed: int) -> None:
+    generator: ExteriorMapGenerator = _placed_freshwater(seed)
+    bodies: List[Set[Hex]] = _lake_bodies(list(generator.base_layer.generator()))
+
+    assert len(bodies) == generator.geography_layer._made_lakes
+    for body in bodies:
+        assert any(n.is_river() for h in body for n in h.direct_neighbors)
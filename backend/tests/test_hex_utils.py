@@ -0,0 +1,53 @@
+import math
+
+from typing import Dict, List, Tuple
+
+from processing.exterior.hex import Hex
+from state.terraform import Terraform
+from util.hex_utils import HexUtils
+
+_offsets: Tuple[Tuple[int, int], ...] = ((2, 0), (-2, 0), (1, 1), (-1, 1), (1, -1), (-1, -1))
+
+
+def _grid(land: List[Tuple[int, int]], ocean: List[Tuple[int, int]]) -> Dict[Tuple[int, int], Hex]:
+    grid: Dict[Tuple[int, int], Hex] = {}
+    for uid, (x, y) in enumerate(land + ocean):
+        h: Hex = Hex(uid, x, y)
+        h.set_state(Terraform.Land if (x, y) in land else Terraform.Ocean)
+        grid[x, y] = h
+
+    for (x, y), h in grid.items():
+        h.direct_neighbors = tuple(grid[x + dx, y + dy] for dx, dy in _offsets if (x + dx, y + dy) in grid)
+    return grid
+
+
+def _hex_utils(max_distance: float) -> HexUtils:
+    hex_utils: HexUtils = HexUtils()
+    hex_utils.set_max_distance(max_distance)
+    return hex_utils
+
+
+def test_targets_at_zero_and_others_measured_to_nearest_target() -> None:
+    grid: Dict[Tuple[int, int], Hex] = _grid(land=[(2, 0), (4, 0), (6, 0), (8, 0)], ocean=[(0, 0), (10, 0)])
+    field: Dict[Hex, float] = _hex_utils(10).distance_field(list(grid.values()), [Terraform.Ocean])
+
+    assert [field[grid[x, 0]] for x in range(0, 12, 2)] == [0, 0.2, 0.4, 0.4, 0.2, 0]
+
+
+def test_distances_measured_by_pixel_offset_not_steps() -> None:
+    land: List[Tuple[int, int]] = [
+        (x, y) for y in range(-2, 3) for x in range(-4, 5) if (x + y) % 2 == 0 and (x, y) != (0, 0)]
+    grid: Dict[Tuple[int, int], Hex] = _grid(land=land, ocean=[(0, 0)])
+    field: Dict[Hex, float] = _hex_utils(10).distance_field(list(grid.values()), [Terraform.Ocean])
+
+    assert field[grid[0, 0]] == 0
+    assert field[grid[2, 0]] == field[grid[-2, 0]] == 0.2
+    assert field[grid[1, 1]] == field[grid[-1, -1]] == math.sqrt(2) / 10
+    assert field[grid[4, 2]] == math.sqrt(20) / 10
+
+
+def test_unreachable_and_far_hexes_capped_at_one() -> None:
+    grid: Dict[Tuple[int, int], Hex] = _grid(land=[(2, 0), (4, 0), (20, 0)], ocean=[(0, 0)])
+    field: Dict[Hex, float] = _hex_utils(3).distance_field(list(grid.values()), [Terraform.Ocean])
+
+    assert [field[grid[x, 0]] for x in (0, 2, 4, 20)] == [0, 2 / 3, 1, 1]
@@ -0,0 +1,147 @@
+import threading
+import time
+
+from typing import Dict, List, Optional
+
+from service.datastore.sqlite_datastore import SqliteDatastore
+from service.read_thru_cache.gcp_read_thru_cache import GCPReadThruCache
+from service.read_thru_cache.i_read_thru_cache import IReadThruCache
+from service.read_thru_cache.lru_read_thru_cache import LruReadThruCache
+from util.logger import Logger
+
+_logger: Logger = Logger()
+
+
+class _Inner(IReadThruCache):
+    """
+    Dictionary backed cache counting lookups, which can be held until released.
+    """
+    def __init__(self) -> None:
+        self.items: Dict[str, object] = {}
+        self.gets: List[str] = []
+        self.release: threading.Event = threading.Event()
+        self.release.set()
+
+    def set(self, key: str, content: object, days_ttl: int) -> bool:
+        self.items[key] = content
+        return True
+
+    def get(self, key: str, days_ttl: int) -> Optional[object]:
+        self.gets.append(key)
+        self.release.wait()
+        return self.items.get(key)
+
+    def delete(self, key: str) -> bool:
+        self.items.pop(key, None)
+        return True
+
+
+def _collapsed_gets(cache: LruReadThruCache, inner: _Inner, key: str, callers: int) -> List[Optional[object]]:
+    inner.release.clear()
+    results: List[Optional[object]] = [None] * callers
+
+    def get(n: int) -> None:
+        results[n] = cache.get(key, 1)
+
+    threads: List[threading.Thread] = [threading.Thread(target=get, args=(n,)) for n in range(callers)]
+    for thread in threads:
+        thread.start()
+    # Give every caller time to miss and wait on the first caller's lookup
+    time.sleep(0.2)
+    inner.release.set()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_collapsed_misses_get_items_too_large_to_keep() -> None:
+    inner: _Inner = _Inner()
+    cache: LruReadThruCache = LruReadThruCache(_logger, inner, max_bytes=4)
+    inner.items['map'] = b'larger than four bytes'
+
+    results: List[Optional[object]] = _collapsed_gets(cache, inner, 'map', 8)
+
+    assert results == [b'larger than four bytes'] * 8
+    assert inner.gets == ['map']
+    assert cache.total_bytes == 0
+
+
+def test_least_recently_used_items_evicted_over_byte_limit() -> None:
+    inner: _Inner = _Inner()
+    cache: LruReadThruCache = LruReadThruCache(_logger, inner, max_bytes=10)
+    cache.set('a', b'aaaa', 1)
+    cache.set('b', b'bbbb', 1)
+    cache.get('a', 1)
+    cache.set('c', b'cccc', 1)
+
+    assert list(cache._items) == ['a', 'c']
+    assert cache.total_bytes == 8
+
+    # Evicted items are still found in the wrapped cache, and kept locally again
+    assert cache.get('b', 1) == b'bbbb'
+    assert inner.gets == ['b']
+    assert list(cache._items) == ['c', 'b']
+
+
+def test_items_sized_by_serialized_length() -> None:
+    cache: LruReadThruCache = LruReadThruCache(_logger, _Inner(), max_bytes=100)
+    cache.set('bytes', b'abc', 1)
+    cache.set('text', 'é', 1)
+    cache.set('dict', {'a': 1}, 1)
+
+    assert cache.total_bytes == 3 + 2 + len('{"a": 1}')
+
+
+def test_collapsed_misses_share_one_lookup() -> None:
+    inner: _Inner = _Inner()
+    cache: LruReadThruCache = LruReadThruCache(_logger, inner, max_bytes=100)
+    inner.items['map'] = b'content'
+
+    assert _collapsed_gets(cache, inner, 'map', 8) == [b'content'] * 8
+    assert inner.gets == ['map']
+    assert cache.get('map', 1) == b'content' and inner.gets == ['map']
+
+
+def test_misses_not_kept() -> None:
+    inner: _Inner = _Inner()
+    cache: LruReadThruCache = LruReadThruCache(_logger, inner, max_bytes=100)
+
+    assert cache.get('missing', 1) is None
+    inner.items['missing'] = b'now here'
+    assert cache.get('missing', 1) == b'now here'
+
+
+class _Redis:
+    """
+    Stand-in for a Redis client, recording the expiry items are set with.
+    """
+    def __init__(self) -> None:
+        self.items: Dict[str, bytes] = {}
+        self.expiries: Dict[str, int] = {}
+
+    def set(self, key: str, val: bytes, ex: int) -> bool:
+        self.items[key] = val
+        self.expiries[key] = ex
+        return True
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.items.get(key)
+
+    def delete(self, key: str) -> int:
+        return int(self.items.pop(key, None) is not None)
+
+
+def test_ttl_applies_to_redis_not_datastore(tmp_path) -> None:
+    inner: GCPReadThruCache = GCPReadThruCache(_logger, SqliteDatastore(_logger, str(tmp_path / 'datastore.db')))
+    redis: _Redis = _Redis()
+    inner.redis = redis
+    cache: LruReadThruCache = LruReadThruCache(_logger, inner, max_bytes=100)
+
+    cache.set('map', b'content', 7)
+    assert redis.expiries['map'] == 7 * 24 * 60 * 60
+
+    # Once expired from Redis, another process's local cache reads the item back from the datastore,
+    # setting it in Redis again with that caller's TTL
+    del redis.items['map']
+    assert LruReadThruCache(_logger, inner, max_bytes=100).get('map', 2) == b'content'
+    assert redis.expiries['map'] == 2 * 24 * 60 * 60
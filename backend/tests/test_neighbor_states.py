@@ -0,0 +1,46 @@
+from random import Random
+from typing import Callable, Dict, List, Tuple
+
+from processing.exterior.base_layer import BaseLayer
+from processing.exterior.hex import Hex
+from processing.interior.cell import Cell
+from state.terraform import Terraform
+from util.hex_utils import HexUtils
+
+
+def test_hex_counts_match_recount_after_random_transitions() -> None:
+    random: Random = Random(11)
+    layer: BaseLayer = BaseLayer(HexUtils(), 320, 8, 0.45, 0.35, pointy=False, seed=1)
+    hexes: List[Hex] = list(layer.generator())
+    states: List[Terraform] = list(Terraform)
+
+    for step in range(5000):
+        random.choice(hexes).set_state(random.choice(states))
+        if step % 1000 == 0 or step == 4999:
+            counts: List[Tuple[List[int], List[int], List[int]]] = [
+                (list(h.direct), list(h.secondary), list(h.total)) for h in hexes]
+            for h in hexes:
+                h.set_neighbor_states()
+            assert counts == [(h.direct, h.secondary, h.total) for h in hexes]
+
+
+def test_cell_counts_match_recount_after_random_transitions() -> None:
+    random: Random = Random(12)
+    cells: Dict[Tuple[int, int], Cell] = {(x, y): Cell(x * 12 + y, x, y, 16) for x in range(12) for y in range(12)}
+    for (x, y), c in cells.items():
+        c.neighbors = [
+            cells[x + dx, y + dy] for dx, dy in ((0, 1), (1, 0), (0, -1), (-1, 0)) if (x + dx, y + dy) in cells]
+    for c in cells.values():
+        c.set_neighbor_states()
+
+    grid: List[Cell] = list(cells.values())
+    setters: List[Callable[[Cell], None]] = [
+        Cell.set_floor, Cell.set_wall, Cell.set_empty, Cell.set_padding, Cell.set_corridor, Cell.set_corner,
+        Cell.set_water]
+    for _ in range(2000):
+        random.choice(setters)(random.choice(grid))
+
+    counts: List[List[int]] = [list(c.direct) for c in grid]
+    for c in grid:
+        c.set_neighbor_states()
+    assert counts == [c.direct for c in grid]
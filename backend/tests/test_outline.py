@@ -0,0 +1,80 @@
+import pytest
+
+from typing import List, Tuple
+
+from processing.exterior.base_layer import BaseLayer
+from processing.exterior.hex import Hex
+from processing.exterior.outline import Outline
+from util.hex_utils import HexUtils
+
+
+def _center(pointy: bool) -> Hex:
+    layer: BaseLayer = BaseLayer(HexUtils(), 320, 8, 0.45, 0.35, pointy=pointy, seed=1)
+    return layer[6, 6]
+
+
+def _shoelace(ring: List[Tuple[int, int]]) -> float:
+    return sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(ring, ring[1:])) / 2
+
+
+def _close(ring: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    return ring + ring[:1]
+
+
+def _rotations(ring: List[Tuple[int, int]]) -> List[List[Tuple[int, int]]]:
+    open_ring: List[Tuple[int, int]] = ring[:-1]
+    return [_close(open_ring[n:] + open_ring[:n]) for n in range(len(open_ring))]
+
+
+@pytest.mark.parametrize('pointy', [True, False])
+def test_single_hex(pointy: bool) -> None:
+    h: Hex = _center(pointy)
+    outline: Outline = Outline([h], pointy)
+
+    assert outline.rings == [_close(h.vertices)]
+    assert outline.get_vertices() == _close(h.vertices)
+    assert outline.area == abs(_shoelace(_close(h.vertices)))
+    assert abs(outline.centroid[0] - h.pixel_center_x) <= 1 and abs(outline.centroid[1] - h.pixel_center_y) <= 1
+
+
+@pytest.mark.parametrize('pointy', [True, False])
+def test_region_of_seven_hexes(pointy: bool) -> None:
+    h: Hex = _center(pointy)
+    hexes: List[Hex] = [h, *h.direct_neighbors]
+    outline: Outline = Outline(hexes, pointy)
+    corners: set = {v for n in hexes for v in n.vertices}
+
+    assert len(outline.rings) == 1
+    assert len(outline.exterior) == 18 + 1 and set(outline.exterior) <= corners
+    assert outline.area == pytest.approx(sum(abs(_shoelace(_close(n.vertices))) for n in hexes), rel=0.05)
+    assert abs(outline.centroid[0] - h.pixel_center_x) <= 1 and abs(outline.centroid[1] - h.pixel_center_y) <= 1
+
+
+@pytest.mark.parametrize('pointy', [True, False])
+def test_region_with_hole(pointy: bool) -> None:
+    h: Hex = _center(pointy)
+    filled: Outline = Outline([h, *h.direct_neighbors], pointy)
+    outline: Outline = Outline(h.direct_neighbors, pointy)
+
+    assert len(outline.rings) == 2
+    exterior, hole = sorted(outline.rings, key=lambda r: abs(_shoelace(r)), reverse=True)
+    assert outline.exterior == exterior
+    assert exterior in _rotations(filled.exterior)
+
+    # The hole runs the opposite way around, so its area is taken out of the region's
+    assert len(hole) == 6 + 1
+    assert _shoelace(hole) * _shoelace(exterior) < 0
+    assert outline.area == filled.area - abs(_shoelace(hole))
+    assert abs(outline.centroid[0] - h.pixel_center_x) <= 1 and abs(outline.centroid[1] - h.pixel_center_y) <= 1
+
+
+@pytest.mark.parametrize('pointy', [True, False])
+def test_separate_parts(pointy: bool) -> None:
+    h: Hex = _center(pointy)
+    far: Hex = h.direct_neighbors[0].direct_neighbors[0].direct_neighbors[0]
+    outline: Outline = Outline([h, far], pointy)
+
+    assert len(outline.rings) == 2
+    for part in (h, far):
+        assert any(ring in _rotations(_close(part.vertices)) for ring in outline.rings)
+    assert outline.area == abs(_shoelace(_close(h.vertices))) + abs(_shoelace(_close(far.vertices)))
@@ -0,0 +1,92 @@
+import pytest
+
+from typing import Dict, List, Set, Tuple
+
+from model.requests import CreateExteriorRequest
+from processing.exterior.region import Region
+from processing.exterior.region_layer import RegionLayer
+from service.generator.exterior_map_generator import ExteriorMapGenerator
+from util.biome_calculator import BiomeCalculator
+from util.hex_utils import HexUtils
+from util.logger import Logger
+
+_logger: Logger = Logger()
+
+
+def _discovered_regions(seed: int) -> ExteriorMapGenerator:
+    generator: ExteriorMapGenerator = ExteriorMapGenerator(_logger, BiomeCalculator(), HexUtils())
+    generator.instantiate(CreateExteriorRequest(
+        pixel_width=640, hex_size=8, initial_land_pct=0.45, required_land_pct=0.35, terraform_iterations=4,
+        min_island_size=10, humidity=3, temperature=2, min_region_expansions=1, max_region_expansions=3,
+        min_region_size_pct=0.02, debug=False, seed=seed))
+    generator._run_stages(0, generator._stage_index('regions'))
+
+    generator.region_layer = RegionLayer(
+        generator.biome_calculator, generator.hex_util, generator.island_layer, generator.min_region_expansions,
+        generator.max_region_expansions, generator.min_region_size_pct, generator.base_layer.total_usable_hexes(),
+        generator.elevation_modifier, generator.dryness_modifier, generator._region_seed)
+    while generator.region_layer.discover(generator.island_layer):
+        pass
+    generator.region_layer.establish_regions_to_merge()
+    return generator
+
+
+def _adjacency(region_layer: RegionLayer) -> Dict[int, Set[int]]:
+    """
+    Neighboring region ids of every region, worked out from scratch from their hexes.
+    """
+    return {
+        region_id: {n.region_id for h in region_layer[region_id].hexes for n in h.direct_neighbors
+                    if n.is_in_region() and n.region_id != region_id}
+        for region_id in region_layer.keys()}
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_merges_keep_adjacency_and_flags_current(seed: int, monkeypatch: pytest.MonkeyPatch) -> None:
+    generator: ExteriorMapGenerator = _discovered_regions(seed)
+    region_layer: RegionLayer = generator.region_layer
+    min_size: int = region_layer._min_region_size
+
+    refreshed: List[int] = []
+    set_adjacency_details = Region.set_adjacency_details
+
+    def recorded(region: Region) -> None:
+        refreshed.append(region.region_id)
+        set_adjacency_details(region)
+
+    monkeypatch.setattr(Region, 'set_adjacency_details', recorded)
+
+    merges: int = 0
+    isolated: Set[int] = set()
+    while True:
+        before: Dict[int, Set[int]] = {k: set(region_layer[k].neighbor_region_ids) for k in region_layer.keys()}
+        sizes: Dict[int, int] = {k: len(region_layer[k].hexes) for k in region_layer.keys()}
+        queued: List[Tuple[int, int]] = sorted(
+            (size, k) for k, size in sizes.items() if size < min_size and k not in isolated)
+        refreshed.clear()
+
+        if not region_layer.merge(generator.island_layer):
+            assert not queued
+            break
+
+        # The smallest region still under the minimum size goes first, into its smallest neighbor
+        smallest: int = queued[0][1]
+        if not before[smallest]:
+            isolated.add(smallest)
+            continue
+        merges += 1
+        absorber: int = min(before[smallest], key=lambda k: (sizes[k], k))
+        assert set(region_layer.keys()) == set(sizes) - {smallest}
+        assert len(region_layer[absorber].hexes) == sizes[absorber] + sizes[smallest]
+
+        # Neighbors are relinked to the absorber, and every region whose neighbors changed refreshes its flags
+        adjacency: Dict[int, Set[int]] = _adjacency(region_layer)
+        for k in region_layer.keys():
+            region: Region = region_layer[k]
+            assert region.neighbor_region_ids == adjacency[k]
+            if region.neighbor_region_ids != before[k]:
+                assert k in refreshed
+            assert region.is_secluded == (not region.neighbor_region_ids)
+            assert region.is_surrounded == (not region.is_coastal and not region.is_secluded)
+
+    assert merges > 0
@@ -0,0 +1,49 @@
+import pytest
+
+from random import Random
+from typing import Set
+
+from util.sampling_set import SamplingSet
+
+
+def test_matches_set_through_adds_and_removals() -> None:
+    random: Random = Random(9)
+    sampling_set: SamplingSet[int] = SamplingSet(range(10))
+    expected: Set[int] = set(range(10))
+    for _ in range(500):
+        item: int = random.randrange(30)
+        if random.random() < 0.5:
+            sampling_set.add(item)
+            expected.add(item)
+        else:
+            sampling_set.discard(item)
+            expected.discard(item)
+
+        assert len(sampling_set) == len(expected)
+        assert set(sampling_set) == expected
+        assert all(i in sampling_set for i in expected)
+
+
+def test_pop_random_empties_set_once_each() -> None:
+    random: Random = Random(2)
+    sampling_set: SamplingSet[str] = SamplingSet('abcdef')
+    popped: Set[str] = {sampling_set.pop_random(random) for _ in range(6)}
+
+    assert popped == set('abcdef')
+    assert len(sampling_set) == 0
+
+
+def test_seeded_picks_repeat() -> None:
+    first: SamplingSet[int] = SamplingSet(range(100))
+    second: SamplingSet[int] = SamplingSet(range(100))
+    random_a: Random = Random(4)
+    random_b: Random = Random(4)
+
+    assert [first.pop_random(random_a) for _ in range(50)] == [second.pop_random(random_b) for _ in range(50)]
+
+
+def test_remove_missing_raises() -> None:
+    sampling_set: SamplingSet[int] = SamplingSet([1])
+    sampling_set.discard(2)
+    with pytest.raises(KeyError):
+        sampling_set.remove(2)
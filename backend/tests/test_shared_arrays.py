@@ -0,0 +1,51 @@
+import uuid
+import numpy as np
+
+from typing import Dict, Optional
+
+from processing.exterior.grid_topology import GridTopology
+from util import shared_arrays
+from util.hex_utils import HexUtils
+
+
+def _name() -> str:
+    return f'bouken-test-{uuid.uuid4().hex[:12]}'
+
+
+def test_attach_needs_matching_tag():
+    name: str = _name()
+    arrays: Dict[str, np.ndarray] = {'values': np.arange(10, dtype=np.int32)}
+    assert shared_arrays.create(name, b'ours', arrays) is not None
+    assert shared_arrays.create(name, b'ours', arrays) is None
+
+    attached: Optional[Dict[str, np.ndarray]] = shared_arrays.attach(name, b'ours')
+    assert attached is not None
+    assert np.array_equal(attached['values'], arrays['values'])
+    assert shared_arrays.attach(name, b'theirs') is None
+
+
+def test_attach_rejects_other_format_version(monkeypatch):
+    name: str = _name()
+    shared_arrays.create(name, b'ours', {'values': np.zeros(4, dtype=np.int32)})
+
+    monkeypatch.setattr(shared_arrays, '_blocks', {})
+    monkeypatch.setattr(shared_arrays, '_format_version', shared_arrays._format_version + 1)
+    assert shared_arrays.attach(name, b'ours') is None
+
+
+def test_topology_ignores_foreign_block(monkeypatch):
+    monkeypatch.setattr(GridTopology, '_deployment', uuid.uuid4().hex)
+    hex_util: HexUtils = HexUtils()
+    foreign: GridTopology = GridTopology(hex_util, 160, 8, True)
+    name: str = foreign._shared_name()
+    tag: bytes = foreign._shared_tag()
+
+    # Another deployment whose block name collides, as if by a shared hash prefix
+    monkeypatch.setattr(GridTopology, '_deployment', uuid.uuid4().hex)
+    monkeypatch.setattr(GridTopology, '_shared_name', lambda topology: name)
+    topology: GridTopology = GridTopology(hex_util, 160, 8, True)
+
+    assert topology._shared_tag() != tag
+    assert not np.shares_memory(topology.coordinates, foreign.coordinates)
+    assert np.array_equal(topology.coordinates, foreign.coordinates)
+    assert np.array_equal(topology.direct_neighbor_ids, foreign.direct_neighbor_ids)
@@ -0,0 +1,66 @@
+from model.requests import CreateExteriorRequest
+from service.generator.exterior_map_generator import ExteriorMapGenerator
+from service.stage_cache.file_stage_cache import FileStageCache
+from util import snapshot
+from util.biome_calculator import BiomeCalculator
+from util.hex_utils import HexUtils
+from util.logger import Logger
+
+_logger: Logger = Logger()
+
+
+def _generator(**overrides) -> ExteriorMapGenerator:
+    params: dict = dict(
+        pixel_width=320, hex_size=8, initial_land_pct=0.45, required_land_pct=0.35, terraform_iterations=4,
+        min_island_size=10, humidity=3, temperature=2, min_region_expansions=2, max_region_expansions=5,
+        min_region_size_pct=0.01, debug=False, seed=5)
+    params.update(overrides)
+    generator: ExteriorMapGenerator = ExteriorMapGenerator(_logger, BiomeCalculator(), HexUtils())
+    generator.instantiate(CreateExteriorRequest(**params))
+    return generator
+
+
+def test_restored_layers_generate_same_map() -> None:
+    generator: ExteriorMapGenerator = _generator()
+    resume_at: int = generator._stage_index('geography') + 1
+    generator._run_stages(0, resume_at)
+    dumped: bytes = snapshot.dump(generator._layers(), generator._services())
+    generator._run_stages(resume_at, len(generator.stages))
+
+    restored: ExteriorMapGenerator = _generator()
+    restored._restore(dumped)
+    restored._run_stages(resume_at, len(restored.stages))
+
+    assert restored._serialize_map() == generator._serialize_map()
+
+
+def test_restored_layers_use_loading_services() -> None:
+    generator: ExteriorMapGenerator = _generator()
+    generator._run_stages(0, generator._stage_index('drainage') + 1)
+    dumped: bytes = snapshot.dump(generator._layers(), generator._services())
+
+    restored: ExteriorMapGenerator = _generator()
+    restored._restore(dumped)
+
+    assert restored.base_layer.hex_util is restored.hex_util
+    assert restored.base_layer is not generator.base_layer
+    assert [h.get_state() for h in restored.base_layer.generator()] == \
+        [h.get_state() for h in generator.base_layer.generator()]
+
+
+def test_resuming_from_stage_cache_matches_uncached(tmp_path) -> None:
+    stage_cache: FileStageCache = FileStageCache(_logger, str(tmp_path), 64 * 1024 * 1024)
+    uncached: bytes = _generator(humidity=1).generate()
+
+    cold: ExteriorMapGenerator = _generator()
+    cold.stage_cache = stage_cache
+    cold.generate()
+
+    # Only climate differs, so generation resumes after drainage
+    warm: ExteriorMapGenerator = _generator(humidity=1)
+    warm.stage_cache = stage_cache
+    assert warm._restore_latest_snapshot() == warm._stage_index('drainage') + 1
+
+    warm = _generator(humidity=1)
+    warm.stage_cache = stage_cache
+    assert warm.generate() == uncached
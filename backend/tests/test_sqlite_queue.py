@@ -0,0 +1,74 @@
+import pytest
+
+import service.queue.sqlite_queue as sqlite_queue
+
+from service.queue.sqlite_queue import SqliteQueue
+from util.logger import Logger
+
+_logger: Logger = Logger()
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now: float = 1000
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> _Clock:
+    clock: _Clock = _Clock()
+    monkeypatch.setattr(sqlite_queue, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def queue(tmp_path, clock: _Clock) -> SqliteQueue:
+    return SqliteQueue(_logger, str(tmp_path / 'queue.db'), visibility_timeout_seconds=60)
+
+
+def test_pulled_messages_hidden_until_timeout(queue: SqliteQueue, clock: _Clock) -> None:
+    queue.push_message('a')
+    queue.push_message('b')
+
+    assert [payload for _, payload in queue.get_messages(5)] == ['a', 'b']
+    assert queue.get_messages(5) == []
+
+    clock.now += 61
+    assert [payload for _, payload in queue.get_messages(5)] == ['a', 'b']
+
+
+def test_ack_removes_message(queue: SqliteQueue, clock: _Clock) -> None:
+    queue.push_message('a')
+    ack_id, _ = queue.get_message()
+
+    assert queue.ack_message(ack_id)
+    clock.now += 61
+    assert queue.get_message() is None
+
+
+def test_redelivery_gets_new_ack_id(queue: SqliteQueue, clock: _Clock) -> None:
+    queue.push_message('a')
+    stale_ack_id, _ = queue.get_message()
+    clock.now += 61
+    ack_id, payload = queue.get_message()
+
+    assert payload == 'a' and ack_id != stale_ack_id
+
+    # A late ack from the timed out delivery leaves the redelivered message alone
+    queue.ack_message(stale_ack_id)
+    clock.now += 61
+    ack_id, payload = queue.get_message()
+    assert payload == 'a'
+
+    queue.ack_messages([ack_id])
+    clock.now += 61
+    assert queue.get_message() is None
+
+
+def test_messages_shared_between_connections(tmp_path, clock: _Clock) -> None:
+    path: str = str(tmp_path / 'nested' / 'queue.db')
+    SqliteQueue(_logger, path, 60).push_message('a')
+
+    assert SqliteQueue(_logger, path, 60).get_message()[1] == 'a'
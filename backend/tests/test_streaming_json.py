@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from typing import List
+
+from model.requests import CreateExteriorRequest
+from service.generator.exterior_map_generator import ExteriorMapGenerator
+from state.geometry import Geometry
+from util import streaming_json
+from util.biome_calculator import BiomeCalculator
+from util.hex_utils import HexUtils
+from util.logger import Logger
+from util.streaming_json import StreamedObject
+
+_logger: Logger = Logger()
+
+_awkward: str = 'quote " backslash \\ newline \n tab \t control \x01 accent é snowman ☃ astral \U0001F30A'
+
+
+def test_streamed_objects_escaped_like_json_dumps(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(streaming_json, 'chunk_bytes', 8)
+    expected: dict = {
+        _awkward: _awkward,
+        'nested': {_awkward: {'deeper': [1, 2.5, None, True, _awkward]}, 'empty': {}},
+        'tuple': [1, 2],
+        'empty': {}
+    }
+    chunks: List[bytes] = list(streaming_json.iter_json([
+        (_awkward, _awkward),
+        ('nested', StreamedObject(iter([
+            (_awkward, StreamedObject([('deeper', (1, 2.5, None, True, _awkward))])),
+            ('empty', StreamedObject([]))]))),
+        ('tuple', (1, 2)),
+        ('empty', StreamedObject(iter(())))]))
+
+    assert len(chunks) > 1 and all(isinstance(chunk, bytes) for chunk in chunks)
+    assert b''.join(chunks) == json.dumps(expected, separators=(',', ':')).encode('utf-8')
+    assert json.loads(b''.join(chunks)) == expected
+
+
+@pytest.mark.parametrize('geometry', list(Geometry))
+def test_streamed_map_matches_whole_dict_serialization(geometry: Geometry) -> None:
+    generator: ExteriorMapGenerator = ExteriorMapGenerator(_logger, BiomeCalculator(), HexUtils())
+    generator.instantiate(CreateExteriorRequest(
+        pixel_width=320, hex_size=8, initial_land_pct=0.45, required_land_pct=0.35, terraform_iterations=4,
+        min_island_size=10, humidity=3, temperature=2, min_region_expansions=2, max_region_expansions=5,
+        min_region_size_pct=0.01, debug=False, seed=5, geometry=geometry))
+    generator._run_stages(0, len(generator.stages))
+
+    # As maps were serialized before streaming, building the whole dict first
+    serialized: dict = {
+        'dimensions': (generator.base_layer.actual_width, generator.base_layer.actual_height),
+        'temperature': generator.temperature.name,
+        'humidity': generator.humidity.name,
+        'islands': generator.island_layer.serialize(),
+        'regions': generator.region_layer.serialize(),
+        'hexes': generator.base_layer.serialize(geometry)
+    }
+    if geometry == Geometry.Layout:
+        serialized['layout'] = generator.base_layer.serialize_layout()
+
+    assert json.loads(generator.serialize()) == json.loads(json.dumps(serialized))
@@ -0,0 +1,215 @@
+"""
+Versioned binary map format, a compact alternative to JSON map output.
+
+All values are little-endian. Every map starts with a header:
+    4s magic 'BKMP', u16 format version, u8 map kind (0 exterior, 1 interior), u8 flags (bit 0: body is zlib compressed)
+
+Exterior body (version 1):
+    u16 columns, u16 rows, u8 pointy, u16 hex size, u32 pixel width, u32 pixel height, u8 temperature, u8 humidity
+    u32 hex count n
+    u16[n] x, u16[n] y      Doubled Coordinates of each hex, in hex uid order
+    u8[n] state             Terraform value
+    elevation, dryness and depth each as f32 min, f32 max, u16[n] values quantized over [min, max]
+    u16[n] island id, u16[n] region id, 0xFFFF where a hex belongs to none
+    u32 length, UTF-8 JSON  island and region details, as in the JSON format
+
+Interior body (version 1):
+    u16 columns, u16 rows, u16 cell size
+    u8[columns * rows] state     Construction value, column by column
+    u16[columns * rows] room id  0xFFFF where a cell belongs to no room
+"""
+
+import json
+import struct
+import zlib
+
+import numpy as np
+
+from typing import Dict, Tuple
+
+media_type: str = 'application/vnd.bouken.map'
+version: int = 1
+no_id: int = 0xFFFF
+
+exterior_kind: int = 0
+interior_kind: int = 1
+
+_magic: bytes = b'BKMP'
+_header: struct.Struct = struct.Struct('<4sHBB')
+_exterior_info: struct.Struct = struct.Struct('<HHBHIIBBI')
+_interior_info: struct.Struct = struct.Struct('<HHH')
+_range: struct.Struct = struct.Struct('<ff')
+_length: struct.Struct = struct.Struct('<I')
+_compressed: int = 1
+_temperature_offset: int = 15
+_quantized_max: int = 0xFFFF
+
+
+def _quantize(values: np.ndarray) -> bytes:
+    low: float = float(values.min()) if len(values) else 0
+    high: float = float(values.max()) if len(values) else 0
+    scale: float = _quantized_max / (high - low) if high > low else 0
+    quantized: np.ndarray = np.rint((values - low) * scale).astype('<u2')
+    return _range.pack(low, high) + quantized.tobytes()
+
+
+def _dequantize(body: bytes, offset: int, count: int) -> Tuple[np.ndarray, int]:
+    low, high = _range.unpack_from(body, offset)
+    offset += _range.size
+    quantized: np.ndarray = np.frombuffer(body, dtype='<u2', count=count, offset=offset)
+    values: np.ndarray = low + quantized.astype(np.float32) * ((high - low) / _quantized_max)
+    return values, offset + count * 2
+
+
+def _ids(ids: np.ndarray) -> bytes:
+    if len(ids) and ids.max() >= no_id:
+        raise ValueError(f'Id {ids.max()} too large for binary map format')
+    return np.where(ids < 0, no_id, ids).astype('<u2').tobytes()
+
+
+def _wrap(kind: int, body: bytes) -> bytes:
+    return _header.pack(_magic, version, kind, _compressed) + zlib.compress(body, 6)
+
+
+def encode_exterior(info: Dict[str, int],
+                    coordinates: np.ndarray,
+                    states: np.ndarray,
+                    elevation: np.ndarray,
+                    dryness: np.ndarray,
+                    depth: np.ndarray,
+                    island_ids: np.ndarray,
+                    region_ids: np.ndarray,
+                    details: dict) -> bytes:
+    """
+    Encode an exterior map. Info holds the grid and climate fields of the body, per-hex arrays being in uid order
+    with -1 marking hexes without an island or region.
+    """
+    details_json: bytes = json.dumps(details).encode('utf-8')
+    body: bytes = b''.join([
+        _exterior_info.pack(info['columns'], info['rows'], info['pointy'], info['hex_size'], info['width'],
+                            info['height'], info['temperature'], info['humidity'], len(states)),
+        coordinates[:, 0].astype('<u2').tobytes(),
+        coordinates[:, 1].astype('<u2').tobytes(),
+        states.astype(np.uint8).tobytes(),
+        _quantize(elevation),
+        _quantize(dryness),
+        _quantize(depth),
+        _ids(island_ids),
+        _ids(region_ids),
+        _length.pack(len(details_json)),
+        details_json
+    ])
+    return _wrap(exterior_kind, body)
+
+
+def encode_interior(columns: int, rows: int, cell_size: int, states: np.ndarray, room_ids: np.ndarray) -> bytes:
+    """
+    Encode an interior map, per-cell arrays running column by column with -1 marking cells outside any room.
+    """
+    body: bytes = b''.join([
+        _interior_info.pack(columns, rows, cell_size),
+        states.astype(np.uint8).tobytes(),
+        _ids(room_ids)
+    ])
+    return _wrap(interior_kind, body)
+
+
+def is_binary_map(data: bytes) -> bool:
+    """
+    Tell binary maps apart from JSON ones by their magic.
+    """
+    return data[:len(_magic)] == _magic
+
+
+def _exterior_body(data: bytes) -> bytes:
+    magic, map_version, kind, flags = _header.unpack_from(data, 0)
+    if magic != _magic or kind != exterior_kind:
+        raise ValueError('Not a binary exterior map')
+    if map_version > version:
+        raise ValueError(f'Unsupported binary map version {map_version}')
+
+    body: bytes = data[_header.size:]
+    return zlib.decompress(body) if flags & _compressed else body
+
+
+def _details_offset(body: bytes) -> int:
+    count: int = _exterior_info.unpack_from(body, 0)[-1]
+    return _exterior_info.size + count * 5 + 3 * (_range.size + count * 2) + count * 4
+
+
+def read_exterior_details(data: bytes) -> Tuple[int, int, dict]:
+    """
+    Read only the temperature, humidity and island and region details of an exterior map, skipping its hex arrays.
+    """
+    body: bytes = _exterior_body(data)
+    temperature, humidity = _exterior_info.unpack_from(body, 0)[6:8]
+    offset: int = _details_offset(body)
+    length: int = _length.unpack_from(body, offset)[0]
+    offset += _length.size
+    return temperature, humidity, json.loads(body[offset:offset + length].decode('utf-8'))
+
+
+def replace_exterior_details(data: bytes, temperature: int, details: dict) -> bytes:
+    """
+    Re-encode an exterior map with a new temperature and details, its hex arrays copied across untouched.
+    """
+    body: bytes = _exterior_body(data)
+    details_json: bytes = json.dumps(details).encode('utf-8')
+    offset: int = _details_offset(body)
+    body = b''.join([
+        body[:_temperature_offset],
+        bytes([temperature]),
+        body[_temperature_offset + 1:offset],
+        _length.pack(len(details_json)),
+        details_json
+    ])
+    return _wrap(exterior_kind, body)
+
+
+def decode(data: bytes) -> dict:
+    """
+    Reference decoder, reading either map kind back into a dict of its fields and numpy arrays.
+    """
+    magic, map_version, kind, flags = _header.unpack_from(data, 0)
+    if magic != _magic:
+        raise ValueError('Not a binary map')
+    if map_version > version:
+        raise ValueError(f'Unsupported binary map version {map_version}')
+
+    body: bytes = data[_header.size:]
+    if flags & _compressed:
+        body = zlib.decompress(body)
+
+    if kind == interior_kind:
+        columns, rows, cell_size = _interior_info.unpack_from(body, 0)
+        count: int = columns * rows
+        offset: int = _interior_info.size
+        states: np.ndarray = np.frombuffer(body, dtype=np.uint8, count=count, offset=offset)
+        room_ids: np.ndarray = np.frombuffer(body, dtype='<u2', count=count, offset=offset + count)
+        return {
+            'version': map_version, 'kind': 'interior', 'columns': columns, 'rows': rows, 'cell_size': cell_size,
+            'states': states.reshape(columns, rows), 'room_ids': room_ids.reshape(columns, rows)
+        }
+
+    columns, rows, pointy, hex_size, width, height, temperature, humidity, count = \
+        _exterior_info.unpack_from(body, 0)
+    offset: int = _exterior_info.size
+    decoded: dict = {
+        'version': map_version, 'kind': 'exterior', 'columns': columns, 'rows': rows, 'pointy': bool(pointy),
+        'hex_size': hex_size, 'dimensions': (width, height), 'temperature': temperature, 'humidity': humidity
+    }
+
+    decoded['x'] = np.frombuffer(body, dtype='<u2', count=count, offset=offset)
+    decoded['y'] = np.frombuffer(body, dtype='<u2', count=count, offset=offset + count * 2)
+    decoded['states'] = np.frombuffer(body, dtype=np.uint8, count=count, offset=offset + count * 4)
+    offset += count * 5
+    for field in ('elevation', 'dryness', 'depth'):
+        decoded[field], offset = _dequantize(body, offset, count)
+    decoded['island_ids'] = np.frombuffer(body, dtype='<u2', count=count, offset=offset)
+    decoded['region_ids'] = np.frombuffer(body, dtype='<u2', count=count, offset=offset + count * 2)
+    offset += count * 4
+
+    length: int = _length.unpack_from(body, offset)[0]
+    offset += _length.size
+    decoded.update(json.loads(body[offset:offset + length].decode('utf-8')))
+    return decoded
@@ -2,7 +2,14 @@
 Constants used throughout backend project.
 """
 
+import os
+
+from typing import Optional
+
+from state.execution_backend import ExecutionBackend
+from state.grid_backend import GridBackend
 from state.pathfinding import Pathfinding
+from state.queue_backend import QueueBackend
 
 
 background_color = (52, 73, 94)
@@ -27,5 +34,36 @@ tundra_color = (221, 221, 187)
 snow_color = (248, 248, 248)
 
 path_find_mode: Pathfinding = Pathfinding.Euclidean
+grid_backend: GridBackend = GridBackend.Array
 
 number_of_listeners: int = 4
+listener_poll_seconds: float = 1
+generation_backend: ExecutionBackend = ExecutionBackend.Process
+number_of_generation_workers: int = 4
+job_errors_kept: int = 256
+
+# Local queue, datastore and caches live under one directory rather than wherever a service was started from
+data_path: str = os.path.abspath(os.environ.get(
+    'BOUKEN_DATA_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')))
+
+queue_backend: QueueBackend = QueueBackend.GCP
+local_queue_path: str = os.path.join(data_path, 'bouken_queue.db')
+queue_visibility_timeout_seconds: float = 300
+
+map_days_ttl: int = 7
+local_cache_max_bytes: int = 256 * 1024 * 1024
+local_datastore_path: str = os.path.join(data_path, 'bouken_datastore.db')
+
+topology_cache_size: int = 8
+topology_cache_path: Optional[str] = os.path.join(data_path, 'bouken_topologies')
+topology_shared_memory: bool = True
+
+# Terraforming gives up on a map past either limit
+terraform_max_attempts: int = 50
+terraform_time_budget_seconds: float = 30
+# Finalizing can add land by filling interior oceans, by at most 2% of usable hexes across sampled layouts
+# and land percentages, so attempts are only restarted early once projected to fall short by more than this
+terraform_finalize_margin: float = 0.05
+
+stage_cache_path: str = os.path.join(data_path, 'bouken_stages')
+stage_cache_max_bytes: int = 512 * 1024 * 1024
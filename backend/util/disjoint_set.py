@@ -0,0 +1,49 @@
+import numpy as np
+
+
+class DisjointSet:
+    """
+    Disjoint-set (union-find) over integer ids, backed by an array of parent ids.
+    Unions are applied for whole arrays of id pairs at once, hooking larger roots under smaller ones
+    and compressing paths until every pair shares a root.
+    """
+    def __init__(self, size: int) -> None:
+        self._parents: np.ndarray = np.arange(size, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._parents)
+
+    def _compress(self) -> None:
+        """
+        Point every id directly at its root.
+        """
+        while True:
+            grandparents: np.ndarray = self._parents[self._parents]
+            if np.array_equal(grandparents, self._parents):
+                return
+            self._parents = grandparents
+
+    def union(self, a: np.ndarray, b: np.ndarray) -> None:
+        """
+        Join the sets of each id pair (a[i], b[i]).
+        """
+        a = np.asarray(a, dtype=np.int64)
+        b = np.asarray(b, dtype=np.int64)
+        while True:
+            self._compress()
+            root_a: np.ndarray = self._parents[a]
+            root_b: np.ndarray = self._parents[b]
+            apart: np.ndarray = root_a != root_b
+            if not apart.any():
+                return
+
+            low: np.ndarray = np.minimum(root_a[apart], root_b[apart])
+            high: np.ndarray = np.maximum(root_a[apart], root_b[apart])
+            np.minimum.at(self._parents, high, low)
+
+    def roots(self) -> np.ndarray:
+        """
+        Return the root id of every id, ids sharing a root belonging to the same set.
+        """
+        self._compress()
+        return self._parents.copy()
@@ -1,5 +1,5 @@
 import math
-from typing import List, Tuple, Optional, Set
+from typing import Dict, List, Tuple, Optional
 
 from processing.exterior.hex import Hex
 from util.i_hex_utility import IHexUtility
@@ -20,25 +20,49 @@ class HexUtils(IHexUtility):
     def get_max_distance(self) -> float:
         return self.max_distance
 
-    def distance(self, h: Hex, hex_types: List[Terraform]) -> float:
-        shortest_distance: float = float('inf')
-        end: Hex = self.expand_until_hit(h, hex_types)
-        if not end:
-            return 1
+    def distance_field(self, hexes: List[Hex], hex_types: List[Terraform]) -> Dict[Hex, float]:
+        # Expand outward from all target hexes at once, each reached hex inheriting the target it was reached from.
+        # Hexes reached from several targets within the same ring keep whichever target is closest.
+        nearest: Dict[Hex, Hex] = {}
+        expanded: Dict[Hex, float] = {}
+        for h in hexes:
+            if h.get_state() in hex_types:
+                nearest[h] = h
+                expanded[h] = 0
 
+        while expanded:
+            newly_expanded: Dict[Hex, float] = {}
+            for h in expanded:
+                end: Hex = nearest[h]
+                for n in h.direct_neighbors:
+                    if n not in nearest:
+                        nearest[n] = end
+                        newly_expanded[n] = self._measure(n, end)
+                    elif n in newly_expanded:
+                        distance: float = self._measure(n, end)
+                        if distance < newly_expanded[n]:
+                            nearest[n] = end
+                            newly_expanded[n] = distance
+
+            expanded = newly_expanded
+
+        field: Dict[Hex, float] = {}
+        for h in hexes:
+            end: Optional[Hex] = nearest.get(h)
+            field[h] = self.normalize(self._measure(h, end)) if end else 1
+
+        return field
+
+    @staticmethod
+    def _measure(h: Hex, end: Hex) -> float:
         dx: float = h.x - end.x
         dy: float = h.y - end.y
         if path_find_mode == Pathfinding.Manhattan:
-            distance = max(math.fabs(dx), math.fabs(dy))
+            return max(math.fabs(dx), math.fabs(dy))
         elif path_find_mode == Pathfinding.Euclidean:
-            distance = math.sqrt(dx * dx + dy * dy)
+            return math.sqrt(dx * dx + dy * dy)
         else:
-            distance = max(math.fabs(dx), math.fabs(dy))
-
-        if distance < shortest_distance:
-            shortest_distance = distance
-
-        return self.normalize(shortest_distance)
+            return max(math.fabs(dx), math.fabs(dy))
 
     def normalize(self, value: float) -> float:
         normalized: float = value / self.max_distance
@@ -72,22 +96,3 @@ class HexUtils(IHexUtility):
             vertices.append(vertex)
 
         return vertices
-
-    def expand_until_hit(self, h: Hex, hex_types: List[Terraform]) -> Optional[Hex]:
-        seen: Set[Hex] = set()
-        expanded: Set[Hex] = {h}
-        newly_expanded: Set[Hex] = set()
-        while expanded:
-            for h in expanded:
-                seen.add(h)
-                for n in h.direct_neighbors:
-                    if n._state in hex_types:
-                        return n
-                    else:
-                        if n not in seen:
-                            newly_expanded.add(n)
-
-            expanded = newly_expanded.copy()
-            newly_expanded.clear()
-
-        return None
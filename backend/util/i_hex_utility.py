@@ -1,4 +1,4 @@
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple
 
 from processing.exterior.hex import Hex
 
@@ -15,9 +15,10 @@ class IHexUtility:
         """Get max possible distance cap."""
         pass
 
-    def distance(self, h: Hex, hex_types: List[Terraform]) -> float:
+    def distance_field(self, hexes: List[Hex], hex_types: List[Terraform]) -> Dict[Hex, float]:
         """
-        Find the hex distance from start hex to any hex of target state.
+        Find the hex distance from every given hex to its nearest hex of target state, in one multi-source pass.
+        Hexes of target state are at distance 0, hexes which can't reach any target state are at 1.
         """
         pass
 
@@ -38,9 +39,3 @@ class IHexUtility:
         Calculate the vertices defining a hexes corners.
         """
         pass
-
-    def expand_until_hit(self, h: Hex, hex_types: List[Terraform]) -> Optional[Hex]:
-        """
-        Expand from hex until a hex type is hit, returning the last hex before hit.
-        """
-        pass
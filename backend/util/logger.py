@@ -26,14 +26,19 @@ class Logger(ILogger):
         self.logger.info(msg)
 
     def warn(self, msg, ex=None) -> None:
-        if ex:
-            msg.update({'exception': Logger._format_traceback(ex)})
-        self.logger.warning(msg)
+        self.logger.warning(Logger._with_traceback(msg, ex))
 
     def error(self, msg, ex=None) -> None:
-        if ex:
+        self.logger.error(Logger._with_traceback(msg, ex))
+
+    @staticmethod
+    def _with_traceback(msg, ex):
+        if not ex:
+            return msg
+        if isinstance(msg, dict):
             msg.update({'exception': Logger._format_traceback(ex)})
-        self.logger.error(msg)
+            return msg
+        return f'{msg}\n{ex}\n{Logger._format_traceback(ex)}'
 
     @staticmethod
     def _format_traceback(e) -> str:
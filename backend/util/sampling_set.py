@@ -0,0 +1,63 @@
+from random import Random
+from typing import Dict, Generic, Iterable, Iterator, List, TypeVar
+
+T = TypeVar('T')
+
+
+class SamplingSet(Generic[T]):
+    """
+    Set supporting constant time adding, removal and random picks.
+    Items are kept in an array alongside a map of each item's index, removal swapping
+    the last item into the removed item's slot.
+    """
+    def __init__(self, items: Iterable[T] = ()) -> None:
+        self._items: List[T] = []
+        self._indices: Dict[T, int] = {}
+        for item in items:
+            self.add(item)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, item: T) -> bool:
+        return item in self._indices
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._items)
+
+    def add(self, item: T) -> None:
+        if item not in self._indices:
+            self._indices[item] = len(self._items)
+            self._items.append(item)
+
+    def remove(self, item: T) -> None:
+        """
+        Remove an item, raising KeyError if it is not present.
+        """
+        index: int = self._indices.pop(item)
+        last: T = self._items.pop()
+        if index < len(self._items):
+            self._items[index] = last
+            self._indices[last] = index
+
+    def discard(self, item: T) -> None:
+        if item in self._indices:
+            self.remove(item)
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._indices.clear()
+
+    def choice(self, random: Random) -> T:
+        """
+        Pick a random item, leaving it in the set.
+        """
+        return self._items[random.randrange(len(self._items))]
+
+    def pop_random(self, random: Random) -> T:
+        """
+        Pick a random item and remove it from the set.
+        """
+        item: T = self.choice(random)
+        self.remove(item)
+        return item
@@ -0,0 +1,128 @@
+"""
+Named groups of read-only numpy arrays in shared memory, so every process of a service can map the same data
+instead of each holding its own copy.
+
+Each block starts with a header: 4s magic 'BKSA', u32 format version, 16s tag, u32 descriptor length,
+then the UTF-8 JSON descriptor giving each array's dtype, shape and offset from the first 64 byte boundary after it,
+where array data starts. The descriptor length is written last, so a block whose length is still 0 is still being
+filled in and is treated as missing.
+
+Block names are shared by everything on the host, so callers pass a tag identifying exactly what they expect
+a block to hold. Blocks with another magic, format version or tag were left by something else - another deployment,
+or an older version of this one - and are never mapped.
+
+Blocks are unlinked when the process which created them exits, including worker processes, the resource tracker
+unlinking them instead should it crash. Processes already mapping a block keep it, only later processes no longer
+finding it. Within a process, blocks stay mapped for its whole life, so arrays viewing them never outlive their memory.
+"""
+
+import json
+import struct
+import threading
+import time
+import numpy as np
+
+from multiprocessing import resource_tracker, shared_memory, util
+from typing import Dict, List, Optional
+
+_magic: bytes = b'BKSA'
+_format_version: int = 2
+_header: struct.Struct = struct.Struct('<4sI16sI')
+_alignment: int = 64
+_poll_seconds: float = 0.01
+
+_lock: threading.Lock = threading.Lock()
+_blocks: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _alignment - 1) // _alignment * _alignment
+
+
+def _views(block: shared_memory.SharedMemory, descriptor: List[dict], descriptor_size: int) -> Dict[str, np.ndarray]:
+    data_offset: int = _aligned(_header.size + descriptor_size)
+    arrays: Dict[str, np.ndarray] = {}
+    for entry in descriptor:
+        arrays[entry['name']] = np.ndarray(tuple(entry['shape']), dtype=np.dtype(entry['dtype']),
+                                           buffer=block.buf, offset=data_offset + entry['offset'])
+
+    return arrays
+
+
+def _tag(tag: bytes) -> bytes:
+    if len(tag) > 16:
+        raise ValueError(f'Shared array tags are at most 16 bytes, got {len(tag)}')
+    return tag.ljust(16, b'\0')
+
+
+def attach(name: str, tag: bytes, wait_seconds: float = 0) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Map the arrays of an existing block, None if there is no such block, it was not created with this format version
+    and tag, or it is still being filled in after waiting up to the given time for it.
+    """
+    tag = _tag(tag)
+    with _lock:
+        block: Optional[shared_memory.SharedMemory] = _blocks.get(name)
+        if block is None:
+            try:
+                block = shared_memory.SharedMemory(name=name)
+            except FileNotFoundError:
+                return None
+
+            # Attaching registers the block with this process's resource tracker too, which would unlink it
+            # when this process exits even though it didn't create it
+            resource_tracker.unregister(block._name, 'shared_memory')
+
+        deadline: float = time.monotonic() + wait_seconds
+        magic, version, block_tag, length = _header.unpack_from(block.buf, 0)
+        while length == 0 and time.monotonic() < deadline:
+            time.sleep(_poll_seconds)
+            magic, version, block_tag, length = _header.unpack_from(block.buf, 0)
+
+        if magic != _magic or version != _format_version or block_tag != tag or length == 0:
+            if name not in _blocks:
+                block.close()
+            return None
+
+        _blocks[name] = block
+        descriptor: List[dict] = json.loads(bytes(block.buf[_header.size:_header.size + length]).decode('utf-8'))
+        views: Dict[str, np.ndarray] = _views(block, descriptor, length)
+        for view in views.values():
+            view.flags.writeable = False
+
+        return views
+
+
+def create(name: str, tag: bytes, arrays: Dict[str, np.ndarray]) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Copy arrays into a new block tagged with the given (at most 16 byte) tag, returning views of them there.
+    None if a block of that name already exists, so another process got there first and it should be attached instead.
+    """
+    tag = _tag(tag)
+    descriptor: List[dict] = []
+    offset: int = 0
+    for array_name, array in arrays.items():
+        descriptor.append({'name': array_name, 'dtype': array.dtype.str, 'shape': array.shape, 'offset': offset})
+        offset = _aligned(offset + array.nbytes)
+
+    descriptor_json: bytes = json.dumps(descriptor).encode('utf-8')
+    size: int = _aligned(_header.size + len(descriptor_json)) + offset
+
+    with _lock:
+        try:
+            block: shared_memory.SharedMemory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            return None
+
+        views: Dict[str, np.ndarray] = _views(block, descriptor, len(descriptor_json))
+        for array_name, array in arrays.items():
+            views[array_name][...] = array
+            views[array_name].flags.writeable = False
+
+        block.buf[_header.size:_header.size + len(descriptor_json)] = descriptor_json
+        _header.pack_into(block.buf, 0, _magic, _format_version, tag, len(descriptor_json))
+        _blocks[name] = block
+
+        # Run on exit by multiprocessing in worker processes as well, unlike atexit
+        util.Finalize(block, block.unlink, exitpriority=0)
+        return views
@@ -0,0 +1,56 @@
+"""
+Snapshots of generation state, pickled and compressed.
+
+Services the state refers to (such as the hex utility) are left out of snapshots by name,
+then swapped for the restoring side's own services when loaded.
+"""
+
+import copyreg
+import gc
+import io
+import pickle
+import threading
+import zlib
+
+from typing import Callable, Dict, Tuple
+
+# Bumped whenever pickled state changes shape, or generation would no longer continue from it the same way
+version: int = 4
+
+# Services of the snapshot currently being loaded on this thread
+_loading: threading.local = threading.local()
+
+
+def _service(name: str) -> object:
+    return _loading.services[name]
+
+
+def _reducer(name: str) -> Callable[[object], Tuple[Callable[[str], object], Tuple[str]]]:
+    return lambda service: (_service, (name,))
+
+
+def dump(state: object, services: Dict[str, object]) -> bytes:
+    buffer: io.BytesIO = io.BytesIO()
+    pickler: pickle.Pickler = pickle.Pickler(buffer, protocol=pickle.HIGHEST_PROTOCOL)
+
+    # Looked up by type within the pickler itself, so costs nothing for every other object pickled
+    pickler.dispatch_table = copyreg.dispatch_table.copy()
+    for name, service in services.items():
+        pickler.dispatch_table[type(service)] = _reducer(name)
+
+    pickler.dump(state)
+    return zlib.compress(buffer.getvalue(), 1)
+
+
+def load(snapshot: bytes, services: Dict[str, object]) -> object:
+    # Loading creates a whole grid's worth of objects at once, each batch of which would otherwise
+    # set off a garbage collection walking everything loaded so far
+    collecting: bool = gc.isenabled()
+    gc.disable()
+    _loading.services = services
+    try:
+        return pickle.loads(zlib.decompress(snapshot))
+    finally:
+        _loading.services = None
+        if collecting:
+            gc.enable()
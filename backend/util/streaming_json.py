@@ -0,0 +1,55 @@
+"""
+Incremental JSON encoding, encoding maps piece by piece as their layers are walked
+instead of building one large dict and encoding it whole. Results are stored whole by every cache tier,
+so the chunks are joined into a map's bytes, only skipping the intermediate dict.
+"""
+
+import json
+
+from typing import Iterable, Iterator, List, Tuple
+
+chunk_bytes: int = 64 * 1024
+
+_encoder: json.JSONEncoder = json.JSONEncoder(separators=(',', ':'))
+
+
+class StreamedObject:
+    """
+    JSON object value whose (key, value) items are only produced as it is encoded.
+    """
+    def __init__(self, items: Iterable[Tuple[str, object]]):
+        self.items: Iterable[Tuple[str, object]] = items
+
+
+def _iter_object(items: Iterable[Tuple[str, object]]) -> Iterator[str]:
+    yield '{'
+    separator: str = ''
+    for key, value in items:
+        yield separator
+        yield _encoder.encode(key)
+        yield ':'
+        if isinstance(value, StreamedObject):
+            yield from _iter_object(value.items)
+        else:
+            yield _encoder.encode(value)
+        separator = ','
+    yield '}'
+
+
+def iter_json(items: Iterable[Tuple[str, object]]) -> Iterator[bytes]:
+    """
+    Encode a JSON object from its (key, value) items, yielding UTF-8 chunks of roughly chunk_bytes.
+    Items are consumed lazily, so later items may depend on work done encoding earlier ones.
+    """
+    buffer: List[str] = []
+    size: int = 0
+    for piece in _iter_object(items):
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_bytes:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            size = 0
+
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')